@@ -0,0 +1,86 @@
+from jsonrpc_stream import protocol
+
+import dataclasses
+import typing
+
+# placeholder object standing in for a binary segment: {"$attachment": 0}
+KEY = '$attachment'
+BINARY = (bytes, bytearray, memoryview)
+
+# the entity field that carries user data, per entity type
+FIELDS: typing.Dict[type, str] = {
+    protocol.RpcRequest:      'params',
+    protocol.RpcNotification: 'params',
+    protocol.RpcResult:       'result',
+}
+
+
+def field_of(entity: protocol.RpcEntity) -> typing.Optional[str]:
+    for cls in type(entity).__mro__:
+        if cls in FIELDS: return FIELDS[cls]
+    return None
+
+
+def extract(value: typing.Any, segments: list) -> typing.Any:
+    """
+    replaces every binary value with a placeholder referencing its index
+    in [segments]. containers are only copied when they contain binaries
+    """
+    if isinstance(value, BINARY):
+        segments.append(value)
+        return {KEY: len(segments) - 1}
+
+    if isinstance(value, dict):
+        changed = None
+        for k, v in value.items():
+            new = extract(v, segments)
+            if new is not v:
+                if changed is None: changed = dict(value)
+                changed[k] = new
+        return value if changed is None else changed
+
+    if isinstance(value, (list, tuple)):
+        items = [extract(v, segments) for v in value]
+        if any(new is not old for new, old in zip(items, value)):
+            return items
+    return value
+
+
+def resolve(value: typing.Any, segments: typing.Sequence) -> typing.Any:
+    """replaces placeholders in freshly parsed data, in place"""
+    if isinstance(value, dict):
+        if len(value) == 1 and KEY in value:
+            try: return segments[value[KEY]]
+            except (IndexError, TypeError): return value
+        for k, v in value.items(): value[k] = resolve(v, segments)
+    elif isinstance(value, list):
+        for i, v in enumerate(value): value[i] = resolve(v, segments)
+    return value
+
+
+def extract_entity(
+    entity: protocol.RpcEntity, segments: list
+) -> protocol.RpcEntity:
+    if isinstance(entity, protocol.RpcBatch):
+        entities = [extract_entity(e, segments) for e in entity.entities]
+        return protocol.RpcBatch(entities)
+
+    field = field_of(entity)
+    if field is None: return entity
+    value = getattr(entity, field)
+    new = extract(value, segments)
+    if new is value: return entity
+    return dataclasses.replace(entity, **{field: new})
+
+
+def resolve_entity(
+    entity: protocol.RpcEntity, segments: typing.Sequence
+) -> protocol.RpcEntity:
+    if isinstance(entity, protocol.RpcBatch):
+        for e in entity.entities: resolve_entity(e, segments)
+        return entity
+
+    field = field_of(entity)
+    if field is not None:
+        setattr(entity, field, resolve(getattr(entity, field), segments))
+    return entity
@@ -0,0 +1,211 @@
+"""
+load generator for json-rpc servers, driving them through the
+library's own client path:
+
+    python -m jsonrpc_stream.bench --tcp 127.0.0.1:8000 \\
+        --call 'Kek/yeet=[1]' --concurrency 64 --duration 10
+"""
+from jsonrpc_stream import endpoint
+from jsonrpc_stream import metrics
+from jsonrpc_stream import pool
+
+import argparse
+import itertools
+import asyncio
+import typing
+import json
+import sys
+
+PERCENTILES = (50, 75, 90, 95, 99, 99.9, 99.99)
+
+
+class Call(typing.NamedTuple):
+    method: str
+    params: typing.Any
+
+    @classmethod
+    def parse(cls, spec: str) -> 'Call':
+        """'Namespace/method' or 'Namespace/method=<json params>'"""
+        method, _, params = spec.partition('=')
+        return cls(method, json.loads(params) if params else None)
+
+    async def send(self, e: endpoint.JsonRpcEndpoint) -> typing.Any:
+        if isinstance(self.params, dict):
+            return await e.call(None, self.method, **self.params)
+        if isinstance(self.params, list):
+            return await e.call(None, self.method, *self.params)
+        if self.params is None: return await e.call(None, self.method)
+        return await e.call(None, self.method, self.params)
+
+
+class LoadGenerator:
+    """
+    keeps [concurrency] calls in flight (closed loop), or starts [rate]
+    calls per second regardless of completions (open loop). open loop
+    latency counts from the moment a call was due, so a stalling server
+    shows up in the distribution instead of just lowering the rate
+    """
+    def __init__(
+        self,
+        endpoints: typing.Sequence[endpoint.JsonRpcEndpoint],
+        calls: typing.Sequence[Call],
+        concurrency: int = 1,
+        rate: float = 0,
+        duration: float = 10.0,
+        warmup: float = 0.0,
+        loop: asyncio.AbstractEventLoop = None
+    ):
+        self.loop = loop or asyncio.get_event_loop()
+        self.endpoints = endpoints
+        self.calls = calls
+        self.concurrency = concurrency
+        self.rate = rate
+        self.duration = duration
+        self.warmup = warmup
+        self.histogram = metrics.Histogram()
+        self.methods: typing.Dict[str, metrics.Histogram] = {}
+        self.errors = 0
+        self._next = itertools.count()
+
+    def _pick(self) -> typing.Tuple[endpoint.JsonRpcEndpoint, Call]:
+        n = next(self._next)
+        return (
+            self.endpoints[n % len(self.endpoints)],
+            self.calls[n % len(self.calls)]
+        )
+
+    async def _one(self, due: float, measured_from: float):
+        e, call = self._pick()
+        try: await call.send(e)
+        except Exception: failed = True
+        else: failed = False
+        if due < measured_from: return
+
+        latency = self.loop.time() - due
+        if failed: self.errors += 1
+        self.histogram.record(latency)
+        self.methods.setdefault(call.method, metrics.Histogram()).record(
+            latency
+        )
+
+    async def _closed(self, measured_from: float, end: float):
+        async def worker():
+            while self.loop.time() < end:
+                await self._one(self.loop.time(), measured_from)
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+
+    async def _open(self, start: float, measured_from: float, end: float):
+        tasks = set()
+        for i in itertools.count():
+            due = start + i / self.rate
+            if due >= end: break
+            delay = due - self.loop.time()
+            if delay > 0: await asyncio.sleep(delay)
+            task = self.loop.create_task(self._one(due, measured_from))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks: await asyncio.wait(tasks)
+
+    async def run(self) -> dict:
+        start = self.loop.time()
+        measured_from = start + self.warmup
+        end = measured_from + self.duration
+        if self.rate: await self._open(start, measured_from, end)
+        else: await self._closed(measured_from, end)
+        elapsed = max(self.loop.time() - measured_from, 1e-9)
+        return self.report(elapsed)
+
+    def report(self, elapsed: float) -> dict:
+        return {
+            'mode': 'open' if self.rate else 'closed',
+            'duration': elapsed,
+            'requests': self.histogram.count,
+            'errors': self.errors,
+            'throughput': self.histogram.count / elapsed,
+            'latency': self.histogram.summary(),
+            'percentiles': [
+                (p, self.histogram.percentile(p)) for p in PERCENTILES
+            ],
+            'methods': {
+                method: h.summary() for method, h in self.methods.items()
+            }
+        }
+
+
+def format_report(report: dict) -> str:
+    lines = [
+        f"{report['mode']} loop, {report['duration']:.2f}s: "
+        f"{report['requests']} requests, {report['errors']} errors, "
+        f"{report['throughput']:,.0f} req/s",
+        '',
+        '  percentile    latency'
+    ]
+    for p, value in report['percentiles']:
+        lines.append(f'  {p:>10}  {value * 1e3:>9.3f}ms')
+    lines.append(f"  {'max':>10}  {report['latency']['max'] * 1e3:>9.3f}ms")
+    for method, summary in report['methods'].items():
+        lines.append(
+            f"\n{method}: {summary['count']} requests, "
+            f"p50 {summary['p50'] * 1e3:.3f}ms, "
+            f"p99 {summary['p99'] * 1e3:.3f}ms"
+        )
+    return '\n'.join(lines)
+
+
+async def run(args: argparse.Namespace) -> dict:
+    if args.unix: connector = pool.unix_connector(args.unix)
+    else:
+        host, _, port = args.tcp.rpartition(':')
+        connector = pool.tcp_connector(host or '127.0.0.1', int(port))
+
+    endpoints = []
+    for _ in range(args.connections):
+        endpoints.append(endpoint.JsonRpcEndpoint(await connector()).start())
+    try: return await LoadGenerator(
+        endpoints,
+        [Call.parse(spec) for spec in args.call],
+        args.concurrency,
+        args.rate,
+        args.duration,
+        args.warmup
+    ).run()
+    finally:
+        for e in endpoints: e.close()
+
+
+def parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='python -m jsonrpc_stream.bench',
+        description='load generator for json-rpc servers'
+    )
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--tcp', help='host:port to connect to')
+    target.add_argument('--unix', help='unix socket path to connect to')
+    parser.add_argument(
+        '--call', action='append', required=True,
+        help="method to call, with optional json params: 'Kek/yeet=[1]'. "
+        'repeat to mix several calls'
+    )
+    parser.add_argument('--connections', type=int, default=1)
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument('--concurrency', type=int, default=1,
+                      help='calls in flight at any time (closed loop)')
+    load.add_argument('--rate', type=float, default=0,
+                      help='calls started per second (open loop)')
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--warmup', type=float, default=0.0)
+    parser.add_argument('--json', action='store_true',
+                        help='print the report as json')
+    return parser
+
+
+def main(argv: typing.Sequence[str] = None) -> int:
+    args = parser().parse_args(argv)
+    report = asyncio.run(run(args))
+    print(json.dumps(report, indent=2) if args.json
+          else format_report(report))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
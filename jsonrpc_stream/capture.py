@@ -0,0 +1,184 @@
+from jsonrpc_stream import gateway
+from jsonrpc_stream import metrics
+from jsonrpc_stream import protocol
+from jsonrpc_stream import streams
+
+import itertools
+import logging
+import asyncio
+import typing
+import struct
+import time
+import mmap
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'JRPCAP\x00\x01'
+# direction, wall clock timestamp, body length
+RECORD = struct.Struct('>BdI')
+INBOUND = 0
+OUTBOUND = 1
+
+
+class CaptureWriter:
+    """appends the bodies of every frame a stream sends or receives"""
+    def __init__(self, path: str, buffering: int = 1 << 16):
+        self.file = open(path, 'wb', buffering=buffering)
+        self.file.write(MAGIC)
+        self.records = 0
+
+    def record(self, direction: int, body: typing.Any):
+        self.file.write(RECORD.pack(direction, time.time(), len(body)))
+        self.file.write(body)
+        self.records += 1
+
+    def inbound(self, body: typing.Any): self.record(INBOUND, body)
+
+    def outbound(self, body: typing.Any): self.record(OUTBOUND, body)
+
+    def flush(self): self.file.flush()
+
+    def close(self): self.file.close()
+
+
+class Record(typing.NamedTuple):
+    direction: int
+    timestamp: float
+    body: memoryview
+
+
+class CaptureReader:
+    """memory maps a capture, records reference the mapping directly"""
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.map[:len(MAGIC)] != MAGIC:
+            self.map.close()
+            raise ValueError(f'{path} is not a capture file')
+        self.view = memoryview(self.map)
+
+    def __iter__(self) -> typing.Iterator[Record]:
+        offset = len(MAGIC)
+        while offset + RECORD.size <= len(self.view):
+            direction, timestamp, length = RECORD.unpack_from(
+                self.view, offset
+            )
+            offset += RECORD.size
+            # a truncated tail is what an interrupted capture leaves behind
+            if offset + length > len(self.view): break
+            yield Record(
+                direction, timestamp, self.view[offset:offset + length]
+            )
+            offset += length
+
+    def close(self):
+        self.view.release()
+        self.map.close()
+
+
+class Replayer:
+    """
+    replays the requests and notifications of a capture in [direction]
+    over [stream], at the recorded pace divided by [speed], or as fast
+    as possible with a speed of 0. paced latencies are measured from the
+    moment a request was due, so a falling behind server is not hidden
+    """
+    def __init__(
+        self,
+        reader: CaptureReader,
+        stream: streams.ContentLengthEntityStream,
+        speed: float = 1.0,
+        direction: int = INBOUND,
+        loop: asyncio.AbstractEventLoop = None
+    ):
+        self.loop = loop or asyncio.get_event_loop()
+        self.reader = reader
+        self.stream = stream
+        self.speed = speed
+        self.direction = direction
+        self.pending: typing.Dict[int, typing.Tuple[str, float]] = {}
+        self.histograms: typing.Dict[str, metrics.Histogram] = {}
+        self.sent = 0
+        self.completed = 0
+        self.errors = 0
+        self._ids = itertools.count(1)
+        self._settled = asyncio.Event()
+
+    async def _receive(self):
+        while True:
+            body = await self.stream.fetch_body()
+            if body is None: break
+            if isinstance(body, protocol.RpcMalformed): continue
+            entity = self.stream.formatter.bytes_to_entity(body)
+            try: method, started = self.pending.pop(entity.id)
+            except (AttributeError, KeyError, TypeError): continue
+
+            if isinstance(entity, protocol.RpcError): self.errors += 1
+            self.completed += 1
+            self.histograms.setdefault(method, metrics.Histogram()).record(
+                self.loop.time() - started
+            )
+            if not self.pending: self._settled.set()
+        self._settled.set()
+
+    async def _send(self):
+        start = self.loop.time()
+        first = None
+        for record in self.reader:
+            if record.direction != self.direction: continue
+            body = bytes(record.body)
+            try: method, span = gateway.peek(body)
+            except ValueError: continue
+            if method is None: continue
+
+            due = self.loop.time()
+            if self.speed:
+                if first is None: first = record.timestamp
+                due = start + (record.timestamp - first) / self.speed
+                delay = due - self.loop.time()
+                if delay > 0: await asyncio.sleep(delay)
+
+            if span:
+                id = next(self._ids)
+                self.pending[id] = (method, due)
+                body = gateway.splice(body, span, str(id).encode())
+            await self.stream.dispatch_body(body)
+            self.sent += 1
+
+    async def run(self, timeout: float = None) -> dict:
+        receiver = self.loop.create_task(self._receive())
+        start = self.loop.time()
+        await self._send()
+        if self.pending and not receiver.done():
+            self._settled.clear()
+            try: await asyncio.wait_for(self._settled.wait(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f'{len(self.pending)} calls never completed')
+        duration = self.loop.time() - start
+        receiver.cancel()
+        return self.report(duration)
+
+    def report(self, duration: float) -> dict:
+        return {
+            'duration': duration,
+            'sent': self.sent,
+            'completed': self.completed,
+            'errors': self.errors,
+            'lost': len(self.pending),
+            'throughput': self.completed / duration if duration else 0.0,
+            'methods': {
+                method: h.summary() for method, h in self.histograms.items()
+            }
+        }
+
+
+async def replay(
+    path: str,
+    stream: streams.ContentLengthEntityStream,
+    speed: float = 1.0,
+    direction: int = INBOUND,
+    timeout: float = None
+) -> dict:
+    reader = CaptureReader(path)
+    try: return await Replayer(reader, stream, speed, direction).run(timeout)
+    finally: reader.close()
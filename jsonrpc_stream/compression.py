@@ -0,0 +1,106 @@
+from jsonrpc_stream import contracts
+
+import typing
+import zlib
+import time
+
+
+class ZlibCodec(contracts.RpcFrameCodec):
+    name = 'deflate'
+
+    def __init__(self, level: int = 6):
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        return zlib.compress(data, self.level)
+
+    def decompress(self, data: bytes, max_size: int = 0) -> bytes:
+        decompressor = zlib.decompressobj()
+        raw = decompressor.decompress(data, max_size)
+        if decompressor.unconsumed_tail:
+            raise ValueError(f'decompressed body exceeds {max_size} bytes')
+        # a cut off stream would otherwise decode to a valid looking prefix
+        if not decompressor.eof:
+            raise ValueError('truncated compressed body')
+        return raw
+
+
+class CompressionStats:
+    def __init__(self):
+        self.frames_compressed = 0
+        self.frames_skipped = 0
+        self.raw_out = 0
+        self.compressed_out = 0
+        self.compress_seconds = 0.0
+        self.frames_decompressed = 0
+        self.compressed_in = 0
+        self.raw_in = 0
+        self.decompress_seconds = 0.0
+
+    @property
+    def ratio(self) -> float:
+        """compressed size in relation to the raw size of outgoing frames"""
+        return self.compressed_out / self.raw_out if self.raw_out else 1.0
+
+    def to_dict(self) -> dict:
+        return dict(vars(self), ratio=self.ratio)
+
+
+class FrameCompressor:
+    """
+    negotiates and applies the content encoding of one stream.
+    each side advertises its codecs with Accept-Encoding on its first
+    frame, frames are only compressed with a codec the peer advertised
+    """
+    def __init__(
+        self,
+        codecs: typing.Sequence[contracts.RpcFrameCodec],
+        min_size: int = 1024
+    ):
+        self.codecs = {c.name: c for c in codecs}
+        self.min_size = min_size
+        self.selected: typing.Optional[contracts.RpcFrameCodec] = None
+        self.advertised = False
+        self.stats = CompressionStats()
+
+    def headers(self) -> str:
+        if self.advertised or not self.codecs: return ''
+        self.advertised = True
+        return f'Accept-Encoding: {", ".join(self.codecs)}\r\n'
+
+    def negotiate(self, accepted: str):
+        names = [name.strip() for name in accepted.split(',')]
+        self.selected = next(
+            (self.codecs[n] for n in names if n in self.codecs), None
+        )
+
+    def compress(self, body: bytes) -> typing.Tuple[bytes, str]:
+        """returns the body to send and its Content-Encoding header"""
+        if self.selected is None or len(body) < self.min_size:
+            self.stats.frames_skipped += 1
+            return body, ''
+
+        start = time.perf_counter()
+        compressed = self.selected.compress(body)
+        self.stats.compress_seconds += time.perf_counter() - start
+        if len(compressed) >= len(body):
+            self.stats.frames_skipped += 1
+            return body, ''
+
+        self.stats.frames_compressed += 1
+        self.stats.raw_out += len(body)
+        self.stats.compressed_out += len(compressed)
+        return compressed, f'Content-Encoding: {self.selected.name}\r\n'
+
+    def decompress(
+        self, body: bytes, encoding: str, max_size: int = 0
+    ) -> bytes:
+        """raises KeyError for encodings we do not know"""
+        codec = self.codecs[encoding]
+        start = time.perf_counter()
+        raw = codec.decompress(body, max_size)
+        self.stats.decompress_seconds += time.perf_counter() - start
+        self.stats.frames_decompressed += 1
+        self.stats.compressed_in += len(body)
+        self.stats.raw_in += len(raw)
+        return raw
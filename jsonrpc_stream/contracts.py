@@ -40,3 +40,17 @@ class RpcEntityStream(abc.ABC):
     def close(self):
         """forcefully close the stream from the endpoint"""
         raise NotImplementedError
+
+
+class RpcFrameCodec(abc.ABC):
+    """a content encoding applied to whole frame bodies"""
+    name: str
+
+    @abc.abstractmethod
+    def compress(self, data: bytes) -> bytes:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def decompress(self, data: bytes, max_size: int = 0) -> bytes:
+        """raises when the result would exceed [max_size], 0 is unlimited"""
+        raise NotImplementedError
@@ -4,6 +4,7 @@ import types
 import typing
 import inspect
 import functools
+import weakref
 
 
 class DiscoverMode(enum.Enum):
@@ -55,52 +56,180 @@ def notification(
     return method
 
 
+class Entry(typing.NamedTuple):
+    attr: str
+    name: str
+    type_: RequestType
+    coroutine: bool
+    asyncgen: bool
+    function: typing.Callable
+
+
+def make_entry(attr: str, member: typing.Callable) -> Entry:
+    mark = getattr(
+        member, '__jsonrpc__', DecoratedTarget(attr, RequestType.request)
+    )
+    return Entry(
+        attr, mark.name, mark.type_,
+        inspect.iscoroutinefunction(member),
+        inspect.isasyncgenfunction(member),
+        # the plain function, a bound method would keep its instance alive
+        getattr(member, '__func__', member)
+    )
+
+
+class Table:
+    """the discovered rpc methods of a class, shared by its instances"""
+    def __init__(self, entries: typing.Iterable[Entry]):
+        self.entries = tuple(entries)
+        self.requests: typing.Dict[str, Entry] = {}
+        self.notifications: typing.Dict[str, Entry] = {}
+        for e in self.entries:
+            if e.type_ == RequestType.request: self.requests[e.name] = e
+            elif e.type_ == RequestType.notification:
+                self.notifications[e.name] = e
+        self.wrappers: typing.Dict[typing.Tuple[str, bool], typing.Any] = {}
+
+
+def _decorated(obj: typing.Any): return hasattr(obj, '__jsonrpc__')
+
+
+def _public(obj: typing.Any):
+    return callable(obj) and not obj.__name__.startswith('_')
+
+
+DISPATCH = {
+    DiscoverMode.decorated: _decorated,
+    DiscoverMode.public:    _public,
+    DiscoverMode.all:       callable,
+}
+PROXY = {
+    DiscoverMode.decorated: _decorated,
+    DiscoverMode.public:    _public,
+    DiscoverMode.all:       lambda obj: isinstance(obj, types.MethodType),
+}
+
+_tables: 'weakref.WeakKeyDictionary[type, typing.Dict[typing.Any, Table]]' = \
+    weakref.WeakKeyDictionary()
+
+
+def _bound(obj: typing.Any, attr: str, member: typing.Any) -> typing.Any:
+    # methods as the instance would see them, without evaluating
+    # properties or other descriptors of the class
+    static = inspect.getattr_static(type(obj), attr, None)
+    if isinstance(static, (types.FunctionType, staticmethod, classmethod)):
+        return static.__get__(obj, type(obj))
+    return member
+
+
+def discover(
+    obj: typing.Any,
+    mode: DiscoverMode,
+    predicates: typing.Dict[DiscoverMode, typing.Callable] = DISPATCH
+) -> Table:
+    """
+    the rpc methods of [obj]. members of its class are inspected once
+    and shared, attributes of the instance itself only apply to [obj]
+    """
+    istarget = predicates[mode]
+    if isinstance(obj, (type, types.ModuleType)):
+        return Table(
+            make_entry(*m) for m in inspect.getmembers(obj, istarget)
+        )
+
+    instance = getattr(obj, '__dict__', {})
+    cls = type(obj)
+    tables = _tables.setdefault(cls, {})
+    key = (mode, id(predicates))
+    table = tables.get(key)
+    if table is None:
+        members = (
+            (attr, _bound(obj, attr, member))
+            for attr, member in inspect.getmembers(cls)
+        )
+        table = tables[key] = Table(
+            make_entry(attr, member) for attr, member in members
+            if istarget(member)
+        )
+
+    extra = [
+        make_entry(attr, member) for attr, member in instance.items()
+        if istarget(member)
+    ]
+    if not extra: return table
+    return Table(
+        [e for e in table.entries if e.attr not in instance] + extra
+    )
+
+
 class DispatchNamespace:
     def __init__(self, obj: typing.Any, mode: DiscoverMode):
-        if mode == DiscoverMode.decorated:
-            def istarget(obj: typing.Any):
-                return hasattr(obj, '__jsonrpc__')
-        elif mode == DiscoverMode.public:
-            def istarget(obj: typing.Any):
-                return callable(obj) and not obj.__name__.startswith('_')
-        elif mode == DiscoverMode.all:
-            def istarget(obj: typing.Any): return callable(obj)
-
-        targets = inspect.getmembers(obj, predicate=istarget)
-        self.notifications: typing.Dict[str, typing.Callable] = {}
-        self.requests: typing.Dict[str, typing.Callable] = {}
-        for name, target in targets:
-            mark = getattr(
-                target,
-                '__jsonrpc__',
-                DecoratedTarget(name, RequestType.request)
-            )
-            if not inspect.iscoroutinefunction(target):
-                t = target
+        self.obj = obj
+        self.table = discover(obj, mode)
+
+    def _bind(
+        self, entries: typing.Dict[str, Entry]
+    ) -> typing.Dict[str, typing.Callable]:
+        return {name: getattr(self.obj, e.attr) for name, e in entries.items()}
+
+    @property
+    def requests(self) -> typing.Dict[str, typing.Callable]:
+        return self._bind(self.table.requests)
+
+    @property
+    def notifications(self) -> typing.Dict[str, typing.Callable]:
+        return self._bind(self.table.notifications)
 
-                async def async_wrapper(*args, **kwargs):
-                    return t(*args, **kwargs)
-                target = async_wrapper
-            if mark.type_ == RequestType.request:
-                self.requests[mark.name] = target
-            elif mark.type_ == RequestType.notification:
-                self.notifications[mark.name] = target
+    @property
+    def targets(self) -> typing.Dict[str, typing.Callable]:
+        """the handlers by their rpc name"""
+        return {e.name: getattr(self.obj, e.attr) for e in self.table.entries}
 
     async def notify(self, method: str, *args, **kwargs):
-        try: await self.notifications[method](*args, **kwargs)
-        except KeyError:
+        e = self.table.notifications.get(method)
+        if e is None:
             raise exceptions.JsonRpcMethodNotFound.from_method(method)
+        target = getattr(self.obj, e.attr)
+        try:
+            if e.coroutine: await target(*args, **kwargs)
+            else: target(*args, **kwargs)
         except TypeError:
             raise exceptions.JsonRpcInvalidParams.from_method(method)
 
     async def call(self, method: str, *args, **kwargs):
-        try: return await self.requests[method](*args, **kwargs)
-        except KeyError:
+        e = self.table.requests.get(method)
+        if e is None:
             raise exceptions.JsonRpcMethodNotFound.from_method(method)
+        target = getattr(self.obj, e.attr)
+        try:
+            if e.coroutine: return await target(*args, **kwargs)
+            return target(*args, **kwargs)
         except TypeError:
             raise exceptions.JsonRpcInvalidParams.from_method(method)
 
 
+def proxy_wrapper(e: Entry, streaming: bool) -> typing.Callable:
+    """a wrapper forwarding to the ProxyNamespace it is bound to"""
+    name = e.name
+    if streaming and e.asyncgen:
+        def stream_wrapper(proxy: 'ProxyNamespace', *args, **kwargs):
+            return proxy.callback_stream(  # type: ignore
+                proxy.name, name, *args, **kwargs
+            )
+        wrapper: typing.Callable = stream_wrapper
+    elif e.type_ == RequestType.notification:
+        async def notify_wrapper(proxy: 'ProxyNamespace', *args, **kwargs):
+            return await proxy.callback_notify(
+                proxy.name, name, *args, **kwargs
+            )
+        wrapper = notify_wrapper
+    else:
+        async def request_wrapper(proxy: 'ProxyNamespace', *args, **kwargs):
+            return await proxy.request(name, *args, **kwargs)
+        wrapper = request_wrapper
+    return functools.update_wrapper(wrapper, e.function)
+
+
 class ProxyNamespace:
     def __init__(
         self,
@@ -108,44 +237,36 @@ class ProxyNamespace:
         obj:      typing.Any,
         mode:     DiscoverMode,
         callback_request: typing.Callable,
-        callback_notify: typing.Callable
+        callback_notify: typing.Callable,
+        callback_stream: typing.Callable = None,
+        prepare: typing.Callable = None
     ):
         self.name = name
-        if mode == DiscoverMode.decorated:
-            def istarget(obj: typing.Any):
-                return hasattr(obj, '__jsonrpc__')
-        elif mode == DiscoverMode.public:
-            def istarget(obj: typing.Any):
-                return callable(obj) and not obj.__name__.startswith('_')
-        elif mode == DiscoverMode.all:
-            def istarget(obj: typing.Any):
-                return isinstance(obj, types.MethodType)
-
-        targets = inspect.getmembers(obj, predicate=istarget)
-        self.targets: typing.Dict[str, typing.Callable] = {}
-
-        for name, target in targets:
-            mark = getattr(
-                target,
-                '__jsonrpc__',
-                DecoratedTarget(name, RequestType.request)
-            )
+        self.callback_request = callback_request
+        self.callback_notify = callback_notify
+        self.callback_stream = callback_stream
+        self.prepare = prepare
+        self.prepared: typing.Dict[str, typing.Callable] = {}
+        self.table = discover(obj, mode, PROXY)
 
-            def capture(mark=mark):
-                @functools.wraps(target)
-                async def request_wrapper(*args, **kwargs):
-                    return await callback_request(
-                        self.name, mark.name, *args, **kwargs
-                    )
-
-                @functools.wraps(target)
-                async def notify_wrapper(*args, **kwargs):
-                    return await callback_notify(
-                        self.name, mark.name, *args, **kwargs
-                    )
-
-                if mark.type_ == RequestType.request: return request_wrapper
-                elif mark.type_ == RequestType.notification:
-                    return notify_wrapper
+        streaming = callback_stream is not None
+        for e in self.table.entries:
+            wrapper = self.table.wrappers.get((e.attr, streaming))
+            if wrapper is None:
+                wrapper = self.table.wrappers[(e.attr, streaming)] = \
+                    proxy_wrapper(e, streaming)
+            setattr(
+                obj, getattr(e.function, '__name__', e.attr),
+                types.MethodType(wrapper, self)
+            )
 
-            setattr(obj, target.__name__, capture())
+    async def request(self, name: str, *args, **kwargs) -> typing.Any:
+        if not self.prepare:
+            return await self.callback_request(
+                self.name, name, *args, **kwargs
+            )
+        # encode the constant part of each request once, on first use
+        prepared = self.prepared.get(name)
+        if prepared is None:
+            prepared = self.prepared[name] = self.prepare(self.name, name)
+        return await prepared(*args, **kwargs)
@@ -0,0 +1,192 @@
+import dataclasses
+import datetime
+import base64
+import typing
+import enum
+
+Encoder = typing.Callable[[typing.Any], typing.Any]
+
+# values json can already represent, results of these types are left alone.
+# binaries stay binaries so attachments can still pick them up
+SCALARS = frozenset((
+    str, int, float, bool, type(None), bytes, bytearray, memoryview
+))
+CONTAINERS = (dict, list, tuple)
+# subclasses of these are written by json itself, attributes they
+# might carry in a __dict__ are not what they represent
+JSON_BASES = (str, int, float, bytes, bytearray) + CONTAINERS
+
+
+def encode_bytes(value: typing.Any) -> str:
+    return base64.b64encode(value).decode('ascii')
+
+
+def encode_isoformat(value: typing.Any) -> str:
+    return value.isoformat()
+
+
+def encode_enum(value: enum.Enum) -> typing.Any:
+    return value.value
+
+
+def encode_namedtuple(value: typing.Any) -> dict:
+    return value._asdict()
+
+
+def dataclass_encoder(cls: type) -> Encoder:
+    names = tuple(
+        f.name for f in dataclasses.fields(cls) if not f.name.startswith('_')
+    )
+
+    def encode(value: typing.Any) -> dict:
+        return {name: getattr(value, name) for name in names}
+    return encode
+
+
+def encode_dict(value: typing.Any) -> dict:
+    return {
+        k: v for k, v in value.__dict__.items() if not k.startswith('_')
+    }
+
+
+def has_dict(cls: type) -> bool:
+    return any('__dict__' in vars(klass) for klass in cls.__mro__)
+
+
+def _slots(cls: type) -> typing.Tuple[str, ...]:
+    slots = vars(cls).get('__slots__', ())
+    # a single slot may be given as a plain string
+    return (slots,) if isinstance(slots, str) else tuple(slots)
+
+
+def slots_encoder(cls: type) -> Encoder:
+    names = tuple(
+        name for klass in reversed(cls.__mro__) for name in _slots(klass)
+        if not name.startswith('_')
+    )
+    extra = has_dict(cls)
+
+    def encode(value: typing.Any) -> dict:
+        result = {
+            name: getattr(value, name) for name in names
+            if hasattr(value, name)
+        }
+        if extra: result.update(encode_dict(value))
+        return result
+    return encode
+
+
+class EncoderRegistry:
+    """
+    converts result objects into json representable values.
+    encoders registered for a type also apply to its subclasses,
+    the encoder resolved for a type is cached until the next register
+    """
+    def __init__(self):
+        self.encoders: typing.Dict[type, Encoder] = {}
+        self._cache: typing.Dict[type, typing.Optional[Encoder]] = {}
+
+    def register(
+        self, type_: type, encoder: Encoder = None
+    ) -> typing.Any:
+        if encoder is None:
+            return lambda encoder: self.register(type_, encoder) or encoder
+        self.encoders[type_] = encoder
+        self._cache.clear()
+
+    def _resolve(self, type_: type) -> typing.Optional[Encoder]:
+        for cls in type_.__mro__:
+            if cls in self.encoders: return self.encoders[cls]
+        if dataclasses.is_dataclass(type_): return dataclass_encoder(type_)
+        if issubclass(type_, tuple) and hasattr(type_, '_fields'):
+            return encode_namedtuple
+        if issubclass(type_, JSON_BASES): return None
+        if any('__slots__' in vars(cls) for cls in type_.__mro__[:-1]):
+            return slots_encoder(type_)
+        if has_dict(type_): return encode_dict
+        return None
+
+    def resolve(self, type_: type) -> typing.Optional[Encoder]:
+        try: return self._cache[type_]
+        except KeyError:
+            encoder = self._cache[type_] = self._resolve(type_)
+            return encoder
+
+    def encode(self, value: typing.Any) -> typing.Any:
+        """
+        converts a result object at the top, nested objects are left to
+        [default]. json never asks [default] about subclasses of the
+        types it writes itself, like namedtuples or int enums, so only
+        those are looked up while walking the containers. containers are
+        only copied when something inside them changed
+        """
+        type_ = type(value)
+        if type_ in SCALARS: return value
+        if not isinstance(value, CONTAINERS):
+            encoder = self.resolve(type_)
+            if encoder is None: return value
+            value = encoder(value)
+            if type(value) is type_: return value
+        return self._walk(value)
+
+    def _plain(self, value: typing.Any) -> bool:
+        # nothing but scalars inside, checked without a python loop
+        type_ = type(value)
+        if type_ is dict: return SCALARS.issuperset(map(type, value.values()))
+        if type_ is list or type_ is tuple:
+            return SCALARS.issuperset(map(type, value))
+        return type_ in SCALARS
+
+    def _walk(self, value: typing.Any) -> typing.Any:
+        type_ = type(value)
+        # anything json cannot write itself reaches [default] later on
+        if not isinstance(value, JSON_BASES): return value
+        if type_ is not dict and type_ is not list and type_ is not tuple:
+            encoder = self.resolve(type_)
+            if encoder is not None:
+                encoded = encoder(value)
+                return encoded if type(encoded) is type_ \
+                    else self._walk(encoded)
+
+        if isinstance(value, dict):
+            items = iter(value.items())
+            for key, item in items:
+                if self._plain(item): continue
+                encoded = self._walk(item)
+                if encoded is item: continue
+                copy = dict(value)
+                copy[key] = encoded
+                for key, item in items:
+                    if not self._plain(item): copy[key] = self._walk(item)
+                return copy
+
+        elif isinstance(value, (list, tuple)):
+            for i, item in enumerate(value):
+                if self._plain(item): continue
+                encoded = self._walk(item)
+                if encoded is item: continue
+                copy = list(value[:i])
+                copy.append(encoded)
+                copy.extend(
+                    item if self._plain(item) else self._walk(item)
+                    for item in value[i + 1:]
+                )
+                return copy
+        return value
+
+    def default(self, value: typing.Any) -> typing.Any:
+        """hook for json.dumps, called for values json cannot represent"""
+        encoder = self.resolve(type(value))
+        if encoder is None:
+            raise TypeError(
+                f'object of type {type(value).__name__} is not serializable'
+            )
+        return self._walk(encoder(value))
+
+
+registry = EncoderRegistry()
+registry.register(enum.Enum, encode_enum)
+registry.register(datetime.date, encode_isoformat)
+registry.register(datetime.time, encode_isoformat)
+for binary in (bytes, bytearray, memoryview):
+    registry.register(binary, encode_bytes)
@@ -2,43 +2,63 @@ from jsonrpc_stream import exceptions
 from jsonrpc_stream import protocol
 from jsonrpc_stream import contracts
 from jsonrpc_stream import dispatcher
+from jsonrpc_stream import encoders
+from jsonrpc_stream import keepalive
+from jsonrpc_stream import limits
 
 import logging
 import asyncio
+import inspect
 import typing
 import uuid
 
 logger = logging.getLogger(__name__)
 
+# reserved notification carrying one chunk of a streamed result
+PARTIAL_RESULT = '$/partialResult'
+_END_OF_STREAM = object()
+
 
 class JsonRpcEndpoint:
+    # thousands of these live in a busy server, keep them small
+    __slots__ = (
+        'loop', '_timeout', '_requests', '_streams', 'inflight', 'handled',
+        'stream', 'namespace_seperator', 'dispatchers', 'proxies',
+        'running', 'keepalive', 'limiter', '__weakref__'
+    )
+
     def __init__(
         self,
         stream: contracts.RpcEntityStream,
         namespace_seperator: str = '/',
         timeout: int = 0,
-        loop: asyncio.AbstractEventLoop = None
+        loop: asyncio.AbstractEventLoop = None,
+        ping_interval: float = 0,
+        max_missed_pings: int = 3,
+        limiter: limits.Limiter = None
     ):
         self.loop = loop or asyncio.get_event_loop()
         self._timeout = timeout
         self._requests: typing.Dict[typing.Any, asyncio.Future] = {}
+        self._streams: typing.Dict[typing.Any, asyncio.Queue] = {}
+        self.inflight = 0
+        self.handled = 0
         self.stream = stream
         self.namespace_seperator = namespace_seperator
         self.dispatchers: typing.Dict[str, dispatcher.DispatchNamespace] = {}
         self.proxies: typing.Dict[str, dispatcher.ProxyNamespace] = {}
-        self._handlers: typing.Dict[type, typing.Callable] = {
-            protocol.RpcRequest:      self._handle_request,
-            protocol.RpcNotification: self._handle_notification,
-            protocol.RpcResult:       self._handle_result,
-            protocol.RpcError:        self._handle_error,
-            protocol.RpcMalformed:    self._handle_malformed
-        }
-
-        self._paramsdispatchers: typing.Dict[type, typing.Callable] = {
-            dict: self._dispatch_dict,
-            list: self._dispatch_list,
-            type(None): self._dispatch_none
-        }
+        self.running: typing.Optional[asyncio.Future] = None
+        self.keepalive: typing.Optional[keepalive.Keepalive] = (
+            keepalive.Keepalive(self, ping_interval, max_missed_pings)
+            if ping_interval else None
+        )
+        # caps outgoing calls, streamed calls and pings are not limited
+        self.limiter = limiter
+
+    @property
+    def rtt(self) -> typing.Optional[keepalive.RoundTripTimes]:
+        """round trip times measured by pings, None without keepalive"""
+        return self.keepalive.rtt if self.keepalive else None
 
     async def _dispatch_dict(self, method, name, params):
         return await method(name, **params)
@@ -49,6 +69,23 @@ class JsonRpcEndpoint:
     async def _dispatch_none(self, method, name, params):
         return await method(name)
 
+    # chunks of a streamed result buffered per call before it fails,
+    # shared by every endpoint like the tables below
+    max_buffered_chunks = 1024
+
+    # shared by every endpoint, the functions get the endpoint passed in
+    _paramsdispatchers: typing.Dict[type, typing.Callable] = {
+        dict: _dispatch_dict,
+        list: _dispatch_list,
+        tuple: _dispatch_list,
+        type(None): _dispatch_none
+    }
+
+    def _encode(self, value: typing.Any) -> typing.Any:
+        # results are converted with the registry of the streams serializer
+        formatter = getattr(self.stream, 'formatter', None)
+        return getattr(formatter, 'registry', encoders.registry).encode(value)
+
     def _parse_methodname(self, methodname: str) -> typing.Tuple[str, str]:
         parts = methodname.split(self.namespace_seperator)
         try: return (parts[0], parts[1])
@@ -61,7 +98,7 @@ class JsonRpcEndpoint:
         params: typing.Any
     ) -> typing.Any:
         try: return await self._paramsdispatchers[type(params)](
-            dispatcher, meth, params
+            self, dispatcher, meth, params
         )
         except KeyError: return await dispatcher(params)
 
@@ -70,13 +107,17 @@ class JsonRpcEndpoint:
     ) -> protocol.RpcEntity:
         try:
             logger.debug(f'handling request: {request}')
+            if request.method == keepalive.PING:
+                return protocol.RpcResult(request.id, request.params)
             namespace, method = self._parse_methodname(request.method)
             res = await self._dispatch_params(
                 self.dispatchers[namespace].call, method, request.params
             )
+            if inspect.isasyncgen(res):
+                res = await self._stream_result(request.id, res)
 
             # make arbitrary classes serializable
-            if hasattr(res, '__dict__'): res = res.__dict__
+            res = self._encode(res)
             logger.debug(f'method returned result: {res}')
             return protocol.RpcResult(request.id, res)
         except exceptions.JsonRpcException as e:
@@ -96,9 +137,36 @@ class JsonRpcEndpoint:
                 exceptions.JsonRpcInternalError.from_ex(e).to_error()
             )
 
+    async def _stream_result(
+        self, id: typing.Any, chunks: typing.AsyncGenerator
+    ) -> None:
+        logger.debug(f'streaming result of request {id}')
+        async for chunk in chunks:
+            await self.stream.dispatch_entity(protocol.RpcNotification(
+                PARTIAL_RESULT, {'id': id, 'value': self._encode(chunk)}
+            ))
+        return None
+
+    def _handle_partial_result(self, params: typing.Any):
+        try: chunks, value = self._streams[params['id']], params['value']
+        except (KeyError, TypeError):
+            return logger.debug(f'dropping partial result: {params}')
+        if chunks.qsize() < self.max_buffered_chunks:
+            return chunks.put_nowait(value)
+
+        # a consumer this far behind fails instead of growing the buffer
+        logger.warning(f'stream {params["id"]} overflowed its buffer')
+        del self._streams[params['id']]
+        while not chunks.empty(): chunks.get_nowait()
+        chunks.put_nowait(BufferError(
+            f'more than {self.max_buffered_chunks} unconsumed chunks'
+        ))
+
     async def _handle_notification(self, notify: protocol.RpcNotification):
         try:
             logger.debug(f'handling notification: {notify}')
+            if notify.method == PARTIAL_RESULT:
+                return self._handle_partial_result(notify.params)
             namespace, method = self._parse_methodname(notify.method)
             await self._dispatch_params(
                 self.dispatchers[namespace].notify, method, notify.params
@@ -145,36 +213,64 @@ class JsonRpcEndpoint:
 
         return protocol.RpcError(malformed.id, exception.to_error())
 
+    _handlers: typing.Dict[type, typing.Callable] = {
+        protocol.RpcRequest:      _handle_request,
+        protocol.PreparedRequest: _handle_request,
+        protocol.RpcNotification: _handle_notification,
+        protocol.RpcResult:       _handle_result,
+        protocol.RpcError:        _handle_error,
+        protocol.RpcMalformed:    _handle_malformed
+    }
+
     async def _handle_single_entity(
         self, entity: protocol.RpcEntity
     ) -> typing.Optional[protocol.RpcEntity]:
-        return await self._handlers[type(entity)](entity)
+        return await self._handlers[type(entity)](self, entity)
 
     async def _handle_entity(self, entity: protocol.RpcEntity):
         response: typing.Optional[protocol.RpcEntity]
-        if isinstance(entity, protocol.RpcBatch):
-            collected: typing.List[protocol.RpcEntity] = []
-            for e in entity.entities:
-                res = await self._handle_single_entity(e)
-                if res: collected.append(res)
-            response = protocol.RpcBatch(collected)
-        else: response = await self._handle_single_entity(entity)
-
-        if response: await self.stream.dispatch_entity(response)
+        self.inflight += 1
+        try:
+            if isinstance(entity, protocol.RpcBatch):
+                collected: typing.List[protocol.RpcEntity] = []
+                for e in entity.entities:
+                    res = await self._handle_single_entity(e)
+                    if res: collected.append(res)
+                response = protocol.RpcBatch(collected)
+            else: response = await self._handle_single_entity(entity)
+
+            if response: await self.stream.dispatch_entity(response)
+        finally:
+            self.inflight -= 1
+            self.handled += 1
 
     async def _start(self):
         while not self.running.done():
-            entity = await self.stream.fetch_entity()
-            if entity: await self._handle_entity(entity)
-            else: self.running.set_result(None)
+            try:
+                entity = await self.stream.fetch_entity()
+                if entity: await self._handle_entity(entity)
+                else: self.running.set_result(None)
+                # idle connections should not keep their last entity alive
+                entity = None
+            except Exception as e:
+                # the stream is considered closed once it raises
+                logger.warning(f'stream failed, stopping endpoint: {e}')
+                self.running.set_result(None)
+
+        if self.keepalive: self.keepalive.stop()
+        # nobody is going to answer pending calls anymore
+        for fut in self._requests.values():
+            if not fut.done():
+                fut.set_exception(ConnectionResetError('stream closed'))
 
     async def join(self): await self.running
 
     def close(self): self.stream.close()
 
     def start(self) -> 'JsonRpcEndpoint':
-        self.running: asyncio.Future = asyncio.Future(loop=self.loop)
+        self.running = self.loop.create_future()
         self.loop.create_task(self._start())
+        if self.keepalive: self.keepalive.start()
         return self
 
     def attach_dispatcher(
@@ -198,34 +294,38 @@ class JsonRpcEndpoint:
     ) -> 'JsonRpcEndpoint':
         namespace = namespace or target.__class__.__name__
         self.proxies[namespace] = dispatcher.ProxyNamespace(
-            namespace, target, mode, self.call, self.notify
+            namespace, target, mode, self.call, self.notify, self.call_stream,
+            self.prepare
         )
 
         return self
 
-    async def kill_timeout(self, future: asyncio.Future):
-        asyncio.sleep(self._timeout)
-        future.cancel()
-
-    async def notify(
-        self,
-        namespace: typing.Optional[str],
-        name: str,
-        *args: typing.Any,
-        **kwargs: typing.Any
-    ):
+    def _params(
+        self, args: typing.Tuple, kwargs: typing.Dict[str, typing.Any]
+    ) -> typing.Any:
+        """checks the endpoint can send and returns the params of a call"""
         if not self.running:
             raise RuntimeError('endpoint not running, please call [start]')
+        if self.running.done(): raise ConnectionResetError('endpoint closed')
 
         if args and kwargs:
             raise ValueError(
                 'request must either have positional or named arguments ' +
                 'but not both'
             )
+        return args or kwargs
 
+    async def notify(
+        self,
+        namespace: typing.Optional[str],
+        name: str,
+        *args: typing.Any,
+        **kwargs: typing.Any
+    ):
+        params = self._params(args, kwargs)
         if namespace: name = namespace + self.namespace_seperator + name
         await self.stream.dispatch_entity(
-            protocol.RpcNotification(name, args or kwargs)
+            protocol.RpcNotification(name, params)
         )
 
     async def call(
@@ -235,24 +335,90 @@ class JsonRpcEndpoint:
         *args: typing.Any,
         **kwargs: typing.Any
     ):
-        if not self.running:
-            raise RuntimeError('endpoint not running, please call [start]')
+        params = self._params(args, kwargs)
+        id = str(uuid.uuid4())
+        if namespace: name = namespace + self.namespace_seperator + name
+        return await self._request(id, name, params)
+
+    def prepare(
+        self, namespace: typing.Optional[str], name: str
+    ) -> typing.Callable[..., typing.Awaitable]:
+        """
+        returns a coroutine function calling [name], with as much of
+        the request encoded up front as the streams serializer supports
+        """
+        if namespace: name = namespace + self.namespace_seperator + name
+        prepare = getattr(
+            getattr(self.stream, 'formatter', None), 'prepare', None
+        )
+        template = prepare(name) if prepare else None
 
-        if args and kwargs:
-            raise ValueError(
-                'request must either have positional or named arguments ' +
-                'but not both'
+        async def call(*args: typing.Any, **kwargs: typing.Any) -> typing.Any:
+            return await self._request(
+                str(uuid.uuid4()), name, self._params(args, kwargs), template
             )
+        return call
 
-        id = str(uuid.uuid4())
-        if namespace: name = namespace + self.namespace_seperator + name
-        await self.stream.dispatch_entity(
-            protocol.RpcRequest(id, name, args or kwargs)
+    async def _request(
+        self,
+        id: typing.Any,
+        name: str,
+        params: typing.Any,
+        template: typing.Any = None
+    ):
+        if self.limiter: return await self.limiter.run(
+            lambda: self._send_request(id, name, params, template)
         )
+        return await self._send_request(id, name, params, template)
 
+    async def _send_request(
+        self,
+        id: typing.Any,
+        name: str,
+        params: typing.Any,
+        template: typing.Any = None
+    ):
+        # register before dispatching, the result may arrive
+        # before the dispatching stream returns control to us
         res = self._requests[id] = asyncio.Future()
-        if self._timeout: self.loop.create_task(self.kill_timeout(res))
-        res = await res
-        del self._requests[id]
+        try:
+            await self.stream.dispatch_entity(
+                protocol.PreparedRequest(id, name, params, template=template)
+                if template else protocol.RpcRequest(id, name, params)
+            )
 
-        return res
+            # a timeout surfaces as asyncio.TimeoutError, so limiters
+            # count it as a drop rather than a cancelled call
+            return await asyncio.wait_for(res, self._timeout or None)
+        finally: del self._requests[id]
+
+    async def call_stream(
+        self,
+        namespace: typing.Optional[str],
+        name: str,
+        *args: typing.Any,
+        **kwargs: typing.Any
+    ) -> typing.AsyncIterator:
+        """
+        calls a method implemented as async generator on the remote party
+        and yields its chunks as they arrive. a consumer falling more than
+        [max_buffered_chunks] behind fails with a [BufferError]
+        """
+        params = self._params(args, kwargs)
+        id = str(uuid.uuid4())
+        if namespace: name = namespace + self.namespace_seperator + name
+        chunks = self._streams[id] = asyncio.Queue()
+        done = self.loop.create_task(
+            self._send_request(id, name, params)
+        )
+        done.add_done_callback(lambda _: chunks.put_nowait(_END_OF_STREAM))
+        try:
+            while True:
+                chunk = await chunks.get()
+                if chunk is _END_OF_STREAM: break
+                if isinstance(chunk, BufferError): raise chunk
+                yield chunk
+            done.result()
+        finally:
+            self._streams.pop(id, None)
+            done.cancel()
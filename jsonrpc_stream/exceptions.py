@@ -1,8 +1,54 @@
 import typing
 import traceback
+import logging
+import enum
+import os
 
 from jsonrpc_stream import protocol
 
+logger = logging.getLogger(__name__)
+
+
+class TracebackMode(enum.Enum):
+    off       = enum.auto()
+    truncated = enum.auto()
+    full      = enum.auto()
+
+
+# how much of a traceback [JsonRpcException.from_ex] sends to the peer,
+# configurable per environment through JSONRPC_STREAM_TRACEBACK
+traceback_mode = TracebackMode.full
+traceback_limit = 5
+try: traceback_mode = TracebackMode[os.environ.get(
+    'JSONRPC_STREAM_TRACEBACK', traceback_mode.name
+)]
+except KeyError: logger.warning(
+    'ignoring unknown JSONRPC_STREAM_TRACEBACK, expected one of ' +
+    ', '.join(TracebackMode.__members__)
+)
+try: traceback_limit = int(
+    os.environ.get('JSONRPC_STREAM_TRACEBACK_LIMIT', traceback_limit)
+)
+except ValueError: logger.warning(
+    'ignoring non numeric JSONRPC_STREAM_TRACEBACK_LIMIT'
+)
+
+
+def set_traceback_mode(mode: TracebackMode, limit: int = None):
+    global traceback_mode, traceback_limit
+    traceback_mode = mode
+    if limit is not None: traceback_limit = limit
+
+
+def format_traceback(ex: BaseException) -> typing.Optional[str]:
+    if traceback_mode == TracebackMode.off: return None
+    # keep the innermost frames, they are closest to the failure
+    limit = -traceback_limit if traceback_mode == TracebackMode.truncated \
+        else None
+    return ''.join(traceback.format_exception(
+        type(ex), ex, ex.__traceback__, limit=limit
+    ))
+
 
 class JsonRpcException(Exception):
     CODE: int = -32001
@@ -13,9 +59,23 @@ class JsonRpcException(Exception):
         message: str        = None,
         data:    typing.Any = None
     ):
-        self.message = str(message) or getattr(self.__class__, 'MESSAGE') or ''
+        self.message = str(message) if message is not None \
+            else getattr(self.__class__, 'MESSAGE', '')
         self.code = code or getattr(self.__class__, 'CODE', -32001)
-        self.data = data
+        self._data = data
+        self.cause: typing.Optional[BaseException] = None
+
+    @property
+    def data(self) -> typing.Any:
+        # the traceback of [cause] is only formatted once somebody asks
+        if self._data is None and self.cause is not None:
+            self._data = format_traceback(self.cause)
+            self.cause = None
+        return self._data
+
+    @data.setter
+    def data(self, value: typing.Any):
+        self._data = value
 
     @staticmethod
     def from_error(error: protocol.RpcErrorDetails):
@@ -36,10 +96,9 @@ class JsonRpcException(Exception):
 
     @classmethod
     def from_ex(cls, ex: Exception, msg: str = None) -> 'JsonRpcException':
-        return cls(
-            message=msg or str(ex),
-            data=traceback.format_exc()
-        )
+        e = cls(message=msg or str(ex))
+        if traceback_mode != TracebackMode.off: e.cause = ex
+        return e
 
     def to_error(self) -> protocol.RpcErrorDetails:
         return protocol.RpcErrorDetails(
@@ -0,0 +1,258 @@
+from jsonrpc_stream import exceptions
+from jsonrpc_stream import protocol
+from jsonrpc_stream import streams
+
+import itertools
+import logging
+import asyncio
+import typing
+import json
+import re
+
+logger = logging.getLogger(__name__)
+
+Body = typing.Union[bytes, bytearray]
+Span = typing.Tuple[int, int]
+
+_NON_WHITESPACE = re.compile(rb'[^ \t\r\n]')
+_STRUCTURAL = re.compile(rb'["{}\[\]]')
+_SCALAR_END = re.compile(rb'[,}\] \t\r\n]')
+QUOTE, BACKSLASH, COMMA, COLON = b'"\\,:'
+OPEN, CLOSE = b'{[', b'}]'
+
+
+def _skip(body: Body, i: int) -> int:
+    match = _NON_WHITESPACE.search(body, i)
+    if not match: raise ValueError('unexpected end of body')
+    return match.start()
+
+
+def _string_end(body: Body, i: int) -> int:
+    while True:
+        i = body.index(b'"', i + 1)
+        escapes = 0
+        while body[i - 1 - escapes] == BACKSLASH: escapes += 1
+        if not escapes % 2: return i + 1
+
+
+def _value_end(body: Body, i: int) -> int:
+    if body[i] == QUOTE: return _string_end(body, i)
+    if body[i] not in OPEN:
+        match = _SCALAR_END.search(body, i)
+        return match.start() if match else len(body)
+
+    depth = 0
+    while True:
+        match = _STRUCTURAL.search(body, i)
+        if not match: raise ValueError('unexpected end of body')
+        i = match.start()
+        c = body[i]
+        if c == QUOTE:
+            i = _string_end(body, i)
+            continue
+        depth += 1 if c in OPEN else -1
+        i += 1
+        if not depth: return i
+
+
+def peek(
+    body: Body
+) -> typing.Tuple[typing.Optional[str], typing.Optional[Span]]:
+    """
+    finds the method and the byte span of the id of a single json-rpc
+    object, skipping over every other value without decoding it
+    """
+    method, span = None, None
+    try:
+        i = _skip(body, 0)
+        if body[i] != OPEN[0]: raise ValueError('not a json object')
+        i = _skip(body, i + 1)
+        while body[i] != CLOSE[0]:
+            end = _string_end(body, i)
+            key = bytes(body[i + 1:end - 1])
+            i = _skip(body, end)
+            if body[i] != COLON: raise ValueError('expected a colon')
+            i = _skip(body, i + 1)
+            end = _value_end(body, i)
+            if key == b'method': method = json.loads(bytes(body[i:end]))
+            elif key == b'id' and body[i:end] != b'null': span = (i, end)
+            i = _skip(body, end)
+            if body[i] == COMMA: i = _skip(body, i + 1)
+            elif body[i] != CLOSE[0]: raise ValueError('expected a comma')
+    except IndexError: raise ValueError('unexpected end of body')
+    return method, span
+
+
+def _id(body: Body, span: typing.Optional[Span]) -> typing.Any:
+    return json.loads(bytes(body[span[0]:span[1]])) if span else None
+
+
+def splice(body: Body, span: Span, value: bytes) -> Body:
+    return body[:span[0]] + value + body[span[1]:]
+
+
+class Route:
+    """an upstream stream and the calls currently forwarded to it"""
+    def __init__(
+        self, stream: streams.ContentLengthEntityStream, max_inflight: int
+    ):
+        self.stream = stream
+        self.limit = asyncio.Semaphore(max_inflight) if max_inflight else None
+        # set once the upstream stream is exhausted
+        self.closed = False
+        # gateway id -> (client stream, original id)
+        self.pending: typing.Dict[
+            bytes, typing.Tuple[streams.ContentLengthEntityStream, bytes]
+        ] = {}
+
+
+class JsonRpcGateway:
+    """
+    forwards frames between client streams and upstream streams, routed
+    by the namespace of their method. only method and id are looked at,
+    ids are remapped so calls of different clients cannot collide and
+    bodies are forwarded as they are. at most [max_inflight] calls
+    per route are forwarded at once, further calls of a client wait.
+    batches and attachments are answered with an invalid request error
+    """
+    def __init__(
+        self,
+        namespace_seperator: str = '/',
+        loop: asyncio.AbstractEventLoop = None
+    ):
+        self.loop = loop or asyncio.get_event_loop()
+        self.namespace_seperator = namespace_seperator
+        self.routes: typing.Dict[str, Route] = {}
+        self._ids = itertools.count(1)
+        self._tasks: typing.List[asyncio.Task] = []
+
+    def add_route(
+        self,
+        namespace: str,
+        stream: streams.ContentLengthEntityStream,
+        max_inflight: int = 0
+    ) -> 'JsonRpcGateway':
+        route = self.routes[namespace] = Route(stream, max_inflight)
+        self._tasks.append(self.loop.create_task(self._upstream(route)))
+        return self
+
+    def route(self, method: str) -> typing.Optional[Route]:
+        namespace, sep, _ = method.partition(self.namespace_seperator)
+        return self.routes.get(namespace if sep else '')
+
+    async def _reply_error(
+        self,
+        stream: streams.ContentLengthEntityStream,
+        id: typing.Any,
+        error: exceptions.JsonRpcException
+    ):
+        await stream.dispatch_entity(protocol.RpcError(id, error.to_error()))
+
+    async def _forward(
+        self, client: streams.ContentLengthEntityStream, body: Body
+    ):
+        try: method, span = peek(body)
+        except ValueError as e:
+            logger.debug(f'cannot route frame: {e}')
+            return await self._reply_error(
+                client, None, exceptions.JsonRpcInvalidRequest(
+                    message='gateway only routes single json-rpc objects'
+                )
+            )
+
+        if method is None:
+            return logger.debug('dropping response from client')
+        if not isinstance(method, str):
+            return await self._reply_error(
+                client, _id(body, span), exceptions.JsonRpcInvalidRequest(
+                    message='method has to be a string'
+                )
+            )
+        route = self.route(method)
+        if route is None:
+            if span is None: return
+            return await self._reply_error(client, _id(body, span), (
+                exceptions.JsonRpcMethodNotFound.from_method(method)
+            ))
+        if span is None:
+            if route.closed: return
+            try: return await route.stream.dispatch_body(body)
+            except Exception as e:
+                return logger.debug(f'dropping notification: {e}')
+
+        if route.limit: await route.limit.acquire()
+        if route.closed:
+            if route.limit: route.limit.release()
+            return await self._reply_upstream_closed(client, _id(body, span))
+        gateway_id = str(next(self._ids)).encode()
+        route.pending[gateway_id] = (client, bytes(body[span[0]:span[1]]))
+        try: await route.stream.dispatch_body(splice(body, span, gateway_id))
+        except Exception as e:
+            logger.warning(f'cannot forward to upstream: {e}')
+            # the upstream task may have answered it already
+            if self._settle(route, gateway_id):
+                await self._reply_upstream_closed(client, _id(body, span))
+
+    async def _reply_upstream_closed(
+        self, client: streams.ContentLengthEntityStream, id: typing.Any
+    ):
+        try: await self._reply_error(
+            client, id, exceptions.JsonRpcInternalError(
+                message='upstream closed'
+            )
+        )
+        except ConnectionError: pass
+
+    def _settle(self, route: Route, id: bytes) -> typing.Optional[
+        typing.Tuple[streams.ContentLengthEntityStream, bytes]
+    ]:
+        pending = route.pending.pop(id, None)
+        if pending and route.limit: route.limit.release()
+        return pending
+
+    async def serve(self, client: streams.ContentLengthEntityStream):
+        """forwards the requests of [client] until its stream is exhausted"""
+        while True:
+            body = await client.fetch_body()
+            if body is None: break
+            if isinstance(body, protocol.RpcMalformed):
+                await client.dispatch_entity(protocol.RpcError(
+                    body.id, body.exception.to_error()
+                ))
+            else: await self._forward(client, body)
+
+        # responses still in flight have nobody to go to
+        for route in self.routes.values():
+            for id, (stream, _) in list(route.pending.items()):
+                if stream is client: self._settle(route, id)
+
+    async def _upstream(self, route: Route):
+        while True:
+            try: body = await route.stream.fetch_body()
+            except Exception as e:
+                logger.warning(f'upstream failed: {e}')
+                break
+            if body is None: break
+            if isinstance(body, protocol.RpcMalformed): continue
+            try: method, span = peek(body)
+            except ValueError: continue
+            if method is not None or span is None:
+                logger.debug('dropping unsolicited upstream frame')
+                continue
+
+            pending = self._settle(route, bytes(body[span[0]:span[1]]))
+            if pending is None: continue
+            client, original = pending
+            try: await client.dispatch_body(splice(body, span, original))
+            except ConnectionError:
+                logger.debug('client left before its response arrived')
+
+        logger.warning('upstream closed, failing its pending calls')
+        route.closed = True
+        for id in list(route.pending):
+            client, original = self._settle(route, id)  # type: ignore
+            await self._reply_upstream_closed(client, json.loads(original))
+
+    def close(self):
+        for route in self.routes.values(): route.stream.close()
+        for task in self._tasks: task.cancel()
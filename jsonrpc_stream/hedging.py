@@ -0,0 +1,120 @@
+from jsonrpc_stream import metrics
+
+import asyncio
+import typing
+
+Attempt = typing.Callable[[], typing.Awaitable]
+
+
+class HedgePolicy:
+    """
+    hedges calls to the read only [methods]: once a call took longer than
+    its delay a duplicate goes to another replica, the first response
+    wins and the other call is cancelled. the delay is fixed by [delays]
+    or the observed [percentile] latency of the method, which needs
+    [min_samples] calls first. a primary call cut short by its hedge
+    counts with the time it ran for. every call earns [budget] hedges,
+    saved up to [burst], so hedging adds at most that fraction of extra
+    load
+    """
+    def __init__(
+        self,
+        methods: typing.Iterable[str],
+        delays: typing.Dict[str, float] = None,
+        percentile: float = 95,
+        min_samples: int = 20,
+        budget: float = 0.05,
+        burst: float = 10.0
+    ):
+        self.delays = dict(delays or {})
+        self.methods = frozenset(methods) | frozenset(self.delays)
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.budget = budget
+        self.burst = burst
+        self.tokens = burst
+        self.histograms: typing.Dict[str, metrics.Histogram] = {}
+        self.calls = 0
+        self.hedged = 0
+        self.won = 0
+
+    def __contains__(self, method: str) -> bool:
+        return method in self.methods
+
+    def delay(self, method: str) -> typing.Optional[float]:
+        """seconds to wait before hedging [method], None to not hedge"""
+        try: return self.delays[method]
+        except KeyError: pass
+        histogram = self.histograms.get(method)
+        if not histogram or histogram.count < self.min_samples: return None
+        return histogram.percentile(self.percentile)
+
+    def record(self, method: str, latency: float):
+        self.histograms.setdefault(method, metrics.Histogram()).record(
+            latency
+        )
+
+    def _spend(self) -> bool:
+        if self.tokens < 1: return False
+        self.tokens -= 1
+        return True
+
+    async def run(
+        self,
+        method: str,
+        primary: Attempt,
+        hedge: Attempt,
+        loop: asyncio.AbstractEventLoop = None
+    ) -> typing.Any:
+        """
+        awaits [primary], starting [hedge] alongside it once the delay
+        of [method] passed. a replica failing with a connection error
+        leaves the answer to the other one if it is still running
+        """
+        loop = loop or asyncio.get_event_loop()
+        self.calls += 1
+        self.tokens = min(self.burst, self.tokens + self.budget)
+        started = loop.time()
+
+        # only the primary feeds the latency, hedged winners would pull
+        # the percentile and with it their own delay down
+        def settled(task: asyncio.Task):
+            if task.cancelled() or task.exception() is None:
+                self.record(method, loop.time() - started)
+
+        tasks = [loop.create_task(primary())]
+        tasks[0].add_done_callback(settled)
+        try:
+            delay = self.delay(method)
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done and self._spend():
+                    self.hedged += 1
+                    tasks.append(loop.create_task(hedge()))
+
+            pending = set(tasks)
+            while True:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                winner = min(done, key=lambda t: t.exception() is not None)
+                if not pending or not isinstance(
+                    winner.exception(), ConnectionError
+                ): break
+
+            if winner is not tasks[0] and winner.exception() is None:
+                self.won += 1
+            return winner.result()
+        finally:
+            for task in tasks:
+                if not task.done(): task.cancel()
+                # losers failing too should not be reported as unhandled
+                elif not task.cancelled(): task.exception()
+
+    def summary(self) -> dict:
+        return {
+            'calls': self.calls,
+            'hedged': self.hedged,
+            'won': self.won,
+            'delays': {method: self.delay(method) for method in self.methods}
+        }
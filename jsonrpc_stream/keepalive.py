@@ -0,0 +1,113 @@
+from jsonrpc_stream import exceptions
+
+import collections
+import logging
+import asyncio
+import typing
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# reserved request every endpoint answers itself with its params
+PING = '$/ping'
+
+
+class RoundTripTimes:
+    """
+    exponentially weighted moving average of the round trip time in
+    seconds, plus a window of the [window] most recent samples
+    """
+    __slots__ = ('alpha', 'ewma', 'recent')
+
+    def __init__(self, alpha: float = 0.2, window: int = 16):
+        self.alpha = alpha
+        self.ewma: typing.Optional[float] = None
+        self.recent: typing.Deque[float] = collections.deque(maxlen=window)
+
+    def record(self, rtt: float):
+        self.recent.append(rtt)
+        if self.ewma is None: self.ewma = rtt
+        else: self.ewma += self.alpha * (rtt - self.ewma)
+
+    @property
+    def last(self) -> typing.Optional[float]:
+        return self.recent[-1] if self.recent else None
+
+    def summary(self) -> dict:
+        recent = self.recent
+        return {
+            'samples': len(recent),
+            'ewma': self.ewma,
+            'last': self.last,
+            'min': min(recent) if recent else None,
+            'max': max(recent) if recent else None,
+            'mean': sum(recent) / len(recent) if recent else None
+        }
+
+
+class Keepalive:
+    """
+    pings the peer of [endpoint] every [interval] seconds and records the
+    round trip times. a ping not answered within [timeout] (the interval
+    by default) is missed, after [max_missed] in a row the stream is
+    closed. any answer counts, so peers without ping support that reply
+    with an error still keep the connection alive
+    """
+    __slots__ = ('endpoint', 'interval', 'max_missed', 'timeout', 'rtt',
+                 'missed', 'task')
+
+    def __init__(
+        self,
+        endpoint: typing.Any,
+        interval: float,
+        max_missed: int = 3,
+        timeout: float = None,
+        alpha: float = 0.2,
+        window: int = 16
+    ):
+        self.endpoint = endpoint
+        self.interval = interval
+        self.max_missed = max_missed
+        self.timeout = timeout or interval
+        self.rtt = RoundTripTimes(alpha, window)
+        self.missed = 0
+        self.task: typing.Optional[asyncio.Task] = None
+
+    async def ping(self) -> float:
+        """sends one ping and returns its round trip time"""
+        loop = self.endpoint.loop
+        sent = loop.time()
+        try: await self.endpoint._send_request(
+            str(uuid.uuid4()), PING, None
+        )
+        except exceptions.JsonRpcException: pass
+        rtt = loop.time() - sent
+        self.rtt.record(rtt)
+        return rtt
+
+    async def _run(self):
+        running = self.endpoint.running
+        while not running.done():
+            await asyncio.sleep(self.interval)
+            if running.done(): break
+            try: await asyncio.wait_for(self.ping(), self.timeout)
+            except asyncio.TimeoutError: self.missed += 1
+            except ConnectionError: break
+            else:
+                self.missed = 0
+                continue
+
+            logger.info(f'missed {self.missed} pings in a row')
+            if self.missed >= self.max_missed:
+                logger.warning(
+                    f'peer missed {self.missed} pings, closing stream'
+                )
+                self.endpoint.close()
+                break
+
+    def start(self) -> 'Keepalive':
+        self.task = self.endpoint.loop.create_task(self._run())
+        return self
+
+    def stop(self):
+        if self.task: self.task.cancel()
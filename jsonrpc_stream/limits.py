@@ -0,0 +1,193 @@
+from jsonrpc_stream import exceptions
+
+import collections
+import asyncio
+import abc
+import typing
+import math
+
+# failures that mean the peer is overloaded or gone, not that the call
+# itself was wrong, they shrink the limit like a dropped packet in tcp
+DROPS = (
+    ConnectionError,
+    asyncio.TimeoutError,
+    exceptions.JsonRpcServerError,
+    exceptions.JsonRpcInternalError
+)
+
+
+class LimitExceeded(Exception):
+    """raised instead of queueing a call once the queue is full"""
+
+
+class Limiter(abc.ABC):
+    """
+    caps the calls in flight to an adaptive [limit] between [min_limit]
+    and [max_limit]. calls past the limit wait in a fifo queue of
+    [max_queue] calls, None queues without bound and 0 fails fast.
+    a queued call raises [LimitExceeded] after [queue_timeout] seconds.
+    subclasses adjust the limit in [update] from every sample
+    """
+    def __init__(
+        self,
+        initial: int = 20,
+        min_limit: int = 1,
+        max_limit: int = 1000,
+        max_queue: typing.Optional[int] = None,
+        queue_timeout: float = None,
+        loop: asyncio.AbstractEventLoop = None
+    ):
+        self.loop = loop or asyncio.get_event_loop()
+        self.estimate = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.inflight = 0
+        self.rejected = 0
+        self.waiters: typing.Deque[asyncio.Future] = collections.deque()
+
+    @property
+    def limit(self) -> int:
+        return int(self.estimate)
+
+    def _clamp(self, estimate: float) -> float:
+        return min(max(estimate, self.min_limit), self.max_limit)
+
+    @abc.abstractmethod
+    def update(self, rtt: float, inflight: int, dropped: bool):
+        """adjusts [estimate] after a call that saw [inflight] calls"""
+        raise NotImplementedError
+
+    def _wake(self):
+        while self.waiters and self.inflight < self.limit:
+            waiter = self.waiters.popleft()
+            if waiter.done(): continue
+            self.inflight += 1
+            waiter.set_result(None)
+
+    async def acquire(self):
+        if self.inflight < self.limit and not self.waiters:
+            self.inflight += 1
+            return
+
+        if self.max_queue is not None and \
+                len(self.waiters) >= self.max_queue:
+            self.rejected += 1
+            raise LimitExceeded(
+                f'{self.inflight} calls in flight, limit {self.limit}'
+            )
+
+        waiter = self.loop.create_future()
+        self.waiters.append(waiter)
+        try: await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise LimitExceeded(
+                f'queued longer than {self.queue_timeout}s'
+            ) from None
+        except asyncio.CancelledError:
+            # the slot may have been handed over just before cancelling
+            if waiter.done() and not waiter.cancelled(): self.release()
+            raise
+
+    def release(self):
+        self.inflight -= 1
+        self._wake()
+
+    def _sample(self, started: float, inflight: int, dropped: bool):
+        self.update(self.loop.time() - started, inflight, dropped)
+        self.release()
+
+    async def run(
+        self, fn: typing.Callable[[], typing.Awaitable]
+    ) -> typing.Any:
+        """awaits [fn] within the limit and feeds its latency back"""
+        await self.acquire()
+        inflight = self.inflight
+        started = self.loop.time()
+        try: res = await fn()
+        except DROPS:
+            self._sample(started, inflight, True)
+            raise
+        except exceptions.JsonRpcException:
+            # the peer answered in time, only the call was wrong
+            self._sample(started, inflight, False)
+            raise
+        except BaseException:
+            # cancelled or never sent, nothing was learned about the peer
+            self.release()
+            raise
+        self._sample(started, inflight, False)
+        return res
+
+
+class AIMDLimiter(Limiter):
+    """
+    additive increase, multiplicative decrease. the limit grows by one
+    per round trip while it is being used and is multiplied by
+    [backoff] on a drop or a call slower than [max_latency]
+    """
+    def __init__(
+        self,
+        initial: int = 20,
+        min_limit: int = 1,
+        max_limit: int = 1000,
+        backoff: float = 0.9,
+        max_latency: float = None,
+        **kwargs: typing.Any
+    ):
+        super().__init__(initial, min_limit, max_limit, **kwargs)
+        self.backoff = backoff
+        self.max_latency = max_latency
+
+    def update(self, rtt: float, inflight: int, dropped: bool):
+        if dropped or (self.max_latency and rtt > self.max_latency):
+            self.estimate = self._clamp(self.estimate * self.backoff)
+        # an app limited client says nothing about the peers capacity
+        elif inflight * 2 >= self.estimate:
+            self.estimate = self._clamp(self.estimate + 1 / self.estimate)
+
+
+class GradientLimiter(Limiter):
+    """
+    follows the ratio of a long term to the short term latency average,
+    so the limit shrinks as soon as queueing at the peer adds latency.
+    a headroom of the square root of the limit keeps probing for more
+    capacity, [smoothing] damps how fast the limit moves
+    """
+    def __init__(
+        self,
+        initial: int = 20,
+        min_limit: int = 1,
+        max_limit: int = 1000,
+        smoothing: float = 0.2,
+        short_window: int = 10,
+        long_window: int = 600,
+        tolerance: float = 1.5,
+        **kwargs: typing.Any
+    ):
+        super().__init__(initial, min_limit, max_limit, **kwargs)
+        self.smoothing = smoothing
+        self.short_alpha = 2 / (short_window + 1)
+        self.long_alpha = 2 / (long_window + 1)
+        self.tolerance = tolerance
+        self.short: typing.Optional[float] = None
+        self.long: typing.Optional[float] = None
+
+    def update(self, rtt: float, inflight: int, dropped: bool):
+        if self.short is None: self.short = self.long = rtt
+        else:
+            self.short += self.short_alpha * (rtt - self.short)
+            self.long += self.long_alpha * (rtt - self.long)
+        # recover quickly once latency drops back below the long average
+        if self.long > self.short * 2: self.long *= 0.95
+
+        if not dropped and inflight * 2 < self.estimate: return
+        gradient = 0.5 if dropped else max(
+            0.5, min(1.0, self.tolerance * self.long / max(self.short, 1e-9))
+        )
+        target = self.estimate * gradient + math.sqrt(self.estimate)
+        self.estimate = self._clamp(
+            self.estimate * (1 - self.smoothing) + target * self.smoothing
+        )
@@ -0,0 +1,82 @@
+import typing
+
+
+class Histogram:
+    """
+    log-linear histogram in the spirit of HdrHistogram.
+    values are recorded in seconds and bucketed in multiples of [unit],
+    the relative error of every bucket is bounded by 2 ** -precision
+    """
+    def __init__(self, precision: int = 5, unit: float = 1e-6):
+        self.unit = unit
+        self.precision = precision
+        self._sub = 1 << precision
+        self.counts: typing.Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+
+    def _index(self, value: int) -> int:
+        if value < self._sub: return value
+        shift = value.bit_length() - self.precision - 1
+        return ((shift + 1) << self.precision) + (value >> shift) - self._sub
+
+    def _upper(self, index: int) -> int:
+        if index < self._sub: return index
+        shift = (index >> self.precision) - 1
+        mantissa = (index & (self._sub - 1)) + self._sub
+        return ((mantissa + 1) << shift) - 1
+
+    def record(self, value: float, count: int = 1):
+        index = self._index(int(value / self.unit))
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.count += count
+        self.total += value * count
+        if value < self.min: self.min = value
+        if value > self.max: self.max = value
+
+    def merge(self, other: 'Histogram') -> 'Histogram':
+        if (other.unit, other.precision) != (self.unit, self.precision):
+            raise ValueError('cannot merge histograms of different layout')
+
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def percentile(self, percent: float) -> float:
+        if not self.count: return 0.0
+        wanted = max(1, self.count * percent / 100)
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= wanted:
+                return min(self._upper(index) * self.unit, self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def buckets(self) -> typing.List[typing.Tuple[float, int]]:
+        """(upper bound in seconds, count) pairs of all non empty buckets"""
+        return [
+            (self._upper(i) * self.unit, self.counts[i])
+            for i in sorted(self.counts)
+        ]
+
+    def summary(self) -> dict:
+        return {
+            'count': self.count,
+            'min':   self.min if self.count else 0.0,
+            'max':   self.max,
+            'mean':  self.mean,
+            'p50':   self.percentile(50),
+            'p90':   self.percentile(90),
+            'p99':   self.percentile(99),
+            'p999':  self.percentile(99.9)
+        }
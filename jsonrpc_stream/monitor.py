@@ -0,0 +1,130 @@
+from jsonrpc_stream import dispatcher
+from jsonrpc_stream import metrics
+
+import threading
+import logging
+import inspect
+import asyncio
+import typing
+import types
+import time
+import sys
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN = '<unknown>'
+
+
+class HandlerIndex:
+    """maps the code objects of dispatched handlers to their rpc method"""
+    def __init__(self):
+        self.codes: typing.Dict[types.CodeType, typing.Tuple[str, str]] = {}
+
+    def add_namespace(
+        self,
+        namespace: str,
+        dispatch: dispatcher.DispatchNamespace,
+        seperator: str = '/'
+    ):
+        for name, target in dispatch.targets.items():
+            code = getattr(inspect.unwrap(target), '__code__', None)
+            if code is None: continue
+            method = namespace + seperator + name if namespace else name
+            self.codes[code] = (method, target.__qualname__)
+
+    def add_endpoint(self, endpoint: typing.Any):
+        for namespace, dispatch in endpoint.dispatchers.items():
+            self.add_namespace(
+                namespace, dispatch, endpoint.namespace_seperator
+            )
+
+    def find(
+        self, frame: typing.Optional[types.FrameType]
+    ) -> typing.Optional[typing.Tuple[str, str]]:
+        """walks the stack outwards until it hits a known handler"""
+        while frame is not None:
+            found = self.codes.get(frame.f_code)
+            if found: return found
+            frame = frame.f_back
+        return None
+
+
+class StallMonitor:
+    """
+    measures event loop lag and attributes stalls to the rpc handler
+    that was running while the loop was blocked.
+    a heartbeat task measures how late the loop wakes it up,
+    a watchdog thread samples the loop threads stack while it is late
+    """
+    def __init__(
+        self,
+        threshold: float = 0.1,
+        interval: float = None,
+        loop: asyncio.AbstractEventLoop = None
+    ):
+        self.loop = loop or asyncio.get_event_loop()
+        self.threshold = threshold
+        self.interval = interval or threshold / 2
+        self.index = HandlerIndex()
+        self.histograms: typing.Dict[str, metrics.Histogram] = {}
+        self.handlers: typing.Dict[str, str] = {}
+        self._beat = time.monotonic()
+        self._suspect: typing.Optional[typing.Tuple[str, str]] = None
+        self._thread_id: typing.Optional[int] = None
+        self._running = False
+
+    def watch(self, endpoint: typing.Any) -> 'StallMonitor':
+        """index all dispatchers currently attached to [endpoint]"""
+        self.index.add_endpoint(endpoint)
+        return self
+
+    def start(self) -> 'StallMonitor':
+        self._running = True
+        self._beat = time.monotonic()
+        self._heartbeat_task = self.loop.create_task(self._heartbeat())
+        threading.Thread(target=self._watchdog, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._running = False
+        self._heartbeat_task.cancel()
+
+    def record(self, lag: float, suspect: typing.Tuple[str, str] = None):
+        method, handler = suspect or (UNKNOWN, UNKNOWN)
+        logger.warning(
+            f'event loop stalled for {lag:.3f}s in {method} ({handler})'
+        )
+        self.handlers[method] = handler
+        try: self.histograms[method].record(lag)
+        except KeyError:
+            self.histograms[method] = metrics.Histogram()
+            self.histograms[method].record(lag)
+
+    def report(self) -> typing.Dict[str, dict]:
+        return {
+            method: dict(
+                handler=self.handlers[method],
+                buckets=hist.buckets(),
+                **hist.summary()
+            ) for method, hist in self.histograms.items()
+        }
+
+    async def _heartbeat(self):
+        self._thread_id = threading.get_ident()
+        while self._running:
+            before = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self._beat = time.monotonic()
+            lag = self._beat - before - self.interval
+            suspect, self._suspect = self._suspect, None
+            if lag >= self.threshold: self.record(lag, suspect)
+
+    def _watchdog(self):
+        while self._running:
+            time.sleep(self.interval / 2)
+            late = time.monotonic() - self._beat - self.interval
+            if late < self.threshold / 2 or self._suspect: continue
+            if self._thread_id is None: continue
+
+            frame = sys._current_frames().get(self._thread_id)
+            self._suspect = self.index.find(frame)
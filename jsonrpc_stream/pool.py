@@ -0,0 +1,242 @@
+from jsonrpc_stream import contracts
+from jsonrpc_stream import dispatcher
+from jsonrpc_stream import endpoint
+from jsonrpc_stream import hedging
+from jsonrpc_stream import limits
+from jsonrpc_stream import serializers
+from jsonrpc_stream import streams
+
+import itertools
+import logging
+import asyncio
+import typing
+import enum
+
+logger = logging.getLogger(__name__)
+
+Connector = typing.Callable[[], typing.Awaitable[contracts.RpcEntityStream]]
+
+
+def tcp_connector(
+    host: str, port: int, formatter: contracts.RpcEntitySerializer = None
+) -> Connector:
+    # one serializer for every connection
+    formatter = formatter or serializers.JsonSerializer()
+
+    async def connect() -> contracts.RpcEntityStream:
+        reader, writer = await asyncio.open_connection(host, port)
+        return streams.ContentLengthEntityStream(formatter, reader, writer)
+    return connect
+
+
+def unix_connector(
+    path: str, formatter: contracts.RpcEntitySerializer = None
+) -> Connector:
+    formatter = formatter or serializers.JsonSerializer()
+
+    async def connect() -> contracts.RpcEntityStream:
+        reader, writer = await asyncio.open_unix_connection(path)
+        return streams.ContentLengthEntityStream(formatter, reader, writer)
+    return connect
+
+
+class Balancing(enum.Enum):
+    round_robin       = enum.auto()
+    least_outstanding = enum.auto()
+    # needs [ping_interval], unmeasured connections are tried first
+    lowest_rtt        = enum.auto()
+
+
+class PoolSlot:
+    """one pooled connection, reconnected for as long as the pool lives"""
+    def __init__(self, pool: 'JsonRpcPool', connector: Connector):
+        self.pool = pool
+        self.connector = connector
+        self.endpoint: typing.Optional[endpoint.JsonRpcEndpoint] = None
+        self.connected: asyncio.Future = pool.loop.create_future()
+
+    async def run(self):
+        delay = self.pool.reconnect_delay
+        while not self.pool.closed:
+            # timeouts or bad addresses must not end the slot either
+            try: stream = await self.connector()
+            except Exception as e:
+                logger.warning(f'pool connection failed: {e!r}')
+                if not self.connected.done(): self.connected.set_result(False)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.pool.max_reconnect_delay)
+                continue
+
+            delay = self.pool.reconnect_delay
+            self.endpoint = self.pool.create_endpoint(stream)
+            self.pool.healthy.append(self.endpoint)
+            if not self.connected.done(): self.connected.set_result(True)
+            try: await self.endpoint.join()
+            finally: self.pool.evict(self.endpoint)
+            if not self.pool.closed: await asyncio.sleep(delay)
+
+
+class JsonRpcPool:
+    """
+    client side pool of [size] connections per connector, exposing the
+    call / notify / attach_proxy surface of a single JsonRpcEndpoint.
+    broken connections are evicted and reconnected in the background
+    """
+    def __init__(
+        self,
+        connectors: typing.Sequence[Connector],
+        size: int = 1,
+        balancing: Balancing = Balancing.least_outstanding,
+        namespace_seperator: str = '/',
+        timeout: int = 0,
+        reconnect_delay: float = 0.1,
+        max_reconnect_delay: float = 5.0,
+        on_connect: typing.Callable[[endpoint.JsonRpcEndpoint], None] = None,
+        loop: asyncio.AbstractEventLoop = None,
+        ping_interval: float = 0,
+        max_missed_pings: int = 3,
+        limiter: typing.Callable[[], limits.Limiter] = None,
+        hedge: hedging.HedgePolicy = None
+    ):
+        self.loop = loop or asyncio.get_event_loop()
+        self.balancing = balancing
+        self.namespace_seperator = namespace_seperator
+        self.timeout = timeout
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.on_connect = on_connect
+        self.ping_interval = ping_interval
+        self.max_missed_pings = max_missed_pings
+        # every connection adapts its own limit
+        self.limiter = limiter
+        # hedges read only calls across replicas
+        self.hedge = hedge
+        self.closed = False
+        self.healthy: typing.List[endpoint.JsonRpcEndpoint] = []
+        self.proxies: typing.Dict[str, dispatcher.ProxyNamespace] = {}
+        self.slots = [
+            PoolSlot(self, c) for c in connectors for _ in range(size)
+        ]
+        self._next = itertools.count()
+
+    def create_endpoint(
+        self, stream: contracts.RpcEntityStream
+    ) -> endpoint.JsonRpcEndpoint:
+        e = endpoint.JsonRpcEndpoint(
+            stream, self.namespace_seperator, self.timeout, self.loop,
+            self.ping_interval, self.max_missed_pings,
+            self.limiter() if self.limiter else None
+        )
+        if self.on_connect: self.on_connect(e)
+        return e.start()
+
+    async def start(self) -> 'JsonRpcPool':
+        """connects every slot once, failed slots keep retrying"""
+        self._tasks = [self.loop.create_task(s.run()) for s in self.slots]
+        await asyncio.gather(*(s.connected for s in self.slots))
+        return self
+
+    def evict(self, e: endpoint.JsonRpcEndpoint):
+        try: self.healthy.remove(e)
+        except ValueError: return
+        logger.info('evicted pooled connection')
+        e.close()
+
+    def pick(
+        self, exclude: endpoint.JsonRpcEndpoint = None
+    ) -> endpoint.JsonRpcEndpoint:
+        healthy = self.healthy
+        if exclude:
+            # prefer another replica over another connection to the same
+            connectors = {s.endpoint: s.connector for s in self.slots}
+            healthy = [e for e in healthy if e is not exclude]
+            healthy = [
+                e for e in healthy
+                if connectors.get(e) is not connectors.get(exclude)
+            ] or healthy
+        if not healthy:
+            raise ConnectionError('no healthy connection in pool')
+        if self.balancing == Balancing.round_robin:
+            return healthy[next(self._next) % len(healthy)]
+        if self.balancing == Balancing.lowest_rtt:
+            return min(healthy, key=lambda e: (e.rtt and e.rtt.ewma) or 0)
+        return min(healthy, key=lambda e: len(e._requests))
+
+    async def _on_endpoint(
+        self, e: endpoint.JsonRpcEndpoint, method: str,
+        namespace: typing.Optional[str], name: str,
+        *args: typing.Any, **kwargs: typing.Any
+    ) -> typing.Any:
+        try: return await getattr(e, method)(namespace, name, *args, **kwargs)
+        except ConnectionError:
+            self.evict(e)
+            raise
+
+    async def _on(
+        self, method: str, namespace: typing.Optional[str], name: str,
+        *args: typing.Any, **kwargs: typing.Any
+    ) -> typing.Any:
+        return await self._on_endpoint(
+            self.pick(), method, namespace, name, *args, **kwargs
+        )
+
+    async def call(
+        self,
+        namespace: typing.Optional[str],
+        name: str,
+        *args: typing.Any,
+        **kwargs: typing.Any
+    ) -> typing.Any:
+        full = namespace + self.namespace_seperator + name \
+            if namespace else name
+        if not self.hedge or full not in self.hedge \
+                or len(self.healthy) < 2:
+            return await self._on('call', namespace, name, *args, **kwargs)
+
+        first = self.pick()
+        return await self.hedge.run(
+            full,
+            lambda: self._on_endpoint(
+                first, 'call', namespace, name, *args, **kwargs
+            ),
+            lambda: self._on_endpoint(
+                self.pick(first), 'call', namespace, name, *args, **kwargs
+            ),
+            self.loop
+        )
+
+    async def notify(
+        self,
+        namespace: typing.Optional[str],
+        name: str,
+        *args: typing.Any,
+        **kwargs: typing.Any
+    ):
+        await self._on('notify', namespace, name, *args, **kwargs)
+
+    def call_stream(
+        self,
+        namespace: typing.Optional[str],
+        name: str,
+        *args: typing.Any,
+        **kwargs: typing.Any
+    ) -> typing.AsyncIterator:
+        return self.pick().call_stream(namespace, name, *args, **kwargs)
+
+    def attach_proxy(
+        self,
+        target: typing.Any,
+        namespace: str = None,
+        mode: dispatcher.DiscoverMode = dispatcher.DiscoverMode.decorated
+    ) -> 'JsonRpcPool':
+        namespace = namespace or target.__class__.__name__
+        self.proxies[namespace] = dispatcher.ProxyNamespace(
+            namespace, target, mode, self.call, self.notify, self.call_stream
+        )
+
+        return self
+
+    def close(self):
+        self.closed = True
+        for e in list(self.healthy): self.evict(e)
+        for t in getattr(self, '_tasks', ()): t.cancel()
@@ -0,0 +1,136 @@
+from jsonrpc_stream import exceptions
+from jsonrpc_stream import dispatcher
+from jsonrpc_stream import monitor
+
+import collections
+import threading
+import os.path
+import typing
+import types
+import time
+import sys
+
+NAMESPACE = '$'
+
+
+def frame_label(frame: types.FrameType) -> str:
+    code = frame.f_code
+    filename = os.path.basename(code.co_filename)
+    return f'{code.co_name} ({filename}:{code.co_firstlineno})'
+
+
+class SamplingSession:
+    """
+    samples the stack of one thread from a background thread
+    and aggregates the collapsed stacks per rpc method
+    """
+    def __init__(
+        self,
+        index: monitor.HandlerIndex,
+        thread_id: int,
+        interval: float = 0.005
+    ):
+        self.index = index
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = 0
+        self.stacks: typing.Dict[str, typing.Counter[str]] = \
+            collections.defaultdict(collections.Counter)
+        self._lock = threading.Lock()
+        self._running = threading.Event()
+
+    def start(self) -> 'SamplingSession':
+        self.started = time.monotonic()
+        self._running.set()
+        threading.Thread(target=self._sample_loop, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._running.clear()
+        self.stopped = time.monotonic()
+
+    def sample(self, frame: typing.Optional[types.FrameType]):
+        stack: typing.List[str] = []
+        method = monitor.UNKNOWN
+        while frame is not None:
+            stack.append(frame_label(frame))
+            found = self.index.codes.get(frame.f_code)
+            if found:
+                method = found[0]
+                break
+            frame = frame.f_back
+
+        with self._lock:
+            self.samples += 1
+            self.stacks[method][';'.join(reversed(stack))] += 1
+
+    def _sample_loop(self):
+        while self._running.is_set():
+            time.sleep(self.interval)
+            self.sample(sys._current_frames().get(self.thread_id))
+
+    def report(self) -> dict:
+        with self._lock:
+            methods = {
+                method: {
+                    'samples': sum(stacks.values()),
+                    'stacks': dict(stacks)
+                } for method, stacks in self.stacks.items()
+            }
+            collapsed = [
+                f'{method};{stack} {count}'
+                for method, stacks in self.stacks.items()
+                for stack, count in stacks.most_common()
+            ]
+
+        return {
+            'interval': self.interval,
+            'duration': getattr(self, 'stopped', time.monotonic()) -
+            self.started,
+            'samples': self.samples,
+            'methods': methods,
+            'collapsed': collapsed
+        }
+
+
+class Profiler:
+    """
+    opt in rpc namespace to profile a live endpoint over its own connection.
+    attach it with
+    endpoint.attach_dispatcher(Profiler(endpoint), profiler.NAMESPACE)
+    """
+    def __init__(self, endpoint: typing.Any):
+        self.endpoint = endpoint
+        self.session: typing.Optional[SamplingSession] = None
+
+    @dispatcher.request('profileStart')
+    def start(self, interval: float = 0.005) -> bool:
+        if self.session:
+            raise exceptions.JsonRpcServerError(
+                message='profiling session already running'
+            )
+
+        index = monitor.HandlerIndex()
+        index.add_endpoint(self.endpoint)
+        self.session = SamplingSession(
+            index, threading.get_ident(), interval
+        ).start()
+        return True
+
+    def _running_session(self) -> SamplingSession:
+        if not self.session:
+            raise exceptions.JsonRpcServerError(
+                message='no profiling session running'
+            )
+        return self.session
+
+    @dispatcher.request('profileSnapshot')
+    def snapshot(self) -> dict:
+        return self._running_session().report()
+
+    @dispatcher.request('profileStop')
+    def stop(self) -> dict:
+        session = self._running_session()
+        session.stop()
+        self.session = None
+        return session.report()
@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import typing
 
 
@@ -33,6 +33,15 @@ class RpcRequest(RpcIDEntity):
         }, 'params', self.params)
 
 
+@dataclass
+class PreparedRequest(RpcRequest):
+    """
+    request carrying a serializer specific [template], which already holds
+    everything but the id and params in encoded form
+    """
+    template: typing.Any = field(default=None, compare=False, repr=False)
+
+
 @dataclass
 class RpcNotification(RpcEntity):
     method: str
@@ -1,11 +1,22 @@
 from jsonrpc_stream import contracts
 from jsonrpc_stream import protocol
 from jsonrpc_stream import exceptions
+from jsonrpc_stream import encoders
+
+import functools
+import typing
 
 try: import ujson as json
 except ImportError: import json  # type: ignore
 
 
+# codes whose messages only name the method, see from_method
+METHOD_ERRORS = frozenset((
+    exceptions.JsonRpcMethodNotFound.CODE,
+    exceptions.JsonRpcInvalidParams.CODE
+))
+
+
 class BaseSerializer(contracts.RpcEntitySerializer):
     def __init__(self, version: str = '2.0'):
         self.version = version
@@ -61,18 +72,86 @@ class BaseSerializer(contracts.RpcEntitySerializer):
         )
 
 
+class RequestTemplate:
+    """
+    request to [method] encoded up to its id, produced by
+    [JsonSerializer.prepare]. encoding only splices in id and params
+    """
+    def __init__(self, serializer: 'JsonSerializer', method: str):
+        self.serializer = serializer
+        self.method = method
+        self.prefix = b''.join((
+            b'{"method": ', serializer.dumps(method),
+            b', "jsonrpc": ', serializer.dumps(protocol.RpcRequest.jsonrpc),
+            b', "id": '
+        ))
+
+    def encode(self, id: typing.Any, params: typing.Any) -> bytes:
+        dumps = self.serializer.dumps
+        if not params: return b''.join((self.prefix, dumps(id), b'}'))
+        return b''.join((
+            self.prefix, dumps(id), b', "params": ', dumps(params), b'}'
+        ))
+
+
 class JsonSerializer(BaseSerializer):
-    def __init__(self, encoding: str = 'utf-8', version: str = '2.0'):
+    def __init__(
+        self,
+        encoding: str = 'utf-8',
+        version: str = '2.0',
+        registry: encoders.EncoderRegistry = None
+    ):
         super().__init__(version)
         self.encoding = encoding
+        self.registry = registry or encoders.registry
+        # json.dumps builds a fresh encoder per call once given a default
+        self._dumps = json.JSONEncoder(
+            default=self.registry.default
+        ).encode if hasattr(json, 'JSONEncoder') else functools.partial(
+            json.dumps, default=self.registry.default
+        )
+        # errors with the stock message of their code or naming a method
+        # repeat a lot, messages naming a cause are encoded every time.
+        # unknown method names are bounded by the least recently used
+        self._error_details = functools.lru_cache(maxsize=256)(
+            self._encode_error_details
+        )
 
-    def entity_to_bytes(self, entity: protocol.RpcEntity) -> bytes:
+    def _encode_error_details(self, code: int, message: str) -> bytes:
         return json.dumps(
-            entity.to_dict(), default=lambda o: o.__dict__
+            {'code': code, 'message': message}
         ).encode(self.encoding)
 
+    def _encode_error(self, error: protocol.RpcError) -> bytes:
+        code, message = error.error.code, error.error.message
+        stock = getattr(exceptions.rpc_exceptions.get(code), 'MESSAGE', None)
+        encode = self._error_details \
+            if message == stock or code in METHOD_ERRORS \
+            else self._encode_error_details
+        return b''.join((
+            b'{"id": ', json.dumps(error.id).encode(self.encoding),
+            b', "error": ', encode(code, message),
+            b', "jsonrpc": ', json.dumps(error.jsonrpc).encode(self.encoding),
+            b'}'
+        ))
+
+    def dumps(self, value: typing.Any) -> bytes:
+        return self._dumps(value).encode(self.encoding)
+
+    def prepare(self, method: str) -> RequestTemplate:
+        return RequestTemplate(self, method)
+
+    def entity_to_bytes(self, entity: protocol.RpcEntity) -> bytes:
+        if type(entity) is protocol.PreparedRequest and \
+                getattr(entity.template, 'serializer', None) is self and \
+                entity.method == entity.template.method:
+            return entity.template.encode(entity.id, entity.params)
+        if type(entity) is protocol.RpcError and entity.error.data is None:
+            return self._encode_error(entity)
+        return self.dumps(entity.to_dict())
+
     def bytes_to_entity(self, data: bytes) -> protocol.RpcEntity:
-        try: deserialized: dict = json.loads(data.decode(self.encoding))
+        try: deserialized: dict = json.loads(str(data, self.encoding))
         except ValueError as e:
             return protocol.RpcMalformed(
                 None, exceptions.JsonRpcParseError.from_ex(e)
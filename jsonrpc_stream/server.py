@@ -0,0 +1,154 @@
+from jsonrpc_stream import contracts
+from jsonrpc_stream import dispatcher
+from jsonrpc_stream import endpoint
+from jsonrpc_stream import serializers
+from jsonrpc_stream import streams
+
+import logging
+import asyncio
+import typing
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class JsonRpcServer:
+    """
+    accepts tcp or unix socket connections and serves every one of them
+    through its own lightweight JsonRpcEndpoint. dispatch namespaces are
+    attached to the server once and shared by all connections,
+    [on_connect] may attach per connection dispatchers or proxies
+    """
+    def __init__(
+        self,
+        formatter: contracts.RpcEntitySerializer = None,
+        namespace_seperator: str = '/',
+        max_connections: int = 0,
+        on_connect: typing.Callable[[endpoint.JsonRpcEndpoint], None] = None,
+        loop: asyncio.AbstractEventLoop = None
+    ):
+        self.loop = loop or asyncio.get_event_loop()
+        self.formatter = formatter or serializers.JsonSerializer()
+        self.namespace_seperator = namespace_seperator
+        self.max_connections = max_connections
+        self.on_connect = on_connect
+        self.dispatchers: typing.Dict[str, dispatcher.DispatchNamespace] = {}
+        self.endpoints: typing.Set[endpoint.JsonRpcEndpoint] = set()
+        self.servers: typing.List[asyncio.AbstractServer] = []
+        self.accepting = False
+        self.connections_total = 0
+        self.connections_rejected = 0
+        self._handled_closed = 0
+        self._started = time.monotonic()
+
+    def attach_dispatcher(
+        self,
+        target: typing.Any,
+        namespace: str = None,
+        mode: dispatcher.DiscoverMode = dispatcher.DiscoverMode.decorated
+    ) -> 'JsonRpcServer':
+        namespace = namespace or target.__class__.__name__
+        self.dispatchers[namespace] = dispatcher.DispatchNamespace(
+            target, mode
+        )
+
+        return self
+
+    def create_endpoint(
+        self, stream: contracts.RpcEntityStream
+    ) -> endpoint.JsonRpcEndpoint:
+        e = endpoint.JsonRpcEndpoint(
+            stream, self.namespace_seperator, loop=self.loop
+        )
+        if self.on_connect:
+            e.dispatchers = dict(self.dispatchers)
+            self.on_connect(e)
+        else: e.dispatchers = self.dispatchers
+        return e
+
+    async def serve_stream(self, stream: contracts.RpcEntityStream):
+        """serves an already established stream until it closes"""
+        if not self.accepting or (
+            self.max_connections and
+            len(self.endpoints) >= self.max_connections
+        ):
+            logger.info('rejecting connection, server full or draining')
+            self.connections_rejected += 1
+            stream.close()
+            return
+
+        e = self.create_endpoint(stream)
+        self.connections_total += 1
+        self.endpoints.add(e)
+        try: await e.start().join()
+        finally:
+            self.endpoints.discard(e)
+            self._handled_closed += e.handled
+
+    async def _accept(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        await self.serve_stream(streams.ContentLengthEntityStream(
+            self.formatter, reader, writer
+        ))
+
+    async def start_tcp(
+        self, host: str = None, port: int = None, **kwargs: typing.Any
+    ) -> 'JsonRpcServer':
+        self.accepting = True
+        self.servers.append(await asyncio.start_server(
+            self._accept, host, port, **kwargs
+        ))
+        return self
+
+    async def start_unix(
+        self, path: str, **kwargs: typing.Any
+    ) -> 'JsonRpcServer':
+        self.accepting = True
+        self.servers.append(await asyncio.start_unix_server(
+            self._accept, path, **kwargs
+        ))
+        return self
+
+    @property
+    def sockets(self) -> list:
+        return [s for server in self.servers for s in server.sockets or ()]
+
+    def _stop_accepting(self):
+        self.accepting = False
+        for server in self.servers: server.close()
+
+    def close(self):
+        """stops listening and forcefully closes every connection"""
+        self._stop_accepting()
+        for e in list(self.endpoints): e.close()
+
+    async def drain(self, timeout: float = None, poll: float = 0.01):
+        """
+        stops accepting, waits up to [timeout] for in flight requests
+        to finish and then closes all remaining connections
+        """
+        self._stop_accepting()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while any(e.inflight for e in self.endpoints):
+            if deadline is not None and time.monotonic() >= deadline:
+                logger.warning('drain timed out, closing busy connections')
+                break
+            await asyncio.sleep(poll)
+
+        endpoints = list(self.endpoints)
+        for e in endpoints: e.close()
+        await asyncio.gather(*(e.join() for e in endpoints))
+
+    def metrics(self) -> dict:
+        return {
+            'uptime': time.monotonic() - self._started,
+            'connections_active': len(self.endpoints),
+            'connections_total': self.connections_total,
+            'connections_rejected': self.connections_rejected,
+            'requests_inflight': sum(e.inflight for e in self.endpoints),
+            'entities_handled': self._handled_closed + sum(
+                e.handled for e in self.endpoints
+            ),
+            'calls_pending': sum(len(e._requests) for e in self.endpoints)
+        }
@@ -0,0 +1,163 @@
+from jsonrpc_stream import dispatcher
+from jsonrpc_stream import endpoint
+
+import hashlib
+import bisect
+import typing
+
+KeyExtractor = typing.Callable[..., typing.Any]
+
+
+def hash_key(key: typing.Any) -> int:
+    digest = hashlib.blake2b(str(key).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+class ConsistentHashRing:
+    """
+    maps keys onto nodes. every node owns [vnodes] points on the ring,
+    adding or removing a node only moves the keys next to its points
+    """
+    def __init__(self, vnodes: int = 160):
+        self.vnodes = vnodes
+        self.points: typing.List[int] = []
+        self.owners: typing.List[str] = []
+
+    def __len__(self) -> int: return len(self.points) // self.vnodes
+
+    def __contains__(self, node: str) -> bool: return node in self.owners
+
+    def add(self, node: str):
+        if node in self: return
+        for i in range(self.vnodes):
+            point = hash_key(f'{node}#{i}')
+            at = bisect.bisect(self.points, point)
+            self.points.insert(at, point)
+            self.owners.insert(at, node)
+
+    def remove(self, node: str):
+        keep = [i for i, owner in enumerate(self.owners) if owner != node]
+        self.points = [self.points[i] for i in keep]
+        self.owners = [self.owners[i] for i in keep]
+
+    def lookup(self, key: typing.Any) -> str:
+        if not self.points: raise LookupError('no nodes in ring')
+        at = bisect.bisect(self.points, hash_key(key))
+        return self.owners[at % len(self.owners)]
+
+
+class ShardedClient:
+    """
+    routes calls across named endpoints by consistent hashing a key taken
+    from the call. keys come from the extractor registered with [key_by]
+    for the method, otherwise from the first positional argument or the
+    keyword argument whose name sorts first. exposes the call / notify /
+    attach_proxy surface of a single JsonRpcEndpoint
+    """
+    def __init__(
+        self,
+        endpoints: typing.Mapping[str, endpoint.JsonRpcEndpoint] = None,
+        vnodes: int = 160
+    ):
+        self.ring = ConsistentHashRing(vnodes)
+        self.endpoints: typing.Dict[str, endpoint.JsonRpcEndpoint] = {}
+        self.extractors: typing.Dict[
+            typing.Tuple[typing.Optional[str], str], KeyExtractor
+        ] = {}
+        self.proxies: typing.Dict[str, dispatcher.ProxyNamespace] = {}
+        for name, e in (endpoints or {}).items(): self.add(name, e)
+
+    def add(
+        self, name: str, e: endpoint.JsonRpcEndpoint
+    ) -> 'ShardedClient':
+        """[name] places the endpoint on the ring, keep it stable"""
+        self.endpoints[name] = e
+        self.ring.add(name)
+        return self
+
+    def remove(self, name: str) -> typing.Optional[endpoint.JsonRpcEndpoint]:
+        self.ring.remove(name)
+        return self.endpoints.pop(name, None)
+
+    def key_by(
+        self,
+        namespace: typing.Optional[str],
+        name: str,
+        extractor: KeyExtractor
+    ) -> 'ShardedClient':
+        """[extractor] is called with the arguments of every call"""
+        self.extractors[(namespace, name)] = extractor
+        return self
+
+    def key(
+        self,
+        namespace: typing.Optional[str],
+        name: str,
+        args: typing.Sequence,
+        kwargs: typing.Mapping
+    ) -> typing.Any:
+        extractor = self.extractors.get((namespace, name))
+        if extractor: return extractor(*args, **kwargs)
+        if args: return args[0]
+        # keyword order is up to the caller, pick by name instead
+        if kwargs: return kwargs[min(kwargs)]
+        return name
+
+    def pick(
+        self,
+        namespace: typing.Optional[str],
+        name: str,
+        args: typing.Sequence = (),
+        kwargs: typing.Mapping = {}
+    ) -> endpoint.JsonRpcEndpoint:
+        node = self.ring.lookup(self.key(namespace, name, args, kwargs))
+        return self.endpoints[node]
+
+    async def call(
+        self,
+        namespace: typing.Optional[str],
+        name: str,
+        *args: typing.Any,
+        **kwargs: typing.Any
+    ) -> typing.Any:
+        return await self.pick(namespace, name, args, kwargs).call(
+            namespace, name, *args, **kwargs
+        )
+
+    async def notify(
+        self,
+        namespace: typing.Optional[str],
+        name: str,
+        *args: typing.Any,
+        **kwargs: typing.Any
+    ):
+        await self.pick(namespace, name, args, kwargs).notify(
+            namespace, name, *args, **kwargs
+        )
+
+    def call_stream(
+        self,
+        namespace: typing.Optional[str],
+        name: str,
+        *args: typing.Any,
+        **kwargs: typing.Any
+    ) -> typing.AsyncIterator:
+        return self.pick(namespace, name, args, kwargs).call_stream(
+            namespace, name, *args, **kwargs
+        )
+
+    def attach_proxy(
+        self,
+        target: typing.Any,
+        namespace: str = None,
+        mode: dispatcher.DiscoverMode = dispatcher.DiscoverMode.decorated
+    ) -> 'ShardedClient':
+        namespace = namespace or target.__class__.__name__
+        self.proxies[namespace] = dispatcher.ProxyNamespace(
+            namespace, target, mode, self.call, self.notify, self.call_stream
+        )
+
+        return self
+
+    def close(self):
+        for e in self.endpoints.values(): e.close()
@@ -0,0 +1,246 @@
+from jsonrpc_stream import contracts
+from jsonrpc_stream import protocol
+
+from multiprocessing import shared_memory
+
+import tempfile
+import logging
+import asyncio
+import typing
+import struct
+import sys
+import os
+
+logger = logging.getLogger(__name__)
+
+# head and tail live on their own cache lines
+HEAD = 0
+TAIL = 64
+CLOSED = 128
+HEADER = 192
+
+U64 = struct.Struct('<Q')
+LENGTH = struct.Struct('<I')
+
+
+def attach_memory(name: str) -> shared_memory.SharedMemory:
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name, track=False)
+    return shared_memory.SharedMemory(name)
+
+
+def open_fifo(path: str) -> int:
+    # opening read write never blocks waiting for the other side
+    return os.open(path, os.O_RDWR | os.O_NONBLOCK)
+
+
+class RingBuffer:
+    """
+    single producer single consumer ring of length prefixed frames
+    in a shared memory block. positions only ever grow,
+    their difference is the amount of buffered bytes
+    """
+    def __init__(self, memory: shared_memory.SharedMemory):
+        self.memory = memory
+        self.buf = memory.buf
+        self.capacity = memory.size - HEADER
+        self.data = self.buf[HEADER:HEADER + self.capacity]
+
+    @classmethod
+    def create(cls, size: int) -> 'RingBuffer':
+        memory = shared_memory.SharedMemory(create=True, size=size + HEADER)
+        memory.buf[:HEADER] = bytes(HEADER)
+        return cls(memory)
+
+    @property
+    def head(self) -> int: return U64.unpack_from(self.buf, HEAD)[0]
+
+    @property
+    def tail(self) -> int: return U64.unpack_from(self.buf, TAIL)[0]
+
+    @property
+    def closed(self) -> bool: return bool(self.buf[CLOSED])
+
+    def mark_closed(self): self.buf[CLOSED] = 1
+
+    def _put(self, position: int, data: typing.Any):
+        offset = position % self.capacity
+        first = min(len(data), self.capacity - offset)
+        self.data[offset:offset + first] = data[:first]
+        if first < len(data): self.data[:len(data) - first] = data[first:]
+
+    def _get(self, position: int, length: int) -> typing.Any:
+        offset = position % self.capacity
+        if offset + length <= self.capacity:
+            return self.data[offset:offset + length]
+        first = self.capacity - offset
+        return bytes(self.data[offset:]) + bytes(self.data[:length - first])
+
+    def try_write(self, body: bytes) -> bool:
+        needed = LENGTH.size + len(body)
+        if needed > self.capacity:
+            raise ValueError(
+                f'frame of {len(body)} bytes exceeds ring capacity'
+            )
+
+        head = self.head
+        if self.capacity - (head - self.tail) < needed: return False
+        self._put(head, LENGTH.pack(len(body)))
+        self._put(head + LENGTH.size, memoryview(body))
+        # publish the frame only once it is completely written
+        U64.pack_into(self.buf, HEAD, head + needed)
+        return True
+
+    def try_read(self, consume: typing.Callable[[typing.Any], typing.Any]):
+        """
+        hands the next frame to [consume] without copying it out of the
+        ring whenever it is contiguous. returns None when the ring is empty
+        """
+        tail = self.tail
+        if self.head == tail: return None
+        length = LENGTH.unpack(bytes(self._get(tail, LENGTH.size)))[0]
+        view = self._get(tail + LENGTH.size, length)
+        try: return consume(view)
+        finally:
+            if isinstance(view, memoryview): view.release()
+            U64.pack_into(self.buf, TAIL, tail + LENGTH.size + length)
+
+    def close(self):
+        self.data.release()
+        self.buf = None
+        self.memory.close()
+
+
+class SharedMemoryChannel:
+    """
+    names of the two rings and the wakeup fifos of a stream pair.
+    picklable, so it can be handed to a multiprocessing child
+    """
+    def __init__(
+        self,
+        rings: typing.Tuple[str, str],
+        fifos: typing.Tuple[str, str, str, str],
+        directory: str
+    ):
+        self.rings = rings
+        self.fifos = fifos
+        self.directory = directory
+
+    @classmethod
+    def create(cls, size: int = 1 << 20) -> 'SharedMemoryChannel':
+        rings = (RingBuffer.create(size), RingBuffer.create(size))
+        directory = tempfile.mkdtemp(prefix='jsonrpc-shm-')
+        fifos = tuple(
+            os.path.join(directory, name)
+            for name in ('data0', 'space0', 'data1', 'space1')
+        )
+        for path in fifos: os.mkfifo(path)
+        channel = cls(
+            (rings[0].memory.name, rings[1].memory.name),
+            fifos, directory  # type: ignore
+        )
+        channel._owned = rings
+        return channel
+
+    def __getstate__(self) -> dict:
+        # only the creator may destroy the rings
+        return {k: v for k, v in self.__dict__.items() if k != '_owned'}
+
+    def unlink(self):
+        """destroys the rings and fifos, call once both sides are done"""
+        for ring in getattr(self, '_owned', ()):
+            ring.memory.unlink()
+            ring.close()
+        for path in self.fifos:
+            try: os.unlink(path)
+            except FileNotFoundError: pass
+        try: os.rmdir(self.directory)
+        except OSError: pass
+
+
+class SharedMemoryEntityStream(contracts.RpcEntityStream):
+    """
+    stream between two processes on the same host. side 0 writes the
+    first ring and reads the second, side 1 the other way around.
+    frames are copied into the ring once and parsed in place,
+    fifos wake up the peer when data or space becomes available
+    """
+    def __init__(
+        self,
+        formatter: contracts.RpcEntitySerializer,
+        channel: SharedMemoryChannel,
+        side: int,
+        loop: asyncio.AbstractEventLoop = None
+    ):
+        super().__init__(formatter)
+        self.loop = loop or asyncio.get_event_loop()
+        self.channel = channel
+        out, into = (0, 1) if side == 0 else (1, 0)
+        self.tx = RingBuffer(attach_memory(channel.rings[out]))
+        self.rx = RingBuffer(attach_memory(channel.rings[into]))
+        self._data_out = open_fifo(channel.fifos[2 * out])
+        self._space_in = open_fifo(channel.fifos[2 * out + 1])
+        self._data_in = open_fifo(channel.fifos[2 * into])
+        self._space_out = open_fifo(channel.fifos[2 * into + 1])
+        self._readable = asyncio.Event()
+        self._writable = asyncio.Event()
+        self.loop.add_reader(self._data_in, self._wake, self._data_in,
+                             self._readable)
+        self.loop.add_reader(self._space_in, self._wake, self._space_in,
+                             self._writable)
+        self.closed = False
+
+    @staticmethod
+    def _wake(fd: int, event: asyncio.Event):
+        try:
+            while os.read(fd, 4096): pass
+        except BlockingIOError: pass
+        event.set()
+
+    @staticmethod
+    def _signal(fd: int):
+        # a full fifo already guarantees a pending wakeup
+        try: os.write(fd, b'\0')
+        except (BlockingIOError, OSError): pass
+
+    async def fetch_entity(self) -> typing.Optional[protocol.RpcEntity]:
+        while not self.closed:
+            self._readable.clear()
+            entity = self.rx.try_read(self.formatter.bytes_to_entity)
+            if entity is not None:
+                self._signal(self._space_out)
+                logger.debug(f'fetched entity: {entity}')
+                return entity
+            if self.rx.closed or self.tx.closed: break
+            await self._readable.wait()
+
+        logger.info('shared memory stream closed')
+        return None
+
+    async def dispatch_entity(self, entity: protocol.RpcEntity):
+        logger.debug(f'dispatching entity: {entity}')
+        body = self.formatter.entity_to_bytes(entity)
+        while True:
+            if self.closed or self.tx.closed:
+                raise ConnectionResetError('shared memory stream is closed')
+            self._writable.clear()
+            if self.tx.try_write(body): break
+            await self._writable.wait()
+        self._signal(self._data_out)
+
+    def close(self):
+        if self.closed: return
+        self.closed = True
+        self.tx.mark_closed()
+        self.rx.mark_closed()
+        self._signal(self._data_out)
+        self._signal(self._space_out)
+        self._readable.set()
+        self._writable.set()
+        for fd in (self._data_in, self._space_in):
+            self.loop.remove_reader(fd)
+        for fd in (self._data_out, self._space_in, self._data_in,
+                   self._space_out):
+            os.close(fd)
+        self.tx.close()
+        self.rx.close()
@@ -0,0 +1,210 @@
+from jsonrpc_stream import contracts
+from jsonrpc_stream import protocol
+
+import collections
+import itertools
+import tempfile
+import logging
+import asyncio
+import typing
+import struct
+import mmap
+import os
+
+logger = logging.getLogger(__name__)
+
+LENGTH = struct.Struct('>I')
+
+
+class SpoolSegment:
+    """fixed size memory mapped file of length prefixed frames"""
+    def __init__(self, path: str, size: int):
+        self.path = path
+        self.size = size
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o600)
+        os.ftruncate(self.fd, size)
+        self.map = mmap.mmap(self.fd, size)
+        self.head = 0
+        self.tail = 0
+
+    def __len__(self) -> int: return self.head - self.tail
+
+    def append(self, body: bytes) -> bool:
+        end = self.head + LENGTH.size + len(body)
+        if end > self.size: return False
+        LENGTH.pack_into(self.map, self.head, len(body))
+        self.map[self.head + LENGTH.size:end] = body
+        self.head = end
+        return True
+
+    def peek(self) -> bytes:
+        length, = LENGTH.unpack_from(self.map, self.tail)
+        start = self.tail + LENGTH.size
+        return self.map[start:start + length]
+
+    def pop(self):
+        length, = LENGTH.unpack_from(self.map, self.tail)
+        self.tail += LENGTH.size + length
+        # an emptied segment is written from the start again
+        if self.tail == self.head: self.head = self.tail = 0
+
+    def close(self):
+        self.map.close()
+        os.close(self.fd)
+        try: os.unlink(self.path)
+        except FileNotFoundError: pass
+
+
+class Spool:
+    """
+    append only fifo of frames in memory mapped segment files.
+    segments are created as needed and deleted once replayed
+    """
+    def __init__(self, directory: str = None, segment_size: int = 16 << 20):
+        self.owned = directory is None
+        self.directory = directory or \
+            tempfile.mkdtemp(prefix='jsonrpc-spool-')
+        self.segment_size = segment_size
+        self.segments: typing.Deque[SpoolSegment] = collections.deque()
+        self.frames = 0
+        self._names = itertools.count()
+
+    def __len__(self) -> int: return self.frames
+
+    def _segment(self, needed: int) -> SpoolSegment:
+        path = os.path.join(
+            self.directory, f'{os.getpid()}-{id(self)}-{next(self._names)}'
+        )
+        segment = SpoolSegment(path, max(self.segment_size, needed))
+        self.segments.append(segment)
+        return segment
+
+    def append(self, body: bytes):
+        if not self.segments or not self.segments[-1].append(body):
+            self._segment(LENGTH.size + len(body)).append(body)
+        self.frames += 1
+
+    def peek(self) -> typing.Optional[bytes]:
+        return self.segments[0].peek() if self.frames else None
+
+    def pop(self):
+        segment = self.segments[0]
+        segment.pop()
+        self.frames -= 1
+        if not len(segment) and len(self.segments) > 1:
+            self.segments.popleft().close()
+
+    def close(self):
+        while self.segments: self.segments.popleft().close()
+        self.frames = 0
+        if self.owned:
+            try: os.rmdir(self.directory)
+            except OSError: pass
+
+
+class SpooledEntityStream(contracts.RpcEntityStream):
+    """
+    wraps [stream] so dispatching notifications never waits for the peer.
+    they are queued in memory up to [memory_limit] bytes, past that in a
+    [Spool] on disk, and sent in order by a background flusher.
+    every other entity waits until the queued notifications went out,
+    to keep for example partial results ahead of their final result.
+    when sending fails the backlog is kept until [replace] hands
+    over a new stream
+    """
+    def __init__(
+        self,
+        stream: contracts.RpcEntityStream,
+        memory_limit: int = 1 << 20,
+        directory: str = None,
+        segment_size: int = 16 << 20,
+        loop: asyncio.AbstractEventLoop = None
+    ):
+        super().__init__(stream.formatter)
+        self.loop = loop or asyncio.get_event_loop()
+        self.stream = stream
+        self.memory_limit = memory_limit
+        self.memory: typing.Deque[bytes] = collections.deque()
+        self.buffered = 0
+        self.spool = Spool(directory, segment_size)
+        self.failed: typing.Optional[BaseException] = None
+        self.closed = False
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._flusher: typing.Optional[asyncio.Task] = None
+
+    @property
+    def backlog(self) -> int:
+        return len(self.memory) + len(self.spool)
+
+    async def fetch_entity(self) -> typing.Optional[protocol.RpcEntity]:
+        return await self.stream.fetch_entity()
+
+    async def dispatch_entity(self, entity: protocol.RpcEntity):
+        if isinstance(entity, protocol.RpcNotification):
+            return self.enqueue(self.formatter.entity_to_bytes(entity))
+        await self.flushed()
+        await self.stream.dispatch_entity(entity)
+
+    def enqueue(self, body: bytes):
+        if self.closed: raise ConnectionResetError('spooled stream is closed')
+        # once frames went to disk, later ones follow them there
+        if len(self.spool) or self.buffered + len(body) > self.memory_limit:
+            self.spool.append(body)
+        else:
+            self.memory.append(body)
+            self.buffered += len(body)
+
+        # a failed stream keeps collecting until [replace]
+        if self.failed: return
+        self._idle.clear()
+        if not self._flusher or self._flusher.done():
+            self._flusher = self.loop.create_task(self._flush())
+
+    async def flushed(self):
+        """waits until the backlog is sent"""
+        await self._idle.wait()
+        if self.failed: raise ConnectionResetError(
+            f'spooled stream failed: {self.failed}'
+        )
+
+    async def _send(self, body: typing.Any):
+        dispatch_body = getattr(self.stream, 'dispatch_body', None)
+        if dispatch_body: return await dispatch_body(body)
+        await self.stream.dispatch_entity(
+            self.formatter.bytes_to_entity(bytes(body))
+        )
+
+    async def _flush(self):
+        while self.backlog:
+            # memory always holds the older frames
+            from_memory = bool(self.memory)
+            body = self.memory[0] if from_memory else self.spool.peek()
+            # frames are only dropped once sent, failures keep them
+            try: await self._send(body)
+            except Exception as e:
+                logger.warning(f'cannot reach peer, keeping backlog: {e}')
+                self.failed = e
+                break
+
+            if from_memory: self.buffered -= len(self.memory.popleft())
+            else: self.spool.pop()
+        self._idle.set()
+
+    def replace(self, stream: contracts.RpcEntityStream):
+        """continues sending the backlog over a new [stream]"""
+        self.stream = stream
+        self.failed = None
+        if self.backlog:
+            self._idle.clear()
+            self._flusher = self.loop.create_task(self._flush())
+
+    def close(self):
+        if self.closed: return
+        self.closed = True
+        if self._flusher: self._flusher.cancel()
+        self.memory.clear()
+        self.buffered = 0
+        self.spool.close()
+        self._idle.set()
+        self.stream.close()
@@ -1,48 +1,194 @@
+from jsonrpc_stream import attachments
+from jsonrpc_stream import compression
 from jsonrpc_stream import contracts
+from jsonrpc_stream import exceptions
 from jsonrpc_stream import protocol
 
 import asyncio
+import struct
+import copy
 import typing
 import logging
 
 
 logger = logging.getLogger(__name__)
 
+# length prefix of every binary attachment segment
+SEGMENT = struct.Struct('>Q')
+
 
 class ContentLengthEntityStream(contracts.RpcEntityStream):
+    """
+    frames entities with a Content-Length header. binary attachments
+    follow the body as length prefixed segments, announced by an
+    Attachments header. receiving them is always supported,
+    sending has to be enabled with [attachments] since it costs a walk
+    over every outgoing payload.
+    with [codecs] bodies of at least [min_compress_size] bytes are
+    compressed, once the peer advertised a matching Accept-Encoding.
+    frames above [max_frame_size] bytes are skipped without buffering
+    them and answered with an invalid request error, bodies of at least
+    [chunk_size] bytes are read piecewise into a single buffer.
+    a [capture.CaptureWriter] records every decoded body
+    """
     def __init__(
         self,
         formatter: contracts.RpcEntitySerializer,
         source: asyncio.StreamReader,
         sink:   asyncio.StreamWriter,
-        encoding: str = 'utf-8'
+        encoding: str = 'utf-8',
+        attachments: bool = False,
+        codecs: typing.Sequence[contracts.RpcFrameCodec] = (),
+        min_compress_size: int = 1024,
+        max_frame_size: int = 0,
+        chunk_size: int = 1 << 16,
+        capture: typing.Any = None
     ):
         super().__init__(formatter)
         self.source = source
         self.sink   = sink
         self.encoding = encoding
+        self.attachments = attachments
+        self.max_frame_size = max_frame_size
+        self.chunk_size = chunk_size
+        self.capture = capture
+        self.compressor = compression.FrameCompressor(
+            codecs, min_compress_size
+        ) if codecs else None
 
-    async def fetch_entity(self) -> typing.Optional[protocol.RpcEntity]:
+    async def read_headers(self) -> typing.Dict[str, str]:
+        headers = {}
+        while True:
+            temp = await self.source.readuntil(b'\r\n')
+            temp = temp.decode(self.encoding).strip('\r\n')
+            if not temp: return headers
+
+            logger.debug(f'received header: {temp}')
+            temp = temp.split(':')
+            try: headers[temp[0].strip()] = temp[1].strip()
+            except IndexError:
+                logger.warning(f'skipping malformed header: {temp}.')
+
+    async def read_body(self, length: int) -> typing.Union[bytes, bytearray]:
+        if length < self.chunk_size:
+            return await self.source.readexactly(length)
+
+        # readexactly would first buffer the whole body in the reader and
+        # then copy it out, chunks keep the readers buffer at its limit
+        body = bytearray(length)
+        view = memoryview(body)
+        position = 0
+        while position < length:
+            chunk = await self.source.read(
+                min(self.chunk_size, length - position)
+            )
+            if not chunk: raise asyncio.IncompleteReadError(
+                bytes(view[:position]), length
+            )
+            view[position:position + len(chunk)] = chunk
+            position += len(chunk)
+        view.release()
+        return body
+
+    async def discard(self, length: int):
+        while length > 0:
+            chunk = await self.source.read(min(self.chunk_size, length))
+            if not chunk: raise asyncio.IncompleteReadError(b'', length)
+            length -= len(chunk)
+
+    async def read_attachments(
+        self, count: int, budget: int
+    ) -> typing.Optional[typing.List[typing.Any]]:
+        """returns None when the segments exceed the remaining [budget]"""
+        segments: typing.Optional[typing.List[typing.Any]] = []
+        for _ in range(count):
+            length, = SEGMENT.unpack(
+                await self.source.readexactly(SEGMENT.size)
+            )
+            budget -= length
+            if segments is None or (self.max_frame_size and budget < 0):
+                segments = None
+                await self.discard(length)
+            else: segments.append(await self.read_body(length))
+        return segments
+
+    def oversized(self, length: int) -> protocol.RpcMalformed:
+        logger.warning(f'rejecting frame of {length} bytes')
+        return protocol.RpcMalformed(
+            None, exceptions.JsonRpcInvalidRequest(
+                message=f'frame of {length} bytes exceeds the maximum ' +
+                f'frame size of {self.max_frame_size} bytes'
+            )
+        )
+
+    def decode_body(
+        self, headers: typing.Dict[str, str], body: bytes
+    ) -> typing.Union[bytes, protocol.RpcMalformed]:
+        if self.compressor and 'Accept-Encoding' in headers:
+            self.compressor.negotiate(headers['Accept-Encoding'])
+
+        encoding = headers.get('Content-Encoding')
         try:
-            headers = {}
-
-            async def read_header():
-                temp = await self.source.readuntil(b'\r\n')
-                temp = temp.decode(self.encoding).strip('\r\n')
-                if not temp: return False
-
-                logger.debug(f'received header: {temp}')
-                temp = temp.split(':')
-                try: headers[temp[0].strip()] = temp[1].strip()
-                except IndexError:
-                    logger.warning(f'skipping malformed header: {temp}.')
-                return True
-
-            while await read_header(): pass
-            logger.debug(f'headers read, reading body now')
-            entity = self.formatter.bytes_to_entity(
-                await self.source.readexactly(int(headers['Content-Length']))
+            if encoding:
+                if not self.compressor: raise KeyError(encoding)
+                body = self.compressor.decompress(
+                    body, encoding, self.max_frame_size
+                )
+        except Exception as e:
+            logger.warning(f'cannot decode {encoding} body: {e}')
+            return protocol.RpcMalformed(
+                None, exceptions.JsonRpcInvalidRequest(
+                    message=f'unsupported content encoding {encoding}'
+                )
             )
+        if self.capture: self.capture.inbound(body)
+        return body
+
+    def body_to_entity(
+        self, headers: typing.Dict[str, str], body: bytes
+    ) -> protocol.RpcEntity:
+        decoded = self.decode_body(headers, body)
+        if isinstance(decoded, protocol.RpcMalformed): return decoded
+        return self.formatter.bytes_to_entity(decoded)
+
+    async def read_frame(self) -> typing.Union[
+        typing.Tuple[typing.Dict[str, str], bytes, typing.List[typing.Any]],
+        protocol.RpcMalformed
+    ]:
+        headers = await self.read_headers()
+        logger.debug(f'headers read, reading body now')
+        length = int(headers['Content-Length'])
+        count = int(headers.get('Attachments', 0))
+        if self.max_frame_size and length > self.max_frame_size:
+            await self.discard(length)
+            await self.read_attachments(count, 0)
+            return self.oversized(length)
+
+        body = await self.read_body(length)
+        # always consume the segments to stay in sync with the peer
+        segments = await self.read_attachments(
+            count, self.max_frame_size - length
+        )
+        if segments is None: return self.oversized(length)
+        return headers, body, segments
+
+    def exhausted(self) -> None:
+        logger.info(
+            'source exhausted or unrecoverable error occured. ' +
+            'exiting stream'
+        )
+        self.sink.close()
+        return None
+
+    async def fetch_entity(self) -> typing.Optional[protocol.RpcEntity]:
+        try:
+            frame = await self.read_frame()
+            if isinstance(frame, protocol.RpcMalformed): return frame
+            headers, body, segments = frame
+
+            entity = self.body_to_entity(headers, body)
+            del body, frame
+            if segments: entity = attachments.resolve_entity(entity, segments)
 
             logger.debug(f'fetched entity: {entity}')
             return entity
@@ -50,24 +196,151 @@ class ContentLengthEntityStream(contracts.RpcEntityStream):
             logger.exception('Content-Length header missing')
         except ValueError:
             logger.exception('malformed Content-Length header')
-        except asyncio.streams.IncompleteReadError: pass
-        logger.info(
-            'source exhausted or unrecoverable error occured. ' +
-            'exiting stream'
-        )
+        except asyncio.IncompleteReadError: pass
+        return self.exhausted()
 
-        self.sink.close()
-        return None
+    async def fetch_body(
+        self
+    ) -> typing.Union[bytes, bytearray, protocol.RpcMalformed, None]:
+        """
+        reads the next frame without parsing its body, for forwarding it.
+        frames with attachments are not a single body and come back
+        malformed, None means the stream is exhausted
+        """
+        try:
+            frame = await self.read_frame()
+            if isinstance(frame, protocol.RpcMalformed): return frame
+            headers, body, segments = frame
+            if segments: return protocol.RpcMalformed(
+                None, exceptions.JsonRpcInvalidRequest(
+                    message='attachments can not be forwarded'
+                )
+            )
+            return self.decode_body(headers, body)
+        except KeyError:
+            logger.exception('Content-Length header missing')
+        except ValueError:
+            logger.exception('malformed Content-Length header')
+        except asyncio.IncompleteReadError: pass
+        return self.exhausted()
+
+    async def dispatch_body(self, body: typing.Union[bytes, bytearray]):
+        """writes an already serialized body as a single frame"""
+        if self.capture: self.capture.outbound(body)
+        extra = ''
+        if self.compressor:
+            body, extra = self.compressor.compress(body)
+            extra += self.compressor.headers()
+        self.sink.write(  # type: ignore
+            f'Content-Length: {len(body)}\r\n{extra}\r\n'.encode() + body
+        )
+        await self.sink.drain()
 
     async def dispatch_entity(self, entity: protocol.RpcEntity):
         logger.debug(f'dispatching entity: {entity}')
+        segments: typing.List[typing.Any] = []
+        if self.attachments:
+            entity = attachments.extract_entity(entity, segments)
+
         body = self.formatter.entity_to_bytes(entity)
-        self.sink.write(  # type: ignore
-            f'Content-Length: {len(body)}\r\n\r\n'.encode() + body
-        )
+        if not segments: return await self.dispatch_body(body)
+
+        if self.capture: self.capture.outbound(body)
+        extra = ''
+        if self.compressor:
+            body, extra = self.compressor.compress(body)
+            extra += self.compressor.headers()
+
+        frame = [
+            f'Content-Length: {len(body)}\r\n{extra}'
+            f'Attachments: {len(segments)}\r\n\r\n'.encode(),
+            body
+        ]
+        for segment in segments:
+            frame.append(SEGMENT.pack(memoryview(segment).nbytes))
+            frame.append(segment)
+        self.sink.writelines(frame)
         await self.sink.drain()
 
     def close(self):
         self.source.feed_eof()
         self.sink.write_eof()
         self.sink.close()
+
+
+class LoopbackEntityStream(contracts.RpcEntityStream):
+    """
+    in process stream passing entities to its peer through a bounded queue
+    without serializing them. with [validate] every entity is round tripped
+    through the formatter (or deep copied without one), to catch payloads
+    a real transport could not carry or that are mutated after dispatch
+    """
+    def __init__(
+        self,
+        formatter: contracts.RpcEntitySerializer = None,
+        maxsize: int = 128,
+        validate: bool = False
+    ):
+        super().__init__(formatter)  # type: ignore
+        self.inbox: asyncio.Queue = asyncio.Queue(maxsize)
+        self.peer: typing.Optional['LoopbackEntityStream'] = None
+        self.validate = validate
+        self.closed = False
+        # resolved on close, only created once a producer has to wait
+        self._closing: typing.Optional[asyncio.Future] = None
+
+    @classmethod
+    def pair(
+        cls,
+        formatter: contracts.RpcEntitySerializer = None,
+        maxsize: int = 128,
+        validate: bool = False
+    ) -> typing.Tuple['LoopbackEntityStream', 'LoopbackEntityStream']:
+        a = cls(formatter, maxsize, validate)
+        b = cls(formatter, maxsize, validate)
+        a.peer, b.peer = b, a
+        return a, b
+
+    async def fetch_entity(self) -> typing.Optional[protocol.RpcEntity]:
+        if self.closed: return None
+        entity = await self.inbox.get()
+        logger.debug(f'fetched entity: {entity}')
+        return entity
+
+    async def dispatch_entity(self, entity: protocol.RpcEntity):
+        if self.closed or self.peer is None:
+            raise ConnectionResetError('loopback stream is closed')
+
+        logger.debug(f'dispatching entity: {entity}')
+        if self.validate:
+            if self.formatter: entity = self.formatter.bytes_to_entity(
+                self.formatter.entity_to_bytes(entity)
+            )
+            else: entity = copy.deepcopy(entity)
+        peer = self.peer
+        if not peer.inbox.full(): return peer.inbox.put_nowait(entity)
+
+        # the peer is not keeping up, wait for room or for either to close
+        if peer._closing is None:
+            peer._closing = asyncio.get_event_loop().create_future()
+        put = asyncio.ensure_future(peer.inbox.put(entity))
+        try: await asyncio.wait(
+            (put, peer._closing), return_when=asyncio.FIRST_COMPLETED
+        )
+        finally:
+            if not put.done(): put.cancel()
+        if self.closed or peer.closed:
+            raise ConnectionResetError('loopback stream is closed')
+
+    def _shutdown(self):
+        self.closed = True
+        if self._closing and not self._closing.done():
+            self._closing.set_result(None)
+        # drop whatever is pending, the sentinel wakes a waiting consumer
+        while not self.inbox.empty(): self.inbox.get_nowait()
+        self.inbox.put_nowait(None)
+
+    def close(self):
+        if self.closed: return
+        self._shutdown()
+        if self.peer and not self.peer.closed: self.peer._shutdown()
@@ -0,0 +1,199 @@
+from jsonrpc_stream import server
+
+import multiprocessing
+import threading
+import logging
+import asyncio
+import signal
+import socket
+import typing
+import time
+import os
+
+logger = logging.getLogger(__name__)
+
+Setup = typing.Callable[[server.JsonRpcServer], None]
+
+
+def reuseport_supported() -> bool:
+    return hasattr(socket, 'SO_REUSEPORT')
+
+
+def bind_socket(host: str, port: int, reuse_port: bool) -> socket.socket:
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    return sock
+
+
+def worker_main(
+    setup: Setup,
+    host: str,
+    port: int,
+    sock: typing.Optional[socket.socket],
+    conn: typing.Any,
+    metrics_interval: float,
+    server_kwargs: dict
+):
+    """
+    entrypoint of a worker process. binds its own SO_REUSEPORT socket
+    unless the parent handed it a shared listening socket
+    """
+    async def serve():
+        stop = asyncio.Event()
+        loop = asyncio.get_event_loop()
+        loop.add_signal_handler(signal.SIGTERM, stop.set)
+        loop.add_signal_handler(signal.SIGINT, stop.set)
+
+        s = server.JsonRpcServer(**server_kwargs)
+        setup(s)
+        listening = sock or bind_socket(host, port, reuse_port=True)
+        await s.start_tcp(sock=listening)
+        conn.send(('ready', os.getpid()))
+
+        while not stop.is_set():
+            try: await asyncio.wait_for(stop.wait(), metrics_interval)
+            except asyncio.TimeoutError: pass
+            conn.send(('metrics', s.metrics()))
+
+        await s.drain(timeout=metrics_interval)
+
+    asyncio.run(serve())
+
+
+class Worker:
+    def __init__(self, index: int):
+        self.index = index
+        self.process: typing.Any = None
+        self.conn: typing.Any = None
+        self.metrics: dict = {}
+        self.restarts = 0
+
+
+class WorkerLauncher:
+    """
+    runs [workers] processes each serving its own JsonRpcServer on the
+    same port. every worker calls [setup] on its server to attach the
+    dispatchers. with SO_REUSEPORT the kernel balances accepted
+    connections over the workers, otherwise they share one listening
+    socket bound by the launcher. crashed workers are restarted and
+    their metrics aggregated by a supervisor thread
+    """
+    def __init__(
+        self,
+        setup: Setup,
+        host: str = '127.0.0.1',
+        port: int = 0,
+        workers: int = None,
+        reuse_port: bool = None,
+        metrics_interval: float = 1.0,
+        restart: bool = True,
+        server_kwargs: dict = None
+    ):
+        self.setup = setup
+        self.host = host
+        self.workers = [Worker(i) for i in range(workers or os.cpu_count())]
+        self.reuse_port = (
+            reuseport_supported() if reuse_port is None else reuse_port
+        )
+        self.metrics_interval = metrics_interval
+        self.restart = restart
+        self.server_kwargs = server_kwargs or {}
+        self.context = multiprocessing.get_context('spawn')
+        self.stopping = threading.Event()
+
+        # with SO_REUSEPORT this socket never listens, it only reserves
+        # the port so that restarted workers can bind it again
+        self.socket = bind_socket(host, port, self.reuse_port)
+        if not self.reuse_port: self.socket.listen(socket.SOMAXCONN)
+        self.port = self.socket.getsockname()[1]
+
+    def _spawn(self, worker: Worker, timeout: float):
+        parent, child = self.context.Pipe(duplex=False)
+        worker.conn = parent
+        worker.metrics = {}
+        worker.process = self.context.Process(
+            target=worker_main,
+            args=(
+                self.setup, self.host, self.port,
+                None if self.reuse_port else self.socket,
+                child, self.metrics_interval, self.server_kwargs
+            ),
+            daemon=True
+        )
+        worker.process.start()
+        child.close()
+        try:
+            if not parent.poll(timeout): raise EOFError
+            parent.recv()
+        except EOFError:
+            raise RuntimeError(f'worker {worker.index} failed to start')
+
+    def start(self, timeout: float = 30) -> 'WorkerLauncher':
+        for worker in self.workers: self._spawn(worker, timeout)
+        self._supervisor = threading.Thread(target=self._supervise)
+        self._supervisor.daemon = True
+        self._supervisor.start()
+        return self
+
+    def _collect(self, worker: Worker):
+        try:
+            while worker.conn.poll():
+                kind, payload = worker.conn.recv()
+                if kind == 'metrics': worker.metrics = payload
+        except (EOFError, OSError): pass
+
+    def _supervise(self):
+        while not self.stopping.wait(self.metrics_interval / 2):
+            for worker in self.workers:
+                self._collect(worker)
+                if worker.process.is_alive() or self.stopping.is_set():
+                    continue
+
+                logger.warning(
+                    f'worker {worker.index} exited with '
+                    f'{worker.process.exitcode}'
+                )
+                if not self.restart: continue
+                worker.restarts += 1
+                try: self._spawn(worker, 30)
+                except RuntimeError as e:
+                    if not self.stopping.is_set(): logger.error(str(e))
+
+    def metrics(self) -> dict:
+        totals: typing.Dict[str, float] = {}
+        for worker in self.workers:
+            for key, value in worker.metrics.items():
+                if key == 'uptime': continue
+                totals[key] = totals.get(key, 0) + value
+
+        return {
+            'workers_alive': sum(
+                w.process.is_alive() for w in self.workers if w.process
+            ),
+            'worker_restarts': sum(w.restarts for w in self.workers),
+            'workers': [w.metrics for w in self.workers],
+            **totals
+        }
+
+    def stop(self, timeout: float = 5):
+        self.stopping.set()
+        for worker in self.workers:
+            if worker.process and worker.process.is_alive():
+                worker.process.terminate()
+        for worker in self.workers:
+            if not worker.process: continue
+            worker.process.join(timeout)
+            if worker.process.is_alive(): worker.process.kill()
+        self.socket.close()
+
+    def run(self):
+        """starts the workers and supervises them until interrupted"""
+        self.start()
+        try:
+            while True: time.sleep(3600)
+        except KeyboardInterrupt: pass
+        finally: self.stop()
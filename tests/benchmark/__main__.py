@@ -0,0 +1,45 @@
+from tests.benchmark import harness
+from tests.benchmark import cases  # noqa: F401 registers the cases
+
+import argparse
+import sys
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m tests.benchmark',
+        description='throughput and latency benchmarks of jsonrpc_stream'
+    )
+    parser.add_argument('-k', dest='pattern', default='',
+                        help='only run cases containing this substring')
+    parser.add_argument('-n', dest='iterations', type=int, default=10000)
+    parser.add_argument('--baseline', default=harness.BASELINE)
+    parser.add_argument('--save', action='store_true',
+                        help='store the results as the new baseline')
+    parser.add_argument('--check', action='store_true',
+                        help='exit non zero when a case regressed')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+
+    results = harness.run(args.pattern, args.iterations)
+    for r in results: print(r)
+
+    if args.save: harness.save_baseline(results, args.baseline)
+    if args.check:
+        baseline = harness.load_baseline(args.baseline)
+        if not baseline:
+            print(f'no baseline at {args.baseline}, store one with --save',
+                  file=sys.stderr)
+            return 2
+        # a case without a baseline would otherwise pass unchecked
+        found = [
+            f'{name}: no baseline'
+            for name in harness.missing(results, baseline)
+        ] + harness.regressions(results, baseline, args.tolerance)
+        for line in found: print(f'REGRESSION {line}', file=sys.stderr)
+        return 1 if found else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,156 @@
+from jsonrpc_stream.serializers import JsonSerializer
+from jsonrpc_stream.endpoint import JsonRpcEndpoint
+from jsonrpc_stream.streams import ContentLengthEntityStream
+from jsonrpc_stream.streams import LoopbackEntityStream
+from jsonrpc_stream import contracts
+from jsonrpc_stream import dispatcher
+from jsonrpc_stream import protocol as pro
+
+from tests.benchmark.harness import case, measure, measure_sync
+
+import asyncio
+import socket
+import typing
+
+PAYLOADS = {
+    'small': {'a': 1},
+    '1k':    {'items': ['x' * 10] * 80},
+    '64k':   {'items': [{'key': i, 'value': 'y' * 50} for i in range(1000)]},
+}
+
+
+class Echo:
+    @dispatcher.request
+    def echo(self, value: typing.Any = None): return value
+
+    @dispatcher.request
+    async def aecho(self, value: typing.Any = None): return value
+
+
+class NullStream(contracts.RpcEntityStream):
+    """swallows everything the endpoint dispatches"""
+    def __init__(self, formatter: contracts.RpcEntitySerializer = None):
+        super().__init__(formatter)
+
+    async def fetch_entity(self): return None
+    async def dispatch_entity(self, entity: pro.RpcEntity): pass
+    def close(self): pass
+
+
+def framed(serializer: JsonSerializer, entity: pro.RpcEntity) -> bytes:
+    body = serializer.entity_to_bytes(entity)
+    return f'Content-Length: {len(body)}\r\n\r\n'.encode() + body
+
+
+for size, payload in PAYLOADS.items():
+    def register(size=size, payload=payload):
+        request = pro.RpcRequest(1, 'Echo/echo', payload)
+
+        @case(f'serializer/entity_to_bytes/{size}')
+        async def to_bytes(name: str, n: int):
+            s = JsonSerializer()
+            return measure_sync(name, lambda: s.entity_to_bytes(request), n)
+
+        @case(f'serializer/prepared_to_bytes/{size}')
+        async def prepared_to_bytes(name: str, n: int):
+            s = JsonSerializer()
+            prepared = pro.PreparedRequest(
+                1, 'Echo/echo', payload, template=s.prepare('Echo/echo')
+            )
+            return measure_sync(name, lambda: s.entity_to_bytes(prepared), n)
+
+        @case(f'serializer/bytes_to_entity/{size}')
+        async def to_entity(name: str, n: int):
+            s = JsonSerializer()
+            data = s.entity_to_bytes(request)
+            return measure_sync(name, lambda: s.bytes_to_entity(data), n)
+    register()
+
+
+@case('stream/fetch_entity/pipelined')
+async def fetch_pipelined(name: str, n: int):
+    s = JsonSerializer()
+    reader = asyncio.StreamReader()
+    reader.feed_data(
+        framed(s, pro.RpcRequest(1, 'Echo/echo', PAYLOADS['small'])) * n
+    )
+    reader.feed_eof()
+    stream = ContentLengthEntityStream(s, reader, None)  # type: ignore
+    return await measure(name, stream.fetch_entity, n)
+
+
+# an api of 50 decorated methods, attached once per connection
+Wide = type('Wide', (), {
+    f'method{i}': dispatcher.request(f'method{i}')(lambda self, i=i: i)
+    for i in range(50)
+})
+
+
+@case('dispatcher/attach/50')
+async def attach_wide(name: str, n: int):
+    return measure_sync(
+        name,
+        lambda: dispatcher.DispatchNamespace(
+            Wide(), dispatcher.DiscoverMode.decorated
+        ),
+        n
+    )
+
+
+@case('endpoint/dispatch/sync')
+async def dispatch_sync(name: str, n: int):
+    e = JsonRpcEndpoint(NullStream()).attach_dispatcher(Echo())
+    request = pro.RpcRequest(1, 'Echo/echo', [1])
+    return await measure(name, lambda: e._handle_entity(request), n)
+
+
+@case('endpoint/dispatch/async')
+async def dispatch_async(name: str, n: int):
+    e = JsonRpcEndpoint(NullStream()).attach_dispatcher(Echo())
+    request = pro.RpcRequest(1, 'Echo/aecho', [1])
+    return await measure(name, lambda: e._handle_entity(request), n)
+
+
+@case('endpoint/dispatch/batch10')
+async def dispatch_batch(name: str, n: int):
+    e = JsonRpcEndpoint(NullStream()).attach_dispatcher(Echo())
+    batch = pro.RpcBatch([
+        pro.RpcRequest(i, 'Echo/echo', [i]) for i in range(10)
+    ])
+    return await measure(name, lambda: e._handle_entity(batch), n)
+
+
+async def socket_endpoints() -> typing.Tuple[JsonRpcEndpoint, JsonRpcEndpoint]:
+    a, b = socket.socketpair()
+    endpoints = []
+    for sock in (a, b):
+        reader, writer = await asyncio.open_connection(sock=sock)
+        endpoints.append(JsonRpcEndpoint(
+            ContentLengthEntityStream(JsonSerializer(), reader, writer)
+        ).start())
+    endpoints[0].attach_dispatcher(Echo())
+    return endpoints[0], endpoints[1]
+
+
+@case('roundtrip/socketpair/small')
+async def roundtrip(name: str, n: int):
+    server, client = await socket_endpoints()
+    try: return await measure(
+        name, lambda: client.call('Echo', 'echo', 1), n
+    )
+    finally:
+        client.close()
+        await server.join()
+
+
+@case('roundtrip/loopback/small')
+async def roundtrip_loopback(name: str, n: int):
+    a, b = LoopbackEntityStream.pair()
+    server = JsonRpcEndpoint(a).attach_dispatcher(Echo()).start()
+    client = JsonRpcEndpoint(b).start()
+    try: return await measure(
+        name, lambda: client.call('Echo', 'echo', 1), n
+    )
+    finally:
+        client.close()
+        await server.join()
@@ -0,0 +1,96 @@
+from jsonrpc_stream.serializers import JsonSerializer
+from jsonrpc_stream.server import JsonRpcServer
+from jsonrpc_stream.streams import ContentLengthEntityStream
+from jsonrpc_stream import protocol as pro
+
+from tests.benchmark.cases import Echo, framed
+
+import tracemalloc
+import argparse
+import asyncio
+import typing
+import sys
+import gc
+
+# bytes per connection the footprint test fails above
+THRESHOLD = {'idle': 5000, 'active': 5000}
+
+
+class NullWriter:
+    """StreamWriter stand in, keeps sockets out of the measurement"""
+    def write(self, data: bytes): pass
+    def writelines(self, data: typing.Iterable[bytes]): pass
+    async def drain(self): pass
+    def write_eof(self): pass
+    def close(self): pass
+
+
+def traced() -> int:
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+async def footprint(n: int) -> typing.Dict[str, float]:
+    """
+    serves [n] connections from one server and reports the traced bytes
+    per connection while idle and after each handled a request
+    """
+    server = JsonRpcServer().attach_dispatcher(Echo())
+    server.accepting = True
+    request = framed(JsonSerializer(), pro.RpcRequest(1, 'Echo/echo', 1))
+    readers = [asyncio.StreamReader() for _ in range(n)]
+
+    tracemalloc.start()
+    try:
+        before = traced()
+        tasks = [
+            asyncio.ensure_future(server.serve_stream(
+                ContentLengthEntityStream(server.formatter, r, NullWriter())
+            ))
+            for r in readers
+        ]
+        while len(server.endpoints) < n: await asyncio.sleep(0)
+        # let every endpoint reach its first read
+        for _ in range(5): await asyncio.sleep(0)
+        idle = traced()
+
+        for r in readers: r.feed_data(request)
+        while server.metrics()['entities_handled'] < n:
+            await asyncio.sleep(0)
+        active = traced()
+    finally: tracemalloc.stop()
+
+    for r in readers: r.feed_eof()
+    await asyncio.gather(*tasks)
+    return {
+        'connections': n,
+        'idle': (idle - before) / n,
+        'active': (active - before) / n
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m tests.benchmark.footprint',
+        description='memory footprint per served connection'
+    )
+    parser.add_argument('-n', dest='connections', type=int, default=10000)
+    parser.add_argument('--check', action='store_true',
+                        help='exit non zero above the threshold')
+    args = parser.parse_args()
+
+    result = asyncio.run(footprint(args.connections))
+    print(
+        f"{result['connections']} connections: "
+        f"{result['idle']:,.0f} bytes idle, "
+        f"{result['active']:,.0f} bytes active per connection"
+    )
+    over = [k for k, limit in THRESHOLD.items() if result[k] > limit]
+    for k in over:
+        print(f'REGRESSION {k} footprint above {THRESHOLD[k]} bytes',
+              file=sys.stderr)
+    return 1 if args.check and over else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
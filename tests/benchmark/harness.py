@@ -0,0 +1,122 @@
+from jsonrpc_stream.metrics import Histogram
+
+import asyncio
+import typing
+import time
+import json
+import os
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+cases: typing.Dict[str, typing.Callable] = {}
+
+
+def case(name: str) -> typing.Callable:
+    """registers an async benchmark taking the iteration count"""
+    def register(bench: typing.Callable) -> typing.Callable:
+        cases[name] = bench
+        return bench
+    return register
+
+
+class Result:
+    def __init__(self, name: str, elapsed: float, histogram: Histogram):
+        self.name = name
+        self.elapsed = elapsed
+        self.histogram = histogram
+
+    @property
+    def msgs_per_sec(self) -> float:
+        return self.histogram.count / self.elapsed if self.elapsed else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            'msgs_per_sec': self.msgs_per_sec,
+            'p50': self.histogram.percentile(50),
+            'p99': self.histogram.percentile(99),
+        }
+
+    def __str__(self) -> str:
+        return (
+            f'{self.name:<40} {self.msgs_per_sec:>12,.0f} msgs/s  '
+            f'p50 {self.histogram.percentile(50) * 1e6:>9.1f}us  '
+            f'p99 {self.histogram.percentile(99) * 1e6:>9.1f}us'
+        )
+
+
+def measure_sync(name: str, op: typing.Callable, n: int) -> Result:
+    hist = Histogram()
+    clock = time.perf_counter
+    start = clock()
+    for _ in range(n):
+        t = clock()
+        op()
+        hist.record(clock() - t)
+    return Result(name, clock() - start, hist)
+
+
+async def measure(name: str, op: typing.Callable, n: int) -> Result:
+    hist = Histogram()
+    clock = time.perf_counter
+    start = clock()
+    for _ in range(n):
+        t = clock()
+        await op()
+        hist.record(clock() - t)
+    return Result(name, clock() - start, hist)
+
+
+def run(
+    pattern: str = '', n: int = 10000
+) -> typing.List[Result]:
+    async def run_all():
+        results = []
+        for name, bench in cases.items():
+            if pattern not in name: continue
+            results.append(await bench(name, n))
+        return results
+
+    return asyncio.run(run_all())
+
+
+def load_baseline(path: str = BASELINE) -> typing.Dict[str, dict]:
+    try:
+        with open(path) as f: return json.load(f)
+    except FileNotFoundError: return {}
+
+
+def save_baseline(results: typing.List[Result], path: str = BASELINE):
+    baseline = load_baseline(path)
+    baseline.update({r.name: r.to_dict() for r in results})
+    with open(path, 'w') as f: json.dump(baseline, f, indent=2, sort_keys=True)
+
+
+def missing(
+    results: typing.List[Result], baseline: typing.Dict[str, dict]
+) -> typing.List[str]:
+    """names of the cases the baseline has nothing to compare with"""
+    return [r.name for r in results if r.name not in baseline]
+
+
+def regressions(
+    results: typing.List[Result],
+    baseline: typing.Dict[str, dict],
+    tolerance: float = 0.2
+) -> typing.List[str]:
+    found = []
+    for r in results:
+        try: base = baseline[r.name]
+        except KeyError: continue
+
+        current = r.to_dict()
+        if current['msgs_per_sec'] < base['msgs_per_sec'] * (1 - tolerance):
+            found.append(
+                f'{r.name}: throughput {current["msgs_per_sec"]:,.0f} < '
+                f'baseline {base["msgs_per_sec"]:,.0f} msgs/s'
+            )
+        if current['p99'] > base['p99'] * (1 + tolerance):
+            found.append(
+                f'{r.name}: p99 {current["p99"] * 1e6:.1f}us > '
+                f'baseline {base["p99"] * 1e6:.1f}us'
+            )
+    return found
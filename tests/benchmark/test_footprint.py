@@ -0,0 +1,10 @@
+from tests.benchmark import footprint
+
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_footprint_per_connection():
+    result = await footprint.footprint(10000)
+    for state, limit in footprint.THRESHOLD.items():
+        assert result[state] < limit, f'{state} footprint regressed'
@@ -0,0 +1,22 @@
+from tests.benchmark import harness
+from tests.benchmark import cases  # noqa: F401
+
+import pytest
+
+
+@pytest.mark.parametrize('name', list(harness.cases))
+def test_case_runs(name: str):
+    results = harness.run(name, 10)
+    assert results and all(r.histogram.count == 10 for r in results)
+
+
+def test_regression_detection():
+    results = harness.run('serializer/entity_to_bytes/small', 10)
+    baseline = {
+        r.name: {'msgs_per_sec': r.msgs_per_sec * 10, 'p99': 0.0}
+        for r in results
+    }
+    assert len(harness.regressions(results, baseline)) == 2
+    assert not harness.regressions(results, {})
+    assert harness.missing(results, {}) == [r.name for r in results]
+    assert not harness.missing(results, baseline)
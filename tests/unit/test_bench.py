@@ -0,0 +1,46 @@
+from jsonrpc_stream.server import JsonRpcServer
+from jsonrpc_stream import dispatcher
+from jsonrpc_stream import bench
+
+import asyncio
+import pytest
+
+
+class Kek:
+    @dispatcher.request
+    def yeet(self, a: int): return a * 2
+
+    @dispatcher.request
+    async def named(self, a: int, b: int): return a + b
+
+    @dispatcher.request
+    def broken(self): raise ValueError('kek')
+
+
+def test_call_parse():
+    assert bench.Call.parse('Kek/yeet') == ('Kek/yeet', None)
+    assert bench.Call.parse('Kek/yeet=[1]') == ('Kek/yeet', [1])
+    assert bench.Call.parse('Kek/named={"a": 1, "b": 2}') == \
+        ('Kek/named', {'a': 1, 'b': 2})
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('load', (['--concurrency', '4'], ['--rate', '500']))
+async def test_load_generator(load):
+    server = await JsonRpcServer().attach_dispatcher(Kek()).start_tcp(
+        '127.0.0.1'
+    )
+    host, port = server.sockets[0].getsockname()[:2]
+    args = bench.parser().parse_args([
+        '--tcp', f'{host}:{port}', '--connections', '2',
+        '--call', 'Kek/yeet=[1]', '--call', 'Kek/named={"a": 1, "b": 2}',
+        '--call', 'Kek/broken', '--duration', '0.2', *load
+    ])
+    report = await bench.run(args)
+    assert report['requests'] > 10
+    assert report['errors'] == report['methods']['Kek/broken']['count']
+    assert set(report['methods']) == {'Kek/yeet', 'Kek/named', 'Kek/broken'}
+    assert 'req/s' in bench.format_report(report)
+
+    server.close()
+    await asyncio.sleep(0)
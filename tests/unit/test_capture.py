@@ -0,0 +1,73 @@
+from jsonrpc_stream.capture import CaptureWriter, CaptureReader, replay
+from jsonrpc_stream.capture import INBOUND, OUTBOUND
+from jsonrpc_stream.endpoint import JsonRpcEndpoint
+from jsonrpc_stream.streams import ContentLengthEntityStream
+from jsonrpc_stream.serializers import JsonSerializer
+from jsonrpc_stream import dispatcher
+
+import asyncio
+import socket
+import typing
+import pytest
+
+
+class Kek:
+    @dispatcher.request
+    def yeet(self, a: int): return a * 2
+
+    @dispatcher.request
+    def broken(self): raise ValueError('kek')
+
+    @dispatcher.notification
+    def poke(self): pass
+
+
+async def pair(capture: CaptureWriter = None) -> typing.Tuple[
+    ContentLengthEntityStream, ContentLengthEntityStream
+]:
+    streams = []
+    for sock, c in zip(socket.socketpair(), (capture, None)):
+        reader, writer = await asyncio.open_connection(sock=sock)
+        streams.append(ContentLengthEntityStream(
+            JsonSerializer(), reader, writer, capture=c
+        ))
+    return streams[0], streams[1]
+
+
+def test_reader_skips_truncated_tail(tmp_path):
+    path = str(tmp_path / 'kek.cap')
+    writer = CaptureWriter(path)
+    writer.inbound(b'{"a": 1}')
+    writer.outbound(b'{"b": 2}')
+    writer.close()
+    with open(path, 'ab') as f: f.write(b'\x00' * 5)
+
+    reader = CaptureReader(path)
+    records = [(r.direction, bytes(r.body)) for r in reader]
+    assert records == [(INBOUND, b'{"a": 1}'), (OUTBOUND, b'{"b": 2}')]
+    reader.close()
+
+
+@pytest.mark.asyncio
+async def test_capture_and_replay(tmp_path):
+    path = str(tmp_path / 'kek.cap')
+    capture = CaptureWriter(path)
+    near, far = await pair(capture)
+    server = JsonRpcEndpoint(near).attach_dispatcher(Kek()).start()
+    client = JsonRpcEndpoint(far).start()
+    for i in range(10): assert await client.call('Kek', 'yeet', i) == i * 2
+    await client.notify('Kek', 'poke')
+    with pytest.raises(Exception): await client.call('Kek', 'broken')
+    client.close()
+    await server.join()
+    capture.close()
+    assert capture.records == 23
+
+    near, far = await pair()
+    server = JsonRpcEndpoint(near).attach_dispatcher(Kek()).start()
+    report = await replay(path, far, speed=0, timeout=5)
+    assert report['sent'] == 12
+    assert report['completed'] == 11 and report['errors'] == 1
+    assert report['methods']['Kek/yeet']['count'] == 10
+    far.close()
+    await server.join()
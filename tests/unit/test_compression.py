@@ -0,0 +1,85 @@
+from jsonrpc_stream.streams import ContentLengthEntityStream
+from jsonrpc_stream.serializers import JsonSerializer
+from jsonrpc_stream.compression import ZlibCodec, FrameCompressor
+from jsonrpc_stream import protocol as pro
+
+import asyncio
+import socket
+import pytest
+
+BIG = pro.RpcNotification('yeet', ['kektop' * 1000])
+SMALL = pro.RpcNotification('yeet', ['kek'])
+
+
+async def stream_pair(a_codecs, b_codecs):
+    streams = []
+    for sock, codecs in zip(socket.socketpair(), (a_codecs, b_codecs)):
+        reader, writer = await asyncio.open_connection(sock=sock)
+        streams.append(ContentLengthEntityStream(
+            JsonSerializer(), reader, writer, codecs=codecs
+        ))
+    return streams
+
+
+@pytest.mark.asyncio
+async def test_negotiated_compression():
+    a, b = await stream_pair([ZlibCodec()], [ZlibCodec()])
+
+    # nobody heard from the peer yet, nothing gets compressed
+    await a.dispatch_entity(BIG)
+    assert await b.fetch_entity() == BIG
+    assert a.compressor.stats.frames_compressed == 0
+
+    await b.dispatch_entity(BIG)
+    assert await a.fetch_entity() == BIG
+    assert b.compressor.stats.frames_compressed == 1
+    assert a.compressor.stats.frames_decompressed == 1
+
+    await a.dispatch_entity(BIG)
+    await a.dispatch_entity(SMALL)
+    assert await b.fetch_entity() == BIG
+    assert await b.fetch_entity() == SMALL
+    stats = a.compressor.stats.to_dict()
+    assert stats['frames_compressed'] == 1
+    assert stats['ratio'] < 0.1
+    a.close()
+    b.close()
+
+
+@pytest.mark.asyncio
+async def test_uncompressed_peer():
+    a, b = await stream_pair([ZlibCodec()], ())
+    await a.dispatch_entity(SMALL)
+    assert await b.fetch_entity() == SMALL
+    await b.dispatch_entity(BIG)
+    assert await a.fetch_entity() == BIG
+    await a.dispatch_entity(BIG)
+    assert await b.fetch_entity() == BIG
+    assert a.compressor.stats.frames_compressed == 0
+    a.close()
+    b.close()
+
+
+def test_unknown_codec_not_selected():
+    c = FrameCompressor([ZlibCodec()], min_size=0)
+    c.negotiate('br, zstd')
+    assert c.selected is None
+    c.negotiate('br, deflate')
+    assert c.compress(b'x' * 100)[1] == 'Content-Encoding: deflate\r\n'
+
+
+def test_decompress_limit():
+    codec = ZlibCodec()
+    bomb = codec.compress(b'\0' * 100000)
+    assert len(codec.decompress(bomb)) == 100000
+    with pytest.raises(ValueError):
+        codec.decompress(bomb, max_size=1000)
+
+
+def test_decompress_truncated():
+    codec = ZlibCodec()
+    body = codec.compress(b'{"jsonrpc": "2.0", "method": "kek"}' * 10)
+    with pytest.raises(ValueError, match='truncated'):
+        codec.decompress(body[:-4])
+    with pytest.raises(ValueError, match='truncated'):
+        codec.decompress(body[:len(body) // 2])
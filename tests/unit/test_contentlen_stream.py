@@ -3,16 +3,19 @@ from jsonrpc_stream.streams   import ContentLengthEntityStream
 from jsonrpc_stream.contracts import RpcEntityStream
 from jsonrpc_stream import protocol
 from jsonrpc_stream.serializers import JsonSerializer
+from jsonrpc_stream.exceptions import JsonRpcInvalidRequest
 
 import json
+import typing
 import asyncio
 import pytest
 
 
 class MockReader(asyncio.StreamReader):
-    def __init__(self, string: str):
+    def __init__(self, string: typing.Union[str, bytes]):
         super().__init__()
-        self.feed_data(string.encode())
+        if isinstance(string, str): string = string.encode()
+        self.feed_data(string)
         self.feed_eof()
 
 
@@ -23,14 +26,19 @@ class MockWriter:
     def write(self, data: bytes):
         self.buffer += data
 
+    def writelines(self, data: list):
+        for x in data: self.buffer += x
+
     async def drain(self): pass
     def close(self): pass
     def write_enf(self): pass
 
 
-def create_stream(source: str, sink: MockWriter) -> RpcEntityStream:
+def create_stream(
+    source: typing.Union[str, bytes], sink: MockWriter, **kwargs
+) -> RpcEntityStream:
     return ContentLengthEntityStream(
-        JsonSerializer('utf-8'), MockReader(source), sink
+        JsonSerializer('utf-8'), MockReader(source), sink, **kwargs
     )
 
 
@@ -135,3 +143,83 @@ async def test_fetch_invalid_contentlen():
     s = create_stream(request, MockWriter())
 
     assert await s.fetch_entity() is None
+
+
+@pytest.mark.asyncio
+async def test_dispatch_attachments():
+    blob = bytes(range(256)) * 4
+    expectation = protocol.RpcRequest(
+        0, 'yeet', {'blob': blob, 'nested': [1, bytearray(b'kek')]}
+    )
+    buffer = MockWriter()
+    await create_stream('', buffer, attachments=True).dispatch_entity(
+        expectation
+    )
+    assert b'Attachments: 2\r\n' in buffer.buffer
+    assert b'base64' not in buffer.buffer
+
+    # followed by another frame to make sure the stream stays in sync
+    await create_stream('', buffer).dispatch_entity(
+        protocol.RpcNotification('kek', None)
+    )
+    fetch_stream = create_stream(buffer.buffer, MockWriter())
+
+    reality = await fetch_stream.fetch_entity()
+    assert reality.params['blob'] == blob
+    assert reality.params['nested'] == [1, b'kek']
+    assert expectation.params['blob'] is blob
+    assert await fetch_stream.fetch_entity() == \
+        protocol.RpcNotification('kek', None)
+
+
+@pytest.mark.asyncio
+async def test_dispatch_without_binaries_has_no_attachments():
+    buffer = MockWriter()
+    await create_stream('', buffer, attachments=True).dispatch_entity(
+        protocol.RpcResult(0, {'a': [1, 2]})
+    )
+    assert b'Attachments' not in buffer.buffer
+
+
+def frame(entity: dict) -> str:
+    raw = json.dumps(entity)
+    return f'Content-Length: {len(raw)}\r\n\r\n{raw}'
+
+
+@pytest.mark.asyncio
+async def test_fetch_oversized_stays_in_sync():
+    big = {"jsonrpc": "2.0", "method": "yeet", "params": ['x' * 500]}
+    small = {"jsonrpc": "2.0", "method": "kek"}
+    s = create_stream(
+        frame(big) + frame(small), MockWriter(),
+        max_frame_size=100, chunk_size=16
+    )
+
+    rejected = await s.fetch_entity()
+    assert isinstance(rejected, protocol.RpcMalformed)
+    assert isinstance(rejected.exception, JsonRpcInvalidRequest)
+    assert (await s.fetch_entity()).to_dict() == small
+
+
+@pytest.mark.asyncio
+async def test_fetch_oversized_attachments():
+    buffer = MockWriter()
+    await create_stream('', buffer, attachments=True).dispatch_entity(
+        protocol.RpcNotification('yeet', [b'x' * 200])
+    )
+    small = {"jsonrpc": "2.0", "method": "kek"}
+    s = create_stream(
+        buffer.buffer + frame(small).encode(), MockWriter(),
+        max_frame_size=100
+    )
+    assert isinstance(await s.fetch_entity(), protocol.RpcMalformed)
+    assert (await s.fetch_entity()).to_dict() == small
+
+
+@pytest.mark.asyncio
+async def test_fetch_chunked_body():
+    expectation = {"jsonrpc": "2.0", "method": "yeet", "params": ['x' * 500]}
+    s = create_stream(frame(expectation) * 2, MockWriter(), chunk_size=7)
+    for _ in range(2):
+        assert expectation == (await s.fetch_entity()).to_dict()
+    assert await s.fetch_entity() is None
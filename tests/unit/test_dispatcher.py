@@ -129,3 +129,89 @@ async def test_proxy_all():
     assert await k.kektop()          == 'yee/kektop/()/{}'
 
     assert await k._topkek() == 'yee/_topkek/()/{}'
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_multiple_sync():
+    class Kek:
+        @di.request
+        def top(self): return 'top'
+
+        @di.request
+        def kek(self): return 'kek'
+
+    n = di.DispatchNamespace(Kek(), di.DiscoverMode.decorated)
+    assert await n.call('top') == 'top'
+    assert await n.call('kek') == 'kek'
+
+
+@pytest.mark.asyncio
+async def test_dispatch_table_cached_per_class(monkeypatch):
+    class Kek:
+        def __init__(self, n: int):
+            self.n = n
+            if n: self.extra = lambda: 'extra'
+
+        @di.request
+        def top(self): return self.n
+
+        @di.notification
+        async def poke(self): self.n += 1
+
+    scans = []
+    getmembers = di.inspect.getmembers
+    monkeypatch.setattr(
+        di.inspect, 'getmembers',
+        lambda *a, **kw: scans.append(a) or getmembers(*a, **kw)
+    )
+    a = di.DispatchNamespace(Kek(0), di.DiscoverMode.decorated)
+    b = di.DispatchNamespace(Kek(1), di.DiscoverMode.decorated)
+    assert len(scans) == 1 and a.table is b.table
+    assert await a.call('top') == 0 and await b.call('top') == 1
+    await b.notify('poke')
+    assert await b.call('top') == 2
+
+    c = di.DispatchNamespace(Kek(2), di.DiscoverMode.public)
+    assert await c.call('extra') == 'extra'
+    assert {'top', 'poke', 'extra'} <= set(c.targets)
+    with pytest.raises(exceptions.JsonRpcMethodNotFound):
+        await di.DispatchNamespace(
+            Kek(0), di.DiscoverMode.public
+        ).call('extra')
+
+
+@pytest.mark.asyncio
+async def test_instance_overrides_stay_with_their_instance():
+    class Svc:
+        def __init__(self, override: bool = False):
+            if override: self.status = lambda: 'overridden'
+
+        @di.request
+        def status(self): return 'ok'
+
+    first = di.DispatchNamespace(Svc(override=True), di.DiscoverMode.public)
+    second = di.DispatchNamespace(Svc(), di.DiscoverMode.public)
+    assert await first.call('status') == 'overridden'
+    assert await second.call('status') == 'ok'
+    assert first.table is not second.table
+
+    decorated = di.DispatchNamespace(Svc(), di.DiscoverMode.decorated)
+    assert await decorated.call('status') == 'ok'
+
+
+@pytest.mark.asyncio
+async def test_proxy_wrappers_shared():
+    class Kek:
+        @di.request
+        async def top(self, a): pass
+
+    async def callback(namespace, name, *args, **kwargs):
+        return f'{namespace}/{name}/{args}'
+
+    a, b = Kek(), Kek()
+    di.ProxyNamespace('a', a, di.DiscoverMode.decorated, callback, callback)
+    di.ProxyNamespace('b', b, di.DiscoverMode.decorated, callback, callback)
+    assert await a.top(1) == 'a/top/(1,)'
+    assert await b.top(2) == 'b/top/(2,)'
+    assert a.top.__func__ is b.top.__func__
+    assert a.top.__name__ == 'top'
@@ -0,0 +1,142 @@
+from jsonrpc_stream.encoders import EncoderRegistry, registry
+from jsonrpc_stream.serializers import JsonSerializer
+from jsonrpc_stream import protocol as pro
+
+import collections
+import dataclasses
+import datetime
+import typing
+import json
+import enum
+
+
+@dataclasses.dataclass
+class Point:
+    x: int
+    y: int
+
+
+class Pair(typing.NamedTuple):
+    left: int
+    right: int
+
+
+class Color(enum.Enum):
+    red = 'red'
+
+
+class Slotted:
+    __slots__ = ('name', '_secret', 'unset')
+
+    def __init__(self):
+        self.name = 'kek'
+        self._secret = 'top'
+
+
+class Single:
+    __slots__ = 'name'
+
+    def __init__(self): self.name = 'kek'
+
+
+@dataclasses.dataclass
+class Hidden:
+    name: str
+    _secret: str
+
+
+class Plain:
+    def __init__(self):
+        self.name = 'kek'
+        self._secret = 'top'
+
+
+def test_builtin_encoders():
+    assert registry.encode(Point(1, 2)) == {'x': 1, 'y': 2}
+    assert registry.encode(Pair(1, 2)) == {'left': 1, 'right': 2}
+    assert registry.encode(Color.red) == 'red'
+    assert registry.encode(datetime.date(2020, 1, 2)) == '2020-01-02'
+    assert registry.default(b'\x00\x01') == 'AAE='
+
+
+def test_private_attributes_are_skipped():
+    assert registry.encode(Slotted()) == {'name': 'kek'}
+    assert registry.encode(Plain()) == {'name': 'kek'}
+    assert registry.encode(Single()) == {'name': 'kek'}
+    assert registry.encode(Hidden('kek', 'top')) == {'name': 'kek'}
+
+
+def test_native_values_pass_through():
+    for value in ('kek', 1, 1.5, None, [1], {'a': 1}, b'kek'):
+        assert registry.encode(value) is value
+
+
+def test_registered_encoder_applies_to_subclasses():
+    r = EncoderRegistry()
+    assert r.encode(Point(1, 2)) == {'x': 1, 'y': 2}
+    r.register(Point, lambda p: [p.x, p.y])
+
+    @r.register(Plain)
+    def encode(p): return p.name
+
+    class Child(Plain): pass
+    assert r.encode(Child()) == 'kek'
+    assert r.encode(Point(1, 2)) == [1, 2]
+
+
+def test_serializer_encodes_nested_values():
+    s = JsonSerializer()
+    body = s.entity_to_bytes(pro.RpcResult(0, {
+        'when': datetime.datetime(2020, 1, 2, 3, 4, 5),
+        'points': [Point(1, 2)],
+        'color': Color.red
+    }))
+    assert json.loads(body)['result'] == {
+        'when': '2020-01-02T03:04:05',
+        'points': [{'x': 1, 'y': 2}],
+        'color': 'red'
+    }
+
+
+def test_nested_values_encode_like_top_level():
+    class Level(int, enum.Enum):
+        high = 2
+
+    nested = {'pairs': [Pair(1, 2), (Pair(3, 4),)], 'level': Level.high}
+    assert registry.encode(Pair(1, 2)) == {'left': 1, 'right': 2}
+    assert registry.encode(nested) == {
+        'pairs': [{'left': 1, 'right': 2}, [{'left': 3, 'right': 4}]],
+        'level': 2
+    }
+    assert type(registry.encode(nested)['level']) is int
+    assert nested['pairs'][0] == Pair(1, 2)
+
+    unchanged = {'a': [1, (2, 3)], 'b': 'kek'}
+    assert registry.encode(unchanged) is unchanged
+
+
+def test_container_subclasses_keep_their_items():
+    class Rows(list):
+        pass
+
+    counts = collections.Counter('aab')
+    nested = {
+        'ordered': collections.OrderedDict(a=Point(1, 2)),
+        'counts': counts,
+        'groups': collections.defaultdict(list, x=[Pair(1, 2)]),
+        'rows': Rows([Pair(3, 4), 5])
+    }
+    encoded = registry.encode(nested)
+    assert encoded == {
+        'ordered': {'a': Point(1, 2)},
+        'counts': {'a': 2, 'b': 1},
+        'groups': {'x': [{'left': 1, 'right': 2}]},
+        'rows': [{'left': 3, 'right': 4}, 5]
+    }
+    assert encoded['counts'] is counts
+    assert json.loads(JsonSerializer().dumps(encoded)) == {
+        'ordered': {'a': {'x': 1, 'y': 2}},
+        'counts': {'a': 2, 'b': 1},
+        'groups': {'x': [{'left': 1, 'right': 2}]},
+        'rows': [{'left': 3, 'right': 4}, 5]
+    }
@@ -1,7 +1,11 @@
 from jsonrpc_stream.endpoint import JsonRpcEndpoint
+from jsonrpc_stream.streams import LoopbackEntityStream
+from jsonrpc_stream.exceptions import JsonRpcException
+from jsonrpc_stream.serializers import JsonSerializer
 from jsonrpc_stream import dispatcher
 from jsonrpc_stream import protocol as pro
 
+import asyncio
 import pytest
 
 
@@ -29,3 +33,133 @@ async def test_handle_request_params():
         pro.RpcRequest(0, 'Yeet/yeet', ['salad'])
     )
     assert r == pro.RpcResult(id=0, result='salad', jsonrpc='2.0')
+
+
+@pytest.mark.asyncio
+async def test_stream_result():
+    class Kek:
+        @dispatcher.request
+        async def count(self, n: int):
+            for i in range(n): yield {'i': i}
+
+        @dispatcher.request
+        async def broken(self):
+            yield 1
+            raise ValueError('yeet')
+
+    class Proxy:
+        @dispatcher.request
+        async def count(self, n: int): yield
+
+    a, b = LoopbackEntityStream.pair()
+    server = JsonRpcEndpoint(a).attach_dispatcher(Kek()).start()
+    client = JsonRpcEndpoint(b).start()
+
+    chunks = [c async for c in client.call_stream('Kek', 'count', 3)]
+    assert chunks == [{'i': 0}, {'i': 1}, {'i': 2}]
+    assert await client.call('Kek', 'count', 2) is None
+
+    proxy = Proxy()
+    client.attach_proxy(proxy, 'Kek')
+    assert [c async for c in proxy.count(2)] == [{'i': 0}, {'i': 1}]
+
+    received = []
+    with pytest.raises(JsonRpcException):
+        async for c in client.call_stream('Kek', 'broken'):
+            received.append(c)
+    assert received == [1]
+    assert not client._streams
+
+    client.close()
+    await server.join()
+
+
+@pytest.mark.asyncio
+async def test_stream_result_buffer_bounded():
+    class Kek:
+        @dispatcher.request
+        async def count(self, n: int):
+            for i in range(n): yield i
+
+    class Small(JsonRpcEndpoint):
+        max_buffered_chunks = 4
+
+    a, b = LoopbackEntityStream.pair()
+    server = JsonRpcEndpoint(a).attach_dispatcher(Kek()).start()
+    client = Small(b).start()
+
+    received = []
+    with pytest.raises(BufferError):
+        async for c in client.call_stream('Kek', 'count', 100):
+            received.append(c)
+            # a slow consumer lets the chunks pile up
+            await asyncio.sleep(0.01)
+    assert len(received) < 100 and not client._streams
+    assert [c async for c in client.call_stream('Kek', 'count', 3)] == [
+        0, 1, 2
+    ]
+
+    client.close()
+    await server.join()
+
+
+@pytest.mark.asyncio
+async def test_prepared_proxy_requests():
+    class Kek:
+        @dispatcher.request
+        async def add(self, a: int, b: int): return a + b
+
+        @dispatcher.request
+        async def nothing(self): return 'kektop'
+
+    class Proxy:
+        @dispatcher.request
+        async def add(self, a: int, b: int): pass
+
+        @dispatcher.request
+        async def nothing(self): pass
+
+    # validating round trips every request through the serializer
+    a, b = LoopbackEntityStream.pair(JsonSerializer(), validate=True)
+    sent = []
+    dispatch = b.dispatch_entity
+    async def record(entity):
+        sent.append(entity)
+        await dispatch(entity)
+    b.dispatch_entity = record
+
+    server = JsonRpcEndpoint(a).attach_dispatcher(Kek()).start()
+    client = JsonRpcEndpoint(b).start()
+    proxy = Proxy()
+    client.attach_proxy(proxy, 'Kek')
+
+    assert await proxy.add(1, 2) == 3
+    assert await proxy.add(a=2, b=3) == 5
+    assert await proxy.nothing() == 'kektop'
+    assert all(type(e) is pro.PreparedRequest for e in sent)
+
+    client.close()
+    await server.join()
+
+
+@pytest.mark.asyncio
+async def test_call_paths_validate_alike():
+    a, b = LoopbackEntityStream.pair()
+    e = JsonRpcEndpoint(b)
+    prepared = e.prepare('Kek', 'yeet')
+    calls = (
+        lambda *a, **kw: e.call('Kek', 'yeet', *a, **kw),
+        lambda *a, **kw: e.notify('Kek', 'yeet', *a, **kw),
+        lambda *a, **kw: e.call_stream('Kek', 'yeet', *a, **kw).__anext__(),
+        prepared
+    )
+    for call in calls:
+        with pytest.raises(RuntimeError): await call(1)
+
+    e.start()
+    for call in calls:
+        with pytest.raises(ValueError): await call(1, a=2)
+    e.close()
+    await e.join()
+    for call in calls:
+        with pytest.raises(ConnectionResetError): await call(1)
@@ -0,0 +1,67 @@
+from jsonrpc_stream import exceptions
+
+import subprocess
+import pytest
+import sys
+import os
+
+
+@pytest.fixture
+def mode():
+    previous = exceptions.traceback_mode, exceptions.traceback_limit
+    yield exceptions.set_traceback_mode
+    exceptions.set_traceback_mode(*previous)
+
+
+def fail0(): raise KeyError('kek')
+def fail1(): fail0()
+def fail2(): fail1()
+def fail3(): fail2()
+def fail4(): fail3()
+
+
+def caught() -> Exception:
+    try: fail4()
+    except KeyError as e: return e
+    raise AssertionError
+
+
+def test_full_traceback(mode):
+    mode(exceptions.TracebackMode.full)
+    e = exceptions.JsonRpcInternalError.from_ex(caught())
+    assert e.data.count('in fail') == 5
+    assert e.cause is None
+
+
+def test_truncated_traceback(mode):
+    mode(exceptions.TracebackMode.truncated, 3)
+    e = exceptions.JsonRpcInternalError.from_ex(caught())
+    assert e.to_error().data.count('in fail') == 3
+    assert 'KeyError' in e.data
+
+
+def test_no_traceback(mode):
+    mode(exceptions.TracebackMode.off)
+    e = exceptions.JsonRpcInternalError.from_ex(caught())
+    assert e.cause is None
+    assert e.to_error().data is None
+    assert e.message == "'kek'"
+
+
+def test_default_message():
+    assert exceptions.JsonRpcInvalidRequest().message == 'invalid request!'
+
+
+def test_unknown_env_mode_falls_back():
+    env = dict(
+        os.environ, JSONRPC_STREAM_TRACEBACK='fulll',
+        JSONRPC_STREAM_TRACEBACK_LIMIT='many'
+    )
+    out = subprocess.run(
+        [sys.executable, '-c',
+         'from jsonrpc_stream import exceptions as e; '
+         'print(e.traceback_mode.name, e.traceback_limit)'],
+        env=env, capture_output=True, text=True, check=True
+    )
+    assert out.stdout.split() == ['full', '5']
+    assert 'JSONRPC_STREAM_TRACEBACK' in out.stderr
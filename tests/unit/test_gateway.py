@@ -0,0 +1,143 @@
+from jsonrpc_stream.gateway import JsonRpcGateway, peek, splice
+from jsonrpc_stream.endpoint import JsonRpcEndpoint
+from jsonrpc_stream.streams import ContentLengthEntityStream
+from jsonrpc_stream.serializers import JsonSerializer
+from jsonrpc_stream.exceptions import JsonRpcMethodNotFound
+from jsonrpc_stream.exceptions import JsonRpcException
+from jsonrpc_stream import protocol as pro
+from jsonrpc_stream import dispatcher
+
+import asyncio
+import socket
+import typing
+import pytest
+
+
+class Kek:
+    @dispatcher.request
+    async def slow(self, value: typing.Any):
+        await asyncio.sleep(0.01)
+        return value
+
+
+class Top:
+    @dispatcher.request
+    def yeet(self, a: int): return a * 2
+
+
+def test_peek():
+    body = b'{"params": {"id": [1, "]}"], "m": "\\"{"}, "id": "x\\\\",' + \
+        b' "method": "Kek/slow", "jsonrpc": "2.0"}'
+    method, span = peek(body)
+    assert method == 'Kek/slow'
+    assert body[span[0]:span[1]] == b'"x\\\\"'
+    assert splice(body, span, b'7')[span[0]:span[0] + 3] == b'7, '
+
+    assert peek(b'{"method": "a", "id": null}') == ('a', None)
+    assert peek(b' {} ') == (None, None)
+    for malformed in (b'[{"method": "a"}]', b'{"method": "a"', b'"a"'):
+        with pytest.raises(ValueError): peek(malformed)
+
+
+async def pair() -> typing.Tuple[
+    ContentLengthEntityStream, ContentLengthEntityStream
+]:
+    streams = []
+    for sock in socket.socketpair():
+        reader, writer = await asyncio.open_connection(sock=sock)
+        streams.append(
+            ContentLengthEntityStream(JsonSerializer(), reader, writer)
+        )
+    return streams[0], streams[1]
+
+
+@pytest.mark.asyncio
+async def test_gateway_routes_by_namespace():
+    kek, top = Kek(), Top()
+    gateway = JsonRpcGateway()
+    upstreams = []
+    for namespace, target, limit in (('Kek', kek, 2), ('Top', top, 0)):
+        near, far = await pair()
+        upstreams.append(
+            JsonRpcEndpoint(far).attach_dispatcher(target).start()
+        )
+        gateway.add_route(namespace, near, limit)
+
+    route = gateway.routes['Kek']
+    peak = 0
+    forward = route.stream.dispatch_body
+    async def record(body):
+        nonlocal peak
+        peak = max(peak, len(route.pending))
+        await forward(body)
+    route.stream.dispatch_body = record
+
+    clients, served = [], []
+    for _ in range(2):
+        near, far = await pair()
+        # the loop only keeps weak references to tasks
+        served.append(asyncio.ensure_future(gateway.serve(near)))
+        clients.append(JsonRpcEndpoint(far).start())
+
+    results = await asyncio.gather(*(
+        c.call('Kek', 'slow', i) for i in range(5) for c in clients
+    ))
+    assert sorted(results) == sorted(list(range(5)) * 2)
+    assert peak == 2 and not route.pending
+    assert await clients[0].call('Top', 'yeet', 21) == 42
+    with pytest.raises(JsonRpcMethodNotFound):
+        await clients[1].call('Nope', 'yeet', 1)
+
+    for c in clients: c.close()
+    gateway.close()
+    for u in upstreams: await u.join()
+
+
+@pytest.mark.asyncio
+async def test_gateway_rejects_non_string_method():
+    gateway = JsonRpcGateway()
+    near, far = await pair()
+    served = asyncio.ensure_future(gateway.serve(near))
+
+    await far.dispatch_body(b'{"jsonrpc": "2.0", "method": 5, "id": 1}')
+    error = await far.fetch_entity()
+    assert isinstance(error, pro.RpcError) and error.id == 1
+    assert error.error.code == -32600
+
+    # the client is still served afterwards
+    await far.dispatch_body(b'{"jsonrpc": "2.0", "method": "a", "id": 2}')
+    error = await far.fetch_entity()
+    assert error.id == 2 and error.error.code == -32601
+    far.close()
+    await served
+    gateway.close()
+
+
+@pytest.mark.asyncio
+async def test_gateway_closed_upstream():
+    gateway = JsonRpcGateway()
+    upstreams = []
+    for namespace, target in (('Kek', Kek()), ('Top', Top())):
+        near, far = await pair()
+        upstreams.append(
+            JsonRpcEndpoint(far).attach_dispatcher(target).start()
+        )
+        gateway.add_route(namespace, near, 1)
+
+    near, far = await pair()
+    served = asyncio.ensure_future(gateway.serve(near))
+    client = JsonRpcEndpoint(far).start()
+    assert await client.call('Kek', 'slow', 1) == 1
+
+    upstreams[0].close()
+    await upstreams[0].join()
+    for _ in range(3):
+        with pytest.raises(JsonRpcException) as e:
+            await asyncio.wait_for(client.call('Kek', 'slow', 1), 1)
+        assert e.value.message == 'upstream closed'
+    assert await client.call('Top', 'yeet', 21) == 42
+    assert not served.done()
+
+    client.close()
+    gateway.close()
+    await upstreams[1].join()
@@ -0,0 +1,122 @@
+from jsonrpc_stream.pool import JsonRpcPool, Balancing, tcp_connector
+from jsonrpc_stream.server import JsonRpcServer
+from jsonrpc_stream.hedging import HedgePolicy
+from jsonrpc_stream import dispatcher
+
+import asyncio
+import pytest
+
+
+class Replica:
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.started = 0
+
+    @dispatcher.request
+    async def read(self, a: int):
+        self.started += 1
+        await asyncio.sleep(self.delay)
+        return a
+
+
+def test_policy_delay():
+    policy = HedgePolicy(['Kek/read'], {'Kek/fixed': 0.5}, min_samples=10)
+    assert 'Kek/read' in policy and 'Kek/fixed' in policy
+    assert 'Kek/write' not in policy
+    assert policy.delay('Kek/fixed') == 0.5
+
+    for _ in range(9): policy.record('Kek/read', 0.01)
+    assert policy.delay('Kek/read') is None
+    for _ in range(91): policy.record('Kek/read', 0.01)
+    for _ in range(4): policy.record('Kek/read', 1.0)
+    assert policy.delay('Kek/read') == pytest.approx(0.01, rel=0.05)
+
+
+@pytest.mark.asyncio
+async def test_policy_hedges_within_budget():
+    policy = HedgePolicy(['m'], {'m': 0}, budget=0.5, burst=1)
+    calls = []
+
+    def attempt(name: str, delay: float):
+        async def send():
+            calls.append(name)
+            await asyncio.sleep(delay)
+            return name
+        return send
+
+    assert await policy.run(
+        'm', attempt('slow', 1), attempt('hedge', 0)
+    ) == 'hedge'
+    # the budget earns half a hedge per call
+    assert await policy.run(
+        'm', attempt('slow', 0.01), attempt('hedge', 0)
+    ) == 'slow'
+    assert await policy.run(
+        'm', attempt('slow', 1), attempt('hedge', 0)
+    ) == 'hedge'
+    assert calls == ['slow', 'hedge', 'slow', 'slow', 'hedge']
+    assert (policy.calls, policy.hedged, policy.won) == (3, 2, 2)
+
+
+@pytest.mark.asyncio
+async def test_policy_survives_failed_replica():
+    policy = HedgePolicy(['m'], {'m': 0})
+
+    async def gone(): raise ConnectionResetError('gone')
+
+    async def slow():
+        await asyncio.sleep(0.01)
+        return 'slow'
+
+    assert await policy.run('m', slow, gone) == 'slow'
+    with pytest.raises(ConnectionResetError):
+        await HedgePolicy(['m']).run('m', gone, slow)
+
+
+@pytest.mark.asyncio
+async def test_policy_records_primary_latency():
+    policy = HedgePolicy(['m'], {'m': 0.02})
+
+    async def slow():
+        await asyncio.sleep(1)
+        return 'slow'
+
+    async def fast(): return 'fast'
+    async def broken(): raise ValueError('kek')
+
+    assert await policy.run('m', slow, fast) == 'fast'
+    # let the cancelled primary settle
+    for _ in range(3): await asyncio.sleep(0)
+    # the cancelled primary counts with how long it ran, not the hedge
+    assert policy.histograms['m'].min >= 0.02
+
+    with pytest.raises(ValueError):
+        await policy.run('m', slow, broken)
+    assert (policy.hedged, policy.won) == (2, 1)
+
+
+@pytest.mark.asyncio
+async def test_pool_hedges_slow_replica():
+    # far apart, so a loaded machine cannot blur fast and slow
+    fast, slow = Replica(0), Replica(5)
+    servers = [
+        await JsonRpcServer().attach_dispatcher(r, 'Kek').start_tcp(
+            '127.0.0.1'
+        ) for r in (slow, fast)
+    ]
+    policy = HedgePolicy(['Kek/read'], {'Kek/read': 0.2})
+    pool = await JsonRpcPool(
+        [tcp_connector(*s.sockets[0].getsockname()[:2]) for s in servers],
+        balancing=Balancing.round_robin, hedge=policy
+    ).start()
+
+    results = await asyncio.gather(*(
+        pool.call('Kek', 'read', i) for i in range(4)
+    ))
+    assert results == list(range(4))
+    # only the calls sent to the slow replica first are won by a hedge
+    assert policy.hedged >= 2 and policy.won == 2
+    assert fast.started == 4 and slow.started >= 1
+
+    pool.close()
+    for s in servers: s.close()
@@ -1,5 +1,6 @@
 from jsonrpc_stream.serializers import JsonSerializer
 from jsonrpc_stream import protocol as pro
+from jsonrpc_stream import exceptions
 
 import json
 import pytest
@@ -110,3 +111,39 @@ def test_batch_with_malformed_to_entity(utf8: JsonSerializer):
     x = [x for x in reality.entities if isinstance(x, pro.RpcMalformed)]
     assert len(x) == 1
     assert not x[0].id
+
+
+def test_error_without_data_reuses_details(utf8: JsonSerializer):
+    message = 'no such method found!'
+    r = pro.RpcError(3, pro.RpcErrorDetails(-32601, message, None))
+    first = utf8.entity_to_bytes(r)
+    assert json.loads(first.decode('utf-8')) == r.to_dict()
+    assert utf8.entity_to_bytes(pro.RpcError(
+        4, pro.RpcErrorDetails(-32601, message, None)
+    )) == first.replace(b'"id": 3', b'"id": 4')
+    assert utf8._error_details.cache_info().hits == 1
+
+    # messages naming a cause would only fill the cache
+    cause = pro.RpcError(5, pro.RpcErrorDetails(-32000, 'kek broke', None))
+    assert json.loads(utf8.entity_to_bytes(cause)) == cause.to_dict()
+    assert utf8._error_details.cache_info().currsize == 1
+
+
+def test_method_not_found_reuses_details(utf8: JsonSerializer):
+    error = exceptions.JsonRpcMethodNotFound.from_method('Kek/yeet')
+    for id in (1, 2, 3):
+        reply = pro.RpcError(id, error.to_error())
+        assert json.loads(utf8.entity_to_bytes(reply)) == reply.to_dict()
+    assert utf8._error_details.cache_info().hits == 2
+    assert utf8._error_details.cache_info().currsize == 1
+
+
+def test_prepared_request_matches_plain(utf8: JsonSerializer):
+    template = utf8.prepare('Kek/yeet')
+    for params in ([1, 'a'], {'a': 1}, None, ()):
+        prepared = pro.PreparedRequest(
+            7, 'Kek/yeet', params, template=template
+        )
+        plain = pro.RpcRequest(7, 'Kek/yeet', params)
+        assert json.loads(utf8.entity_to_bytes(prepared)) == \
+            json.loads(utf8.entity_to_bytes(plain))
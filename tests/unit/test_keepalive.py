@@ -0,0 +1,54 @@
+from jsonrpc_stream.endpoint import JsonRpcEndpoint
+from jsonrpc_stream.streams import LoopbackEntityStream
+from jsonrpc_stream import keepalive
+from jsonrpc_stream import protocol as pro
+
+import asyncio
+import pytest
+
+
+def test_round_trip_times():
+    rtt = keepalive.RoundTripTimes(alpha=0.5, window=2)
+    assert rtt.ewma is None and rtt.last is None
+    for sample in (1.0, 3.0, 5.0): rtt.record(sample)
+    assert rtt.ewma == 3.5
+    assert list(rtt.recent) == [3.0, 5.0]
+    assert rtt.summary() == {
+        'samples': 2, 'ewma': 3.5, 'last': 5.0,
+        'min': 3.0, 'max': 5.0, 'mean': 4.0
+    }
+
+
+@pytest.mark.asyncio
+async def test_ping_answered_without_dispatcher():
+    e = JsonRpcEndpoint(None)
+    r = await e._handle_request(pro.RpcRequest(0, keepalive.PING, None))
+    assert r == pro.RpcResult(id=0, result=None, jsonrpc='2.0')
+
+
+@pytest.mark.asyncio
+async def test_keepalive_measures_rtt():
+    a, b = LoopbackEntityStream.pair()
+    JsonRpcEndpoint(a).start()
+    client = JsonRpcEndpoint(b, ping_interval=0.01).start()
+    assert client.rtt.ewma is None
+
+    while len(client.rtt.recent) < 3: await asyncio.sleep(0.01)
+    assert client.rtt.ewma >= 0 and client.keepalive.missed == 0
+    assert JsonRpcEndpoint(a).rtt is None
+    client.close()
+    await client.join()
+    await asyncio.sleep(0)
+    assert client.keepalive.task.done()
+
+
+@pytest.mark.asyncio
+async def test_keepalive_closes_silent_peer():
+    # the peer never reads, so no ping is ever answered
+    a, b = LoopbackEntityStream.pair()
+    client = JsonRpcEndpoint(
+        b, ping_interval=0.01, max_missed_pings=2
+    ).start()
+    await asyncio.wait_for(client.join(), 1)
+    assert client.keepalive.missed == 2
+    assert b.closed and a.closed
@@ -0,0 +1,142 @@
+from jsonrpc_stream.endpoint import JsonRpcEndpoint
+from jsonrpc_stream.streams import LoopbackEntityStream
+from jsonrpc_stream import exceptions
+from jsonrpc_stream import dispatcher
+from jsonrpc_stream import limits
+
+import asyncio
+import pytest
+
+
+class Fixed(limits.Limiter):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.samples = []
+
+    def update(self, rtt, inflight, dropped):
+        self.samples.append((inflight, dropped))
+
+
+@pytest.mark.asyncio
+async def test_limiter_queues_and_fails_fast():
+    gate = asyncio.Event()
+    peak = 0
+    limiter = Fixed(initial=2, max_queue=2)
+
+    async def work():
+        nonlocal peak
+        peak = max(peak, limiter.inflight)
+        await gate.wait()
+        return 1
+
+    tasks = [asyncio.ensure_future(limiter.run(work)) for _ in range(4)]
+    await asyncio.sleep(0)
+    assert limiter.inflight == 2 and len(limiter.waiters) == 2
+    with pytest.raises(limits.LimitExceeded): await limiter.run(work)
+
+    gate.set()
+    assert await asyncio.gather(*tasks) == [1] * 4
+    assert peak == 2 and limiter.inflight == 0 and limiter.rejected == 1
+
+
+@pytest.mark.asyncio
+async def test_limiter_samples():
+    limiter = Fixed(queue_timeout=0.01, initial=1)
+
+    async def fail(ex):
+        raise ex
+
+    with pytest.raises(ConnectionResetError):
+        await limiter.run(lambda: fail(ConnectionResetError()))
+    with pytest.raises(exceptions.JsonRpcInvalidParams):
+        await limiter.run(lambda: fail(exceptions.JsonRpcInvalidParams()))
+    with pytest.raises(ValueError):
+        await limiter.run(lambda: fail(ValueError()))
+    assert limiter.samples == [(1, True), (1, False)]
+
+    gate = asyncio.Event()
+    held = asyncio.ensure_future(limiter.run(gate.wait))
+    await asyncio.sleep(0)
+    with pytest.raises(limits.LimitExceeded): await limiter.run(gate.wait)
+    gate.set()
+    await held
+    assert limiter.inflight == 0 and not limiter.waiters
+
+
+@pytest.mark.asyncio
+async def test_limiter_requires_update():
+    class Incomplete(limits.Limiter): pass
+
+    with pytest.raises(TypeError): Incomplete()
+
+
+@pytest.mark.asyncio
+async def test_aimd_limiter():
+    limiter = limits.AIMDLimiter(initial=10, max_latency=1.0)
+    limiter.update(0.1, 2, False)
+    assert limiter.estimate == 10
+    limiter.update(0.1, 5, False)
+    assert limiter.estimate == 10.1
+    limiter.update(2.0, 5, False)
+    assert limiter.limit == 9
+    for _ in range(100): limiter.update(0.1, 5, True)
+    assert limiter.limit == 1
+
+
+@pytest.mark.asyncio
+async def test_gradient_limiter():
+    limiter = limits.GradientLimiter(initial=16, max_limit=64)
+    for _ in range(50): limiter.update(0.01, 16, False)
+    grown = limiter.estimate
+    assert grown > 16
+
+    # latency climbing above the long term average shrinks the limit
+    for _ in range(50): limiter.update(0.1, int(limiter.estimate), False)
+    assert limiter.estimate < grown
+    shrunk = limiter.estimate
+    limiter.update(0.1, 1, True)
+    assert limiter.estimate < shrunk
+
+
+@pytest.mark.asyncio
+async def test_endpoint_limited_calls():
+    class Kek:
+        def __init__(self): self.inflight = self.peak = 0
+
+        @dispatcher.request
+        async def slow(self, a: int):
+            self.inflight += 1
+            self.peak = max(self.peak, self.inflight)
+            await asyncio.sleep(0.01)
+            self.inflight -= 1
+            return a
+
+    kek = Kek()
+    a, b = LoopbackEntityStream.pair()
+    JsonRpcEndpoint(a).attach_dispatcher(kek).start()
+    limiter = limits.AIMDLimiter(initial=2, max_limit=2)
+    client = JsonRpcEndpoint(b, limiter=limiter).start()
+    results = await asyncio.gather(
+        *(client.call('Kek', 'slow', i) for i in range(6))
+    )
+    assert results == list(range(6))
+    assert kek.peak <= 2 and limiter.inflight == 0
+    client.close()
+
+
+@pytest.mark.asyncio
+async def test_endpoint_timeout_counts_as_drop():
+    class Kek:
+        @dispatcher.request
+        async def hang(self): await asyncio.sleep(1)
+
+    a, b = LoopbackEntityStream.pair()
+    server = JsonRpcEndpoint(a).attach_dispatcher(Kek()).start()
+    limiter = Fixed()
+    client = JsonRpcEndpoint(b, timeout=0.01, limiter=limiter).start()
+    with pytest.raises(asyncio.TimeoutError):
+        await client.call('Kek', 'hang')
+    assert limiter.samples == [(1, True)] and limiter.inflight == 0
+    assert not client._requests
+    client.close()
+    server.close()
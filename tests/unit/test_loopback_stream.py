@@ -0,0 +1,79 @@
+from jsonrpc_stream.streams import LoopbackEntityStream
+from jsonrpc_stream.endpoint import JsonRpcEndpoint
+from jsonrpc_stream.serializers import JsonSerializer
+from jsonrpc_stream import dispatcher
+from jsonrpc_stream import protocol as pro
+
+import asyncio
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_loopback_passes_entities():
+    a, b = LoopbackEntityStream.pair()
+    r = pro.RpcRequest(0, 'yeet', {'kek': [1]})
+    await a.dispatch_entity(r)
+    assert await b.fetch_entity() is r
+
+
+@pytest.mark.asyncio
+async def test_loopback_validate_copies():
+    a, b = LoopbackEntityStream.pair(validate=True)
+    r = pro.RpcRequest(0, 'yeet', {'kek': [1]})
+    await a.dispatch_entity(r)
+    reality = await b.fetch_entity()
+    assert reality == r and reality is not r
+
+
+@pytest.mark.asyncio
+async def test_loopback_validate_serializes():
+    a, b = LoopbackEntityStream.pair(JsonSerializer(), validate=True)
+    await a.dispatch_entity(pro.RpcRequest(0, 'yeet', (1, 2)))
+    assert await b.fetch_entity() == pro.RpcRequest(0, 'yeet', [1, 2])
+
+
+@pytest.mark.asyncio
+async def test_loopback_close():
+    a, b = LoopbackEntityStream.pair()
+    await a.dispatch_entity(pro.RpcNotification('yeet', None))
+    a.close()
+    assert await a.fetch_entity() is None
+    assert await b.fetch_entity() is None
+    with pytest.raises(ConnectionResetError):
+        await b.dispatch_entity(pro.RpcNotification('yeet', None))
+
+
+@pytest.mark.asyncio
+async def test_loopback_endpoints():
+    class Kek:
+        @dispatcher.request
+        def add(self, a: int, b: int): return a + b
+
+    a, b = LoopbackEntityStream.pair(maxsize=1)
+    server = JsonRpcEndpoint(a).attach_dispatcher(Kek()).start()
+    client = JsonRpcEndpoint(b).start()
+    assert await client.call('Kek', 'add', 1, 2) == 3
+    assert await client.call('Kek', 'add', a=2, b=2) == 4
+
+    client.close()
+    await server.join()
+    await client.join()
+
+
+@pytest.mark.asyncio
+async def test_loopback_close_wakes_blocked_producers():
+    a, b = LoopbackEntityStream.pair(maxsize=1)
+    await a.dispatch_entity(pro.RpcNotification('yeet', None))
+    blocked = [
+        asyncio.ensure_future(
+            a.dispatch_entity(pro.RpcNotification('yeet', None))
+        ) for _ in range(3)
+    ]
+    await asyncio.sleep(0)
+    assert not any(t.done() for t in blocked)
+
+    b.close()
+    done, pending = await asyncio.wait(blocked, timeout=1)
+    assert not pending
+    for t in done: assert isinstance(t.exception(), ConnectionResetError)
+    assert await b.fetch_entity() is None
@@ -0,0 +1,34 @@
+from jsonrpc_stream.metrics import Histogram
+
+import pytest
+
+
+def test_histogram_percentiles():
+    h = Histogram()
+    for i in range(1, 1001): h.record(i / 1000)
+
+    assert h.count == 1000
+    assert h.percentile(50) == pytest.approx(0.5, rel=2 ** -5)
+    assert h.percentile(99) == pytest.approx(0.99, rel=2 ** -5)
+    assert h.percentile(100) == h.max == 1.0
+    assert h.min == 0.001
+
+
+def test_histogram_merge():
+    a, b = Histogram(), Histogram()
+    a.record(0.001)
+    b.record(0.002, count=3)
+    a.merge(b)
+
+    assert a.count == 4
+    assert a.summary()['max'] == 0.002
+    assert sum(count for _, count in a.buckets()) == 4
+
+
+def test_histogram_merge_layout_mismatch():
+    with pytest.raises(ValueError):
+        Histogram(precision=3).merge(Histogram(precision=5))
+
+
+def test_histogram_empty():
+    assert Histogram().summary()['p99'] == 0.0
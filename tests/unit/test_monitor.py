@@ -0,0 +1,35 @@
+from jsonrpc_stream.endpoint import JsonRpcEndpoint
+from jsonrpc_stream.monitor import StallMonitor
+from jsonrpc_stream import dispatcher
+from jsonrpc_stream import protocol as pro
+
+import asyncio
+import time
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_stall_attributed_to_method():
+    class Kek:
+        @dispatcher.request
+        def block(self):
+            time.sleep(0.3)
+            return 'yeet'
+
+        @dispatcher.request
+        def fine(self): return 'kek'
+
+    e = JsonRpcEndpoint(None).attach_dispatcher(Kek())
+    m = StallMonitor(threshold=0.1).watch(e).start()
+    await asyncio.sleep(0.1)
+    r = await e._handle_request(pro.RpcRequest(0, 'Kek/block', None))
+    assert r.result == 'yeet'
+    await e._handle_request(pro.RpcRequest(1, 'Kek/fine', None))
+    await asyncio.sleep(0.1)
+    m.stop()
+
+    report = m.report()
+    assert list(report) == ['Kek/block']
+    assert report['Kek/block']['count'] == 1
+    assert report['Kek/block']['max'] >= 0.2
+    assert report['Kek/block']['handler'].endswith('Kek.block')
@@ -0,0 +1,108 @@
+from jsonrpc_stream.pool import JsonRpcPool, Balancing, tcp_connector
+from jsonrpc_stream.server import JsonRpcServer
+from jsonrpc_stream import dispatcher
+
+import asyncio
+import pytest
+
+
+class Kek:
+    @dispatcher.request
+    def yeet(self, a: int): return a * 2
+
+
+async def serve() -> JsonRpcServer:
+    return await JsonRpcServer().attach_dispatcher(Kek()).start_tcp(
+        '127.0.0.1'
+    )
+
+
+def connector(server: JsonRpcServer):
+    return tcp_connector(*server.sockets[0].getsockname()[:2])
+
+
+@pytest.mark.asyncio
+async def test_pool_round_robin():
+    a, b = await serve(), await serve()
+    pool = await JsonRpcPool(
+        [connector(a), connector(b)], size=2,
+        balancing=Balancing.round_robin
+    ).start()
+    assert len(pool.healthy) == 4
+
+    for i in range(8): assert await pool.call('Kek', 'yeet', i) == i * 2
+    assert a.metrics()['entities_handled'] == 4
+    assert b.metrics()['entities_handled'] == 4
+    pool.close()
+    a.close()
+    b.close()
+
+
+@pytest.mark.asyncio
+async def test_pool_proxy_least_outstanding():
+    class Proxy:
+        @dispatcher.request
+        def yeet(self, a: int): pass
+
+    server = await serve()
+    pool = await JsonRpcPool([connector(server)], size=3).start()
+    proxy = Proxy()
+    pool.attach_proxy(proxy, 'Kek')
+    results = await asyncio.gather(*(proxy.yeet(i) for i in range(9)))
+    assert results == [i * 2 for i in range(9)]
+    pool.close()
+    server.close()
+
+
+@pytest.mark.asyncio
+async def test_pool_reconnects():
+    server = await serve()
+    pool = await JsonRpcPool(
+        [connector(server)], size=2, reconnect_delay=0.01
+    ).start()
+
+    for e in list(server.endpoints): e.close()
+    await asyncio.sleep(0.1)
+    assert len(pool.healthy) == 2
+    assert await pool.call('Kek', 'yeet', 1) == 2
+    assert server.metrics()['connections_total'] == 4
+    pool.close()
+    server.close()
+
+
+@pytest.mark.asyncio
+async def test_pool_retries_failing_connectors():
+    server = await serve()
+    good = connector(server)
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) == 1: raise asyncio.TimeoutError()
+        if len(attempts) == 2: raise ValueError('bad address')
+        return await good()
+
+    pool = await asyncio.wait_for(
+        JsonRpcPool([flaky], reconnect_delay=0.01).start(), 1
+    )
+    while not pool.healthy: await asyncio.sleep(0.01)
+    assert len(attempts) == 3
+    assert await pool.call('Kek', 'yeet', 1) == 2
+    pool.close()
+    server.close()
+
+
+@pytest.mark.asyncio
+async def test_pool_lowest_rtt():
+    server = await serve()
+    pool = await JsonRpcPool(
+        [connector(server)], size=2, balancing=Balancing.lowest_rtt,
+        ping_interval=0.01
+    ).start()
+    fast, slow = pool.healthy
+    fast.rtt.record(0.001)
+    slow.rtt.record(1.0)
+    assert pool.pick() is fast
+    assert await pool.call('Kek', 'yeet', 2) == 4
+    pool.close()
+    server.close()
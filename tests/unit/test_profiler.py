@@ -0,0 +1,39 @@
+from jsonrpc_stream.endpoint import JsonRpcEndpoint
+from jsonrpc_stream.profiler import Profiler, NAMESPACE
+from jsonrpc_stream import dispatcher
+from jsonrpc_stream import protocol as pro
+
+import time
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_profile_session_per_method():
+    class Kek:
+        @dispatcher.request
+        def busy(self):
+            end = time.monotonic() + 0.1
+            while time.monotonic() < end: pass
+
+    e = JsonRpcEndpoint(None).attach_dispatcher(Kek())
+    e.attach_dispatcher(Profiler(e), NAMESPACE)
+
+    r = await e._handle_request(
+        pro.RpcRequest(0, '$/profileStart', {'interval': 0.001})
+    )
+    assert r.result is True
+    await e._handle_request(pro.RpcRequest(1, 'Kek/busy', None))
+    r = await e._handle_request(pro.RpcRequest(2, '$/profileStop', None))
+
+    report = r.result
+    assert report['samples'] > 0
+    assert report['methods']['Kek/busy']['samples'] > 0
+    assert any(x.startswith('Kek/busy;busy') for x in report['collapsed'])
+
+
+@pytest.mark.asyncio
+async def test_profile_stop_without_session():
+    e = JsonRpcEndpoint(None)
+    e.attach_dispatcher(Profiler(e), NAMESPACE)
+    r = await e._handle_request(pro.RpcRequest(0, '$/profileStop', None))
+    assert isinstance(r, pro.RpcError)
@@ -0,0 +1,89 @@
+from jsonrpc_stream.server import JsonRpcServer
+from jsonrpc_stream.endpoint import JsonRpcEndpoint
+from jsonrpc_stream.streams import ContentLengthEntityStream
+from jsonrpc_stream.serializers import JsonSerializer
+from jsonrpc_stream import dispatcher
+
+import asyncio
+import pytest
+
+
+class Kek:
+    @dispatcher.request
+    def yeet(self, a: int): return a * 2
+
+    @dispatcher.request
+    async def slow(self):
+        await asyncio.sleep(0.1)
+        return 'done'
+
+
+async def connect(server: JsonRpcServer) -> JsonRpcEndpoint:
+    host, port = server.sockets[0].getsockname()[:2]
+    reader, writer = await asyncio.open_connection(host, port)
+    return JsonRpcEndpoint(
+        ContentLengthEntityStream(JsonSerializer(), reader, writer)
+    ).start()
+
+
+@pytest.mark.asyncio
+async def test_server_shares_dispatchers():
+    server = await JsonRpcServer().attach_dispatcher(Kek()).start_tcp(
+        '127.0.0.1'
+    )
+    a, b = await connect(server), await connect(server)
+    assert await a.call('Kek', 'yeet', 1) == 2
+    assert await b.call('Kek', 'yeet', 2) == 4
+
+    endpoints = list(server.endpoints)
+    assert len(endpoints) == 2
+    assert endpoints[0].dispatchers is endpoints[1].dispatchers
+
+    m = server.metrics()
+    assert m['connections_active'] == 2
+    assert m['entities_handled'] == 2
+    await server.drain()
+    assert server.metrics()['connections_active'] == 0
+
+
+@pytest.mark.asyncio
+async def test_server_connection_limit():
+    server = await JsonRpcServer(max_connections=1).attach_dispatcher(
+        Kek()
+    ).start_tcp('127.0.0.1')
+    a = await connect(server)
+    assert await a.call('Kek', 'yeet', 1) == 2
+
+    b = await connect(server)
+    await asyncio.wait_for(b.join(), 1)
+    assert server.metrics()['connections_rejected'] == 1
+    server.close()
+
+
+@pytest.mark.asyncio
+async def test_server_drain_waits_for_inflight():
+    server = await JsonRpcServer().attach_dispatcher(Kek()).start_tcp(
+        '127.0.0.1'
+    )
+    client = await connect(server)
+    call = asyncio.ensure_future(client.call('Kek', 'slow'))
+    await asyncio.sleep(0.02)
+    await server.drain(timeout=1)
+    assert await call == 'done'
+
+
+@pytest.mark.asyncio
+async def test_server_on_connect():
+    seen = []
+
+    def on_connect(e: JsonRpcEndpoint):
+        seen.append(e)
+        e.attach_dispatcher(Kek(), 'Private')
+
+    server = await JsonRpcServer(on_connect=on_connect).start_tcp(
+        '127.0.0.1'
+    )
+    client = await connect(server)
+    assert await client.call('Private', 'yeet', 3) == 6
+    assert not server.dispatchers and len(seen) == 1
+    server.close()
@@ -0,0 +1,75 @@
+from jsonrpc_stream.sharding import ConsistentHashRing, ShardedClient
+from jsonrpc_stream.endpoint import JsonRpcEndpoint
+from jsonrpc_stream.streams import LoopbackEntityStream
+from jsonrpc_stream import dispatcher
+
+import collections
+import typing
+import pytest
+
+
+def test_ring_spreads_keys():
+    ring = ConsistentHashRing()
+    for node in 'abcd': ring.add(node)
+    counts = collections.Counter(ring.lookup(i) for i in range(10000))
+    assert len(ring) == 4
+    assert all(1500 < c < 3500 for c in counts.values())
+
+
+def test_ring_moves_few_keys():
+    ring = ConsistentHashRing()
+    for node in 'abcd': ring.add(node)
+    before = {i: ring.lookup(i) for i in range(10000)}
+
+    ring.add('e')
+    moved = [i for i, node in before.items() if ring.lookup(i) != node]
+    assert all(ring.lookup(i) == 'e' for i in moved)
+    assert len(moved) < 3000
+
+    ring.remove('e')
+    assert {i: ring.lookup(i) for i in range(10000)} == before
+
+
+class Store:
+    def __init__(self, name: str): self.name = name
+
+    @dispatcher.request
+    def get(self, user: int, field: str = 'x'): return self.name
+
+
+class StoreProxy:
+    @dispatcher.request
+    async def get(self, user: int, field: str = 'x') -> typing.Any: pass
+
+
+@pytest.mark.asyncio
+async def test_sharded_client_routes_by_key():
+    client = ShardedClient()
+    servers = []
+    for name in ('a', 'b', 'c'):
+        near, far = LoopbackEntityStream.pair()
+        servers.append(JsonRpcEndpoint(far).attach_dispatcher(
+            Store(name), 'Store'
+        ).start())
+        client.add(name, JsonRpcEndpoint(near).start())
+
+    proxy = StoreProxy()
+    client.attach_proxy(proxy, 'Store')
+    client.key_by('Store', 'get', lambda user, field='x': user)
+    for user in range(20):
+        owner = client.ring.lookup(user)
+        assert await proxy.get(user) == owner
+        assert await client.call('Store', 'get', user=user) == owner
+        assert await proxy.get(user, 'y') == owner
+
+    client.close()
+    for s in servers: await s.join()
+
+
+def test_keyword_key_ignores_argument_order():
+    client = ShardedClient()
+    forward = client.key('Store', 'get', (), {'user': 7, 'field': 'y'})
+    backward = client.key('Store', 'get', (), {'field': 'y', 'user': 7})
+    assert forward == backward == 'y'
+    assert client.key('Store', 'get', (3,), {'field': 'y'}) == 3
+    assert client.key('Store', 'get', (), {}) == 'get'
@@ -0,0 +1,76 @@
+from jsonrpc_stream.shm import SharedMemoryChannel, SharedMemoryEntityStream
+from jsonrpc_stream.endpoint import JsonRpcEndpoint
+from jsonrpc_stream.serializers import JsonSerializer
+from jsonrpc_stream import dispatcher
+from jsonrpc_stream import protocol as pro
+
+import multiprocessing
+import asyncio
+import pytest
+
+
+class Kek:
+    @dispatcher.request
+    def echo(self, value): return value
+
+
+def serve(channel: SharedMemoryChannel):
+    async def run():
+        stream = SharedMemoryEntityStream(JsonSerializer(), channel, 1)
+        await JsonRpcEndpoint(stream).attach_dispatcher(Kek()).start().join()
+        stream.close()
+    asyncio.run(run())
+
+
+@pytest.fixture
+def channel():
+    channel = SharedMemoryChannel.create(size=256)
+    yield channel
+    channel.unlink()
+
+
+@pytest.mark.asyncio
+async def test_shm_wraps_and_blocks(channel: SharedMemoryChannel):
+    a = SharedMemoryEntityStream(JsonSerializer(), channel, 0)
+    b = SharedMemoryEntityStream(JsonSerializer(), channel, 1)
+
+    # every frame is bigger than a third of the ring,
+    # so writers have to wait for space and frames wrap around
+    sent = [pro.RpcNotification('yeet', ['x' * 60, i]) for i in range(20)]
+
+    async def produce():
+        for entity in sent: await a.dispatch_entity(entity)
+
+    producer = asyncio.ensure_future(produce())
+    received = [await b.fetch_entity() for _ in sent]
+    await producer
+    assert received == sent
+
+    a.close()
+    assert await b.fetch_entity() is None
+    b.close()
+
+
+@pytest.mark.asyncio
+async def test_shm_rejects_oversized(channel: SharedMemoryChannel):
+    a = SharedMemoryEntityStream(JsonSerializer(), channel, 0)
+    with pytest.raises(ValueError):
+        await a.dispatch_entity(pro.RpcNotification('yeet', ['x' * 300]))
+    a.close()
+
+
+@pytest.mark.asyncio
+async def test_shm_across_processes(channel: SharedMemoryChannel):
+    child = multiprocessing.get_context('spawn').Process(
+        target=serve, args=(channel,)
+    )
+    child.start()
+
+    stream = SharedMemoryEntityStream(JsonSerializer(), channel, 0)
+    client = JsonRpcEndpoint(stream).start()
+    for i in range(50):
+        assert await client.call('Kek', 'echo', 'x' * i) == 'x' * i
+
+    client.close()
+    await asyncio.get_event_loop().run_in_executor(None, child.join, 10)
+    assert child.exitcode == 0
@@ -0,0 +1,86 @@
+from jsonrpc_stream.spool import Spool, SpooledEntityStream
+from jsonrpc_stream.serializers import JsonSerializer
+from jsonrpc_stream import contracts
+from jsonrpc_stream import protocol as pro
+
+import asyncio
+import typing
+import pytest
+import os
+
+
+class SlowStream(contracts.RpcEntityStream):
+    def __init__(self):
+        super().__init__(JsonSerializer())
+        self.open = asyncio.Event()
+        self.sent: typing.List[bytes] = []
+        self.broken = False
+
+    async def fetch_entity(self): return None
+
+    async def dispatch_body(self, body: bytes):
+        await self.open.wait()
+        if self.broken: raise ConnectionResetError('kek')
+        self.sent.append(bytes(body))
+
+    async def dispatch_entity(self, entity: pro.RpcEntity):
+        await self.dispatch_body(self.formatter.entity_to_bytes(entity))
+
+    def close(self): pass
+
+
+def test_spool_segments(tmp_path):
+    spool = Spool(str(tmp_path), segment_size=64)
+    frames = [bytes([i]) * (i * 10) for i in range(10)]
+    for f in frames: spool.append(f)
+    assert len(spool.segments) > 1
+
+    replayed = []
+    while len(spool):
+        replayed.append(spool.peek())
+        spool.pop()
+    assert replayed == frames
+    assert len(spool.segments) == 1
+    spool.close()
+    assert not os.listdir(tmp_path)
+
+
+@pytest.mark.asyncio
+async def test_notifications_never_block():
+    sink = SlowStream()
+    stream = SpooledEntityStream(sink, memory_limit=200)
+    for i in range(50):
+        await asyncio.wait_for(stream.dispatch_entity(
+            pro.RpcNotification('kek', [i])
+        ), 0.1)
+    assert len(stream.spool) > 0 and stream.buffered <= 200
+
+    result = asyncio.ensure_future(
+        stream.dispatch_entity(pro.RpcResult(1, 'yeet'))
+    )
+    sink.open.set()
+    await result
+    received = [sink.formatter.bytes_to_entity(b) for b in sink.sent]
+    assert [e.params for e in received[:-1]] == [[i] for i in range(50)]
+    assert received[-1] == pro.RpcResult(1, 'yeet')
+    assert stream.backlog == 0
+    stream.close()
+
+
+@pytest.mark.asyncio
+async def test_backlog_survives_failure():
+    broken = SlowStream()
+    broken.broken = True
+    broken.open.set()
+    stream = SpooledEntityStream(broken, memory_limit=0)
+    await stream.dispatch_entity(pro.RpcNotification('kek', [1]))
+    await stream.dispatch_entity(pro.RpcNotification('kek', [2]))
+    with pytest.raises(ConnectionResetError): await stream.flushed()
+    assert stream.backlog == 2
+
+    working = SlowStream()
+    working.open.set()
+    stream.replace(working)
+    await stream.flushed()
+    assert len(working.sent) == 2
+    stream.close()
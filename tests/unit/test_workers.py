@@ -0,0 +1,53 @@
+from jsonrpc_stream.workers import WorkerLauncher, reuseport_supported
+from jsonrpc_stream.pool import JsonRpcPool, tcp_connector
+from jsonrpc_stream import dispatcher
+
+import asyncio
+import os
+import pytest
+
+
+class Pid:
+    @dispatcher.request
+    def pid(self): return os.getpid()
+
+
+def setup(server):
+    server.attach_dispatcher(Pid())
+
+
+async def wait_for(predicate, timeout: float = 10):
+    for _ in range(int(timeout / 0.05)):
+        if predicate(): return
+        await asyncio.sleep(0.05)
+    raise TimeoutError
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('reuse_port', [
+    pytest.param(True, marks=pytest.mark.skipif(
+        not reuseport_supported(), reason='no SO_REUSEPORT'
+    )),
+    False
+])
+async def test_workers_serve_and_restart(reuse_port: bool):
+    launcher = WorkerLauncher(
+        setup, workers=2, reuse_port=reuse_port, metrics_interval=0.1
+    ).start()
+    try:
+        pool = await JsonRpcPool(
+            [tcp_connector('127.0.0.1', launcher.port)], size=8
+        ).start()
+        pids = {await pool.call('Pid', 'pid') for _ in range(16)}
+        workers = {w.process.pid for w in launcher.workers}
+        assert pids <= workers
+        pool.close()
+
+        await wait_for(
+            lambda: launcher.metrics().get('entities_handled') == 16
+        )
+
+        launcher.workers[0].process.kill()
+        await wait_for(lambda: launcher.metrics()['worker_restarts'] == 1)
+        await wait_for(lambda: launcher.metrics()['workers_alive'] == 2)
+    finally: launcher.stop()